@@ -0,0 +1,103 @@
+"""Native arrays against arrays emulated with linked instances, on each engine: python -m benchmarks.arrays"""
+import tracemalloc
+
+from plox.interpreter import Interpreter
+from plox.plox import ENGINES
+from plox.parser import Parser
+from plox.resolver import Resolver
+from plox.scanner import FastScanner
+from .common import best_of
+
+ITEMS = 10_000
+
+# Both build a list of 0 to ITEMS - 1, then sum it, take its dot product
+# with itself and square each item, all in Lox for the linked list.
+LINKED_BUILD = """
+class Node {
+    init(value, next) {
+        this.value = value;
+        this.next = next;
+    }
+}
+var list;
+for (var i = %d - 1; i >= 0; i = i - 1) list = Node(i, list);
+"""
+
+LINKED_OPERATIONS = """
+var total = 0;
+for (var node = list; node; node = node.next) total = total + node.value;
+var dot = 0;
+for (var node = list; node; node = node.next) dot = dot + node.value * node.value;
+var squares;
+var last;
+var end;
+for (var node = list; node; node = node.next) {
+    var square = Node(node.value * node.value, end);
+    if (last) last.next = square; else squares = square;
+    last = square;
+}
+print total + dot;
+"""
+
+ARRAY_BUILD = """
+var list = Array();
+for (var i = 0; i < %d; i = i + 1) list.append(i);
+"""
+
+ARRAY_OPERATIONS = """
+var total = list.sum();
+var dot = list.dot(list);
+var squares = list.map("square");
+print total + dot;
+"""
+
+PROGRAMS = {
+    "linked": (LINKED_BUILD % ITEMS, LINKED_OPERATIONS),
+    "array": (ARRAY_BUILD % ITEMS, ARRAY_OPERATIONS),
+}
+
+
+def run(source: str, engine: str) -> Interpreter:
+    statements = Parser(FastScanner(source).scan_buffer()).parse()
+    interp = ENGINES[engine](capture_output=True)
+    interp.load("array")
+    Resolver(interp).resolve(statements)
+    interp.interpret(statements)
+    return interp
+
+
+def time_operations(operations: str, interp: Interpreter) -> float:
+    """Seconds `operations` take, after the build `interp` ran."""
+    statements = Parser(FastScanner(operations).scan_buffer()).parse()
+    Resolver(interp).resolve(statements)
+    return best_of(3, lambda: interp.interpret(statements))
+
+
+def bytes_per_item(build: str) -> float:
+    statements = Parser(FastScanner(build).scan_buffer()).parse()
+    interp = ENGINES["closure"](capture_output=True)
+    interp.load("array")
+    Resolver(interp).resolve(statements)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    interp.interpret(statements)
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return used / ITEMS
+
+
+def main() -> None:
+    for name, (build, _) in PROGRAMS.items():
+        print(f"{name:6} {ITEMS} items: {bytes_per_item(build):.0f} bytes each")
+    for engine in ENGINES:
+        times = {}
+        for name, (build, operations) in PROGRAMS.items():
+            times[name] = (best_of(3, lambda: run(build, engine)), time_operations(operations, run(build, engine)))
+        (linked_build, linked_operations), (array_build, array_operations) = times["linked"], times["array"]
+        print(f"{engine:8} build: linked {linked_build:6.3f}s, array {array_build:6.3f}s "
+              f"({linked_build / array_build:4.1f}x); sum, dot and map: linked {linked_operations:6.3f}s, "
+              f"array {array_operations:6.3f}s ({linked_operations / array_operations:6.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""Memory per AST node, tree build time and pickle time: python -m benchmarks.ast [size_in_mb]"""
+import pickle
+import sys
+import time
+import tracemalloc
+from dataclasses import fields, is_dataclass
+
+from plox.parser import Parser
+from plox.scanner import FastScanner
+from .common import SAMPLE_PROGRAM, best_of, generate_source
+
+
+def count_nodes(node) -> int:
+    if isinstance(node, list):
+        return sum(count_nodes(child) for child in node)
+    if is_dataclass(node):
+        return 1 + sum(count_nodes(getattr(node, field.name)) for field in fields(node))
+    return 0
+
+
+def main() -> None:
+    size_mb = float(sys.argv[1]) if len(sys.argv) > 1 else 0.5
+    source = generate_source(int(size_mb * 1024 * 1024), SAMPLE_PROGRAM)
+    tokens = FastScanner(source).scan_buffer()
+
+    tracemalloc.start()
+    statements = Parser(tokens).parse()
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    nodes = count_nodes(statements)
+    print(f"{nodes} nodes (tokens included), {held / nodes:.1f} B/node")
+
+    build = best_of(3, lambda: Parser(tokens).parse())
+    print(f"build {build:.3f}s ({nodes / build / 1000:.0f}k nodes/s)")
+
+    start = time.perf_counter()
+    data = pickle.dumps(statements)
+    dumped = time.perf_counter() - start
+    start = time.perf_counter()
+    pickle.loads(data)
+    print(f"pickle {dumped:.3f}s, unpickle {time.perf_counter() - start:.3f}s, {len(data) / 2**20:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""Cold vs warm start with the compilation cache: python -m benchmarks.cache [size_in_mb]"""
+import contextlib
+import io
+import sys
+import tempfile
+import time
+
+from plox.cache import CompilationCache
+from plox.interpreter import Interpreter
+from plox.parser import Parser
+from plox.plox import LoxRunner
+from plox.resolver import Resolver
+from plox.scanner import FastScanner
+from .common import best_of, generate_source
+
+
+def timed_run(source: str, cache_dir) -> float:
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        LoxRunner(cache_dir).run(source)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    size_mb = float(sys.argv[1]) if len(sys.argv) > 1 else 0.25
+    source = generate_source(int(size_mb * 1024 * 1024))
+    with tempfile.TemporaryDirectory() as cache_dir:
+        print(f"no cache {timed_run(source, None):7.2f}s")
+        print(f"cold     {timed_run(source, cache_dir):7.2f}s")
+        print(f"warm     {timed_run(source, cache_dir):7.2f}s")
+
+        def compile_source() -> None:
+            statements = Parser(FastScanner(source).scan_buffer()).parse()
+            Resolver(Interpreter()).resolve(statements)
+
+        cache = CompilationCache(cache_dir)
+        print(f"front end only: scan+parse+resolve {best_of(3, compile_source):.2f}s, "
+              f"cache load {best_of(3, lambda: cache.load(source)):.2f}s")
+
+
+if __name__ == "__main__":
+    main()
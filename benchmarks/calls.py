@@ -0,0 +1,28 @@
+"""Call-heavy programs on each engine: python -m benchmarks.calls"""
+from plox.plox import ENGINES
+from plox.parser import Parser
+from plox.resolver import Resolver
+from plox.scanner import FastScanner
+from .common import CALLS_PROGRAM, CLOSURE_PROGRAM, FIB_PROGRAM, best_of
+
+PROGRAMS = {
+    "fib": FIB_PROGRAM,
+    "calls": CALLS_PROGRAM,
+    "closures": CLOSURE_PROGRAM,
+}
+
+
+def main() -> None:
+    for name, source in PROGRAMS.items():
+        statements = Parser(FastScanner(source).scan_buffer()).parse()
+        for engine in ENGINES:
+            def run() -> None:
+                interp = ENGINES[engine](capture_output=True)
+                Resolver(interp).resolve(statements)
+                interp.interpret(statements)
+
+            print(f"{name:10} {engine:8} {best_of(3, run):6.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+import time
+from typing import Callable
+
+# A representative chunk of Lox touching every token kind the scanner knows.
+SAMPLE_PROGRAM = """
+// Generated-looking Lox, repeated to build large inputs.
+class Point {
+    init(x, y) {
+        this.x = x;
+        this.y = y;
+    }
+
+    add(other) {
+        return Point(this.x + other.x, this.y + other.y);
+    }
+}
+
+fun fib(n) {
+    if (n <= 1) return n;
+    return fib(n - 2) + fib(n - 1);
+}
+
+var total = 0;
+for (var i = 0; i < 10; i = i + 1) {
+    if (i != 3 and !(i >= 7) or i == 9) {
+        total = total + i * 2.5 / 1.25 - 1;
+    }
+}
+print "total: " + "done";
+"""
+
+EXPRESSION_PROGRAM = """
+print a + b * (c - d) / e == f or !g and h.i(j, k) <= -l;
+x = y = z.w = (1 + 2) * 3 - 4 / 5 > 6 != 7 < 8;
+result = fn(a)(b).c.d(e + f, g * h, -i) and !(0 == 0 or 1 >= 2);
+"""
+
+
+def generate_source(size: int, chunk: str = SAMPLE_PROGRAM) -> str:
+    """Repeat `chunk` until the result is at least `size` characters long."""
+    return chunk * (size // len(chunk) + 1)
+
+
+def best_of(repeat: int, func: Callable[[], object]) -> float:
+    """Run `func` `repeat` times and return the fastest wall-clock time in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+FIELDS_PROGRAM = """
+class Vec {
+    init(x, y) {
+        this.x = x;
+        this.y = y;
+    }
+}
+var v = Vec(0, 0);
+for (var i = 0; i < 20000; i = i + 1) {
+    v.x = v.x + v.y;
+    v.y = v.y + 1;
+    v.label = "vec";
+}
+print v.x;
+"""
+
+VARIABLES_PROGRAM = """
+var total = 0;
+{
+    var alpha = 1;
+    var beta = 2;
+    var gamma = 3;
+    for (var i = 0; i < 20000; i = i + 1) {
+        var delta = alpha + beta;
+        total = total + delta * gamma - beta;
+    }
+}
+print total;
+"""
+
+
+def run_lox(source: str) -> list[str]:
+    """Scan, parse, resolve and interpret `source`, returning what it printed."""
+    from plox.interpreter import Interpreter
+    from plox.parser import Parser
+    from plox.resolver import Resolver
+    from plox.scanner import FastScanner
+
+    statements = Parser(FastScanner(source).scan_buffer()).parse()
+    interp = Interpreter(capture_output=True)
+    Resolver(interp).resolve(statements)
+    interp.interpret(statements)
+    return interp.output
+
+
+FIB_PROGRAM = """
+fun fib(n) {
+    if (n < 2) return n;
+    return fib(n - 2) + fib(n - 1);
+}
+print fib(18);
+"""
+
+LOOP_PROGRAM = """
+fun loop() {
+    var sum = 0;
+    for (var i = 0; i < 20000; i = i + 1) {
+        var square = i * i;
+        sum = sum + square - i;
+    }
+    return sum;
+}
+print loop();
+"""
+
+# Local assignments with large right-hand sides, which used to cost a hash
+# of the whole subtree per execution.
+ASSIGN_PROGRAM = """
+{
+    var a = 1;
+    var b = 2;
+    var c = 3;
+    for (var i = 0; i < 5000; i = i + 1) {
+        a = (b + c) * (b - c) + (a * b - c) / (a + b + c) - (b * b - a * c) + i;
+        b = (a - c) * (a + c) - (b * c + a) / (a + b * c + 1) + (c - a) * (c + b);
+        c = -(a * b) + (b * c) - (c * a) + (a + b + c) / (a * a + b * b + 1) + i;
+        a = a / (1 + a * a);
+        b = b / (1 + b * b);
+        c = c / (1 + c * c);
+    }
+    print a + b + c;
+}
+"""
+
+# Callback-heavy: closures created and called in a loop.
+CLOSURE_PROGRAM = """
+fun apply(f, x) { return f(x); }
+fun adder(n) {
+    fun add(x) { return x + n; }
+    return add;
+}
+var total = 0;
+for (var i = 0; i < 5000; i = i + 1) {
+    var step = i * 2;
+    {
+        var scratch = step + 1;
+        total = total + apply(adder(step), scratch);
+    }
+}
+print total;
+"""
+
+# Named constants, constant subexpressions and disabled debugging code.
+CONSTANTS_PROGRAM = """
+{
+    var width = 640;
+    var height = 480;
+    var scale = 2;
+    var debug = false;
+    var total = 0;
+    for (var i = 0; i < 20000; i = i + 1) {
+        total = total + (width * height) / (scale * scale) - i * (1 / scale);
+        if (debug) print "step " + "done";
+    }
+    print total;
+}
+"""
+
+# Calls returning from inside branches and loops.
+CALLS_PROGRAM = """
+fun clamp(x, low, high) {
+    if (x < low) return low;
+    if (x > high) return high;
+    return x;
+}
+fun root(limit) {
+    for (var i = 0; i < 100; i = i + 1) {
+        if (i * i > limit) return i;
+    }
+    return -1;
+}
+var total = 0;
+for (var i = 0; i < 2000; i = i + 1) {
+    total = total + clamp(i, 100, 1500) + root(i / 10);
+}
+print total;
+"""
+
+# A top-level script, whose variables and the functions it calls are all globals.
+GLOBALS_PROGRAM = """
+var count = 0;
+var total = 0;
+fun bump(x) { return x + 1; }
+fun scale(x) { return x * 2; }
+while (count < 10000) {
+    total = total + scale(bump(count));
+    count = count + 1;
+}
+print total;
+"""
+
+# Instantiation and calls of methods inherited down a deep hierarchy.
+METHODS_PROGRAM = """
+class Base {
+    init(x) { this.x = x; }
+    value() { return this.x; }
+    twice() { return this.value() * 2; }
+}
+class A < Base {}
+class B < A {}
+class C < B {}
+class D < C {}
+class E < D {}
+class F < E {
+    twice() { return super.twice() + 1; }
+}
+var total = 0;
+for (var i = 0; i < 5000; i = i + 1) {
+    var f = F(i);
+    total = total + f.twice() + f.value();
+}
+print total;
+"""
@@ -0,0 +1,30 @@
+"""Each engine against the tree-walking one: python -m benchmarks.engines"""
+from plox.plox import ENGINES
+from plox.parser import Parser
+from plox.resolver import Resolver
+from plox.scanner import FastScanner
+from .common import CONSTANTS_PROGRAM, best_of
+from .runtime import PROGRAMS
+
+
+def main() -> None:
+    print(f"{'':10} " + " ".join(f"{engine:>16}" for engine in ENGINES))
+    for name, source in {**PROGRAMS, "constants": CONSTANTS_PROGRAM}.items():
+        statements = Parser(FastScanner(source).scan_buffer()).parse()
+
+        def run(engine: str) -> None:
+            interp = ENGINES[engine](capture_output=True)
+            Resolver(interp).resolve(statements)
+            interp.interpret(statements)
+
+        # Interleaved, so that drift in the machine's speed hits all alike.
+        times = dict.fromkeys(ENGINES, float("inf"))
+        for _ in range(5):
+            for engine in ENGINES:
+                times[engine] = min(times[engine], best_of(1, lambda: run(engine)))
+        tree = times["tree"]
+        print(f"{name:10} " + " ".join(f"{time:6.3f}s ({tree / time:5.2f}x)" for time in times.values()))
+
+
+if __name__ == "__main__":
+    main()
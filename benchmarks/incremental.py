@@ -0,0 +1,38 @@
+"""Per-edit latency of IncrementalDocument vs a full scan + parse.
+
+python -m benchmarks.incremental [size_in_mb]
+"""
+import sys
+import time
+
+from plox.incremental import IncrementalDocument
+from plox.parser import Parser
+from plox.scanner import FastScanner
+from .common import best_of, generate_source
+
+
+def main() -> None:
+    size_mb = float(sys.argv[1]) if len(sys.argv) > 1 else 0.5
+    source = generate_source(int(size_mb * 1024 * 1024))
+    middle = source.index("total + i", len(source) // 2)
+
+    full = best_of(3, lambda: Parser(FastScanner(source).scan_buffer()).parse())
+    print(f"full scan + parse      {full * 1000:9.2f}ms")
+
+    doc = IncrementalDocument(source)
+    edits = (("retype an identifier", middle, middle + 5, "total"),
+             ("insert a newline", middle, middle, "\n"),
+             ("comment out a line", middle, middle, "// "))
+    for label, start, end, text in edits:
+        begin = time.perf_counter()
+        doc.edit(start, end, text)
+        elapsed = time.perf_counter() - begin
+        print(f"{label:22} {elapsed * 1000:9.2f}ms")
+
+    begin = time.perf_counter()
+    doc.statements()
+    print(f"{'statements() rebase':22} {(time.perf_counter() - begin) * 1000:9.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
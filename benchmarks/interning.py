@@ -0,0 +1,40 @@
+"""Field- and variable-heavy microbenchmarks: python -m benchmarks.interning
+
+The lookup section times the same Environment/LoxInstance lookups with a
+name that is equal to, but not the same object as, the stored key versus
+the interned name the scanner now produces.
+"""
+import sys
+import timeit
+
+from plox.environment import Environment
+from plox.interpreter import Interpreter
+from plox.lox_class import LoxClass, LoxInstance
+from plox.tokens import Token, TokenType
+from .common import FIELDS_PROGRAM, VARIABLES_PROGRAM, best_of, run_lox
+
+
+def lookups() -> None:
+    Interpreter()  # Completes the plox.interpreter <-> lox_class import cycle.
+    name = sys.intern("counter_value")
+    env = Environment()
+    env.define(name, 1.0)
+    instance = LoxInstance(LoxClass("Counter", None, {}))
+    instance.set(Token(TokenType.IDENTIFIER, name, None, 1, 0), 1.0)
+
+    for label, lexeme in (("copied", "".join(["counter", "_value"])), ("interned", name)):
+        token = Token(TokenType.IDENTIFIER, lexeme, None, 1, 0)
+        for target, lookup in (("Environment.get", env.get), ("LoxInstance.get", instance.get)):
+            elapsed = min(timeit.repeat(lambda lookup=lookup: lookup(token), number=200000, repeat=5))
+            print(f"{target:16} {label:9} {elapsed / 200000 * 1e9:6.1f}ns")
+
+
+def main() -> None:
+    for name, program in (("fields", FIELDS_PROGRAM), ("variables", VARIABLES_PROGRAM)):
+        elapsed = best_of(5, lambda program=program: run_lox(program))
+        print(f"{name:10} {elapsed * 1000:8.1f}ms")
+    lookups()
+
+
+if __name__ == "__main__":
+    main()
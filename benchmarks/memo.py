@@ -0,0 +1,36 @@
+"""Memoizing pure functions, on each engine: python -m benchmarks.memo"""
+from plox.plox import ENGINES
+from plox.parser import Parser
+from plox.resolver import Resolver
+from plox.scanner import FastScanner
+from .common import CALLS_PROGRAM, FIB_PROGRAM, best_of
+
+PROGRAMS = {
+    "fib": FIB_PROGRAM,
+    "calls": CALLS_PROGRAM,
+}
+
+
+def main() -> None:
+    for name, source in PROGRAMS.items():
+        statements = Parser(FastScanner(source).scan_buffer()).parse()
+        for engine in ENGINES:
+            times = []
+            for memoize in (False, True):
+                interp = ENGINES[engine](capture_output=True)
+
+                def run() -> None:
+                    nonlocal interp
+                    interp = ENGINES[engine](capture_output=True)
+                    Resolver(interp, memoize).resolve(statements)
+                    interp.interpret(statements)
+
+                times.append(best_of(3, run))
+            hits = sum(memo.hits for memo in interp.memos.values())
+            calls = hits + sum(memo.misses for memo in interp.memos.values())
+            print(f"{name:6} {engine:8} {times[0]:6.3f}s, memoized {times[1]:6.3f}s ({times[0] / times[1]:6.1f}x), "
+                  f"{hits}/{calls} calls hit")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Calling natives against calling Lox functions, on each engine: python -m benchmarks.natives"""
+from plox import natives
+from plox.plox import ENGINES
+from plox.parser import Parser
+from plox.resolver import Resolver
+from plox.scanner import FastScanner
+from .common import best_of
+
+CALLS = 100_000
+
+LOOP = """
+fun nothing() { return 0; }
+for (var i = 0; i < %d; i = i + 1) { %s; }
+"""
+
+CALLEES = {
+    "loop": "nothing",
+    "lox": "nothing()",
+    "native": "nativeNothing()",
+}
+
+bench = natives.module("bench")
+
+
+@bench.native("nativeNothing")
+def native_nothing() -> float:
+    return 0.0
+
+
+# Times itself with clock(), as Lox programs can, printing the smallest
+# step the clock was seen to take.
+RESOLUTION_PROGRAM = """
+var step = 1;
+for (var i = 0; i < 1000; i = i + 1) {
+    var start = clock();
+    var end = clock();
+    while (end == start) end = clock();
+    if (end - start < step) step = end - start;
+}
+print step;
+"""
+
+
+def run(source: str, engine: str) -> list[str]:
+    statements = Parser(FastScanner(source).scan_buffer()).parse()
+    interp = ENGINES[engine](capture_output=True)
+    interp.load("bench")
+    Resolver(interp).resolve(statements)
+    interp.interpret(statements)
+    return interp.output
+
+
+def main() -> None:
+    for engine in ENGINES:
+        per_call = {name: 1e9 * best_of(3, lambda: run(LOOP % (CALLS, callee), engine)) / CALLS
+                    for name, callee in CALLEES.items()}
+        step = float(run(RESOLUTION_PROGRAM, engine)[0])
+        print(f"{engine:8} per iteration: no call {per_call['loop']:5.0f}ns, lox call {per_call['lox']:5.0f}ns, "
+              f"native call {per_call['native']:5.0f}ns; clock step {step * 1e9:.0f}ns")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+"""Interpreting with and without the optimizer: python -m benchmarks.optimizer"""
+from plox.interpreter import Interpreter
+from plox.optimizer import Optimizer
+from plox.parser import Parser
+from plox.resolver import Resolver
+from plox.scanner import FastScanner
+from .common import CONSTANTS_PROGRAM, best_of
+from .runtime import PROGRAMS
+
+
+def main() -> None:
+    for name, source in {**PROGRAMS, "constants": CONSTANTS_PROGRAM}.items():
+        statements = Parser(FastScanner(source).scan_buffer()).parse()
+        original = Interpreter(capture_output=True)
+        Resolver(original).resolve(statements)
+        optimized = Optimizer(original).optimize(statements)
+
+        def run(program=statements) -> None:
+            interp = Interpreter(capture_output=True)
+            Resolver(interp).resolve(program)
+            interp.interpret(program)
+
+        # Interleaved, so that drift in the machine's speed hits both alike.
+        plain = fast = float("inf")
+        for _ in range(5):
+            plain = min(plain, best_of(1, run))
+            fast = min(fast, best_of(1, lambda: run(optimized)))
+        print(f"{name:10} {plain:6.3f}s -> {fast:6.3f}s  ({plain / fast:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
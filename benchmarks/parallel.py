@@ -0,0 +1,25 @@
+"""Sequential vs process-pool front end: python -m benchmarks.parallel [size_in_mb] [max_jobs]"""
+import os
+import sys
+
+from plox import parallel
+from plox.parser import Parser
+from plox.scanner import FastScanner
+from .common import best_of, generate_source
+
+
+def main() -> None:
+    size_mb = float(sys.argv[1]) if len(sys.argv) > 1 else 4
+    max_jobs = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count() or 1
+    source = generate_source(int(size_mb * 1024 * 1024))
+    sequential = best_of(3, lambda: Parser(FastScanner(source).scan_buffer()).parse())
+    print(f"sequential      {sequential:7.2f}s")
+    jobs = 2
+    while jobs <= max(max_jobs, 2):
+        elapsed = best_of(3, lambda: parallel.parse(source, jobs))
+        print(f"{jobs:3} processes   {elapsed:7.2f}s  ({sequential / elapsed:.2f}x)")
+        jobs *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,20 @@
+"""Parse throughput on expression-heavy input: python -m benchmarks.parser [size_in_mb]"""
+import sys
+
+from plox.parser import Parser
+from plox.scanner import FastScanner
+from .common import EXPRESSION_PROGRAM, SAMPLE_PROGRAM, best_of, generate_source
+
+
+def main() -> None:
+    size_mb = float(sys.argv[1]) if len(sys.argv) > 1 else 0.5
+    for name, chunk in (("expressions", EXPRESSION_PROGRAM), ("mixed", SAMPLE_PROGRAM)):
+        source = generate_source(int(size_mb * 1024 * 1024), chunk)
+        tokens = FastScanner(source).scan_tokens()
+        elapsed = best_of(3, lambda tokens=tokens: Parser(tokens).parse())
+        megabytes = len(source) / (1024 * 1024)
+        print(f"{name:12} {len(tokens) / elapsed / 1000:8.1f}k tokens/s {megabytes / elapsed:6.2f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+"""How often specialized operators hold in the tree walker: python -m benchmarks.quickening"""
+from plox.interpreter import Interpreter
+from plox.parser import Parser
+from plox.quickening import summarize
+from plox.resolver import Resolver
+from plox.scanner import FastScanner
+from .runtime import PROGRAMS
+from .common import best_of
+
+
+def main() -> None:
+    for name, source in PROGRAMS.items():
+        statements = Parser(FastScanner(source).scan_buffer()).parse()
+        interp = Interpreter(capture_output=True)
+
+        def run() -> None:
+            nonlocal interp
+            interp = Interpreter(capture_output=True)
+            Resolver(interp).resolve(statements)
+            interp.interpret(statements)
+
+        elapsed = best_of(3, run)
+        totals = summarize(interp.quickened.values())
+        evaluated = totals["hits"] + totals["misses"]
+        held = totals["hits"] / evaluated if evaluated else 0.0
+        print(f"{name:10} {elapsed:6.3f}s  {totals['specialized']:3}/{totals['sites']:<3} sites specialized, "
+              f"held {held:7.2%} of {evaluated} evaluations, {totals['deopts']} deopts")
+
+
+if __name__ == "__main__":
+    main()
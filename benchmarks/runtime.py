@@ -0,0 +1,34 @@
+"""Interpreter speed on small programs: python -m benchmarks.runtime"""
+from plox.interpreter import Interpreter
+from plox.parser import Parser
+from plox.resolver import Resolver
+from plox.scanner import FastScanner
+from .common import (ASSIGN_PROGRAM, CLOSURE_PROGRAM, FIB_PROGRAM, FIELDS_PROGRAM, GLOBALS_PROGRAM, LOOP_PROGRAM,
+                     METHODS_PROGRAM, VARIABLES_PROGRAM, best_of)
+
+PROGRAMS = {
+    "fib": FIB_PROGRAM,
+    "loop": LOOP_PROGRAM,
+    "variables": VARIABLES_PROGRAM,
+    "fields": FIELDS_PROGRAM,
+    "assign": ASSIGN_PROGRAM,
+    "closures": CLOSURE_PROGRAM,
+    "methods": METHODS_PROGRAM,
+    "globals": GLOBALS_PROGRAM,
+}
+
+
+def main() -> None:
+    for name, source in PROGRAMS.items():
+        statements = Parser(FastScanner(source).scan_buffer()).parse()
+
+        def run() -> None:
+            interp = Interpreter(capture_output=True)
+            Resolver(interp).resolve(statements)
+            interp.interpret(statements)
+
+        print(f"{name:10} {best_of(3, run):6.3f}s")
+
+
+if __name__ == "__main__":
+    main()
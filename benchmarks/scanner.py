@@ -0,0 +1,19 @@
+"""Scanner throughput in MB/s: python -m benchmarks.scanner [size_in_mb]"""
+import sys
+
+from plox.scanner import FastScanner, Scanner
+from .common import best_of, generate_source
+
+
+def main() -> None:
+    size_mb = float(sys.argv[1]) if len(sys.argv) > 1 else 2.0
+    source = generate_source(int(size_mb * 1024 * 1024))
+    megabytes = len(source.encode("utf-8")) / (1024 * 1024)
+
+    for scanner in (Scanner, FastScanner):
+        elapsed = best_of(3, lambda scanner=scanner: scanner(source).scan_tokens())
+        print(f"{scanner.__name__:12} {megabytes / elapsed:8.2f} MB/s ({elapsed:.3f}s for {megabytes:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
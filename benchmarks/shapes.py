@@ -0,0 +1,51 @@
+"""Instance memory and field access with shapes: python -m benchmarks.shapes"""
+import tracemalloc
+
+from plox.lox_class import LoxClass, LoxInstance
+from plox.plox import ENGINES
+from plox.parser import Parser
+from plox.resolver import Resolver
+from plox.scanner import FastScanner
+from plox.tokens import Token, TokenType
+from .common import FIELDS_PROGRAM, METHODS_PROGRAM, best_of
+
+INSTANCES = 10_000
+FIELDS = ("x", "y", "z")
+
+PROGRAMS = {
+    "fields": FIELDS_PROGRAM,
+    "methods": METHODS_PROGRAM,
+}
+
+
+def bytes_per_instance() -> float:
+    klass = LoxClass("Point", None, {})
+    names = [Token(TokenType.IDENTIFIER, field, None, 1, 0) for field in FIELDS]
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    instances = []
+    for i in range(INSTANCES):
+        instance = LoxInstance(klass)
+        for name in names:
+            instance.set(name, float(i))
+        instances.append(instance)
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return used / len(instances)
+
+
+def main() -> None:
+    print(f"{INSTANCES} instances with {len(FIELDS)} fields: {bytes_per_instance():.0f} bytes each")
+    for name, source in PROGRAMS.items():
+        statements = Parser(FastScanner(source).scan_buffer()).parse()
+        for engine in ENGINES:
+            def run() -> None:
+                interp = ENGINES[engine](capture_output=True)
+                Resolver(interp).resolve(statements)
+                interp.interpret(statements)
+
+            print(f"{name:10} {engine:8} {best_of(3, run):6.3f}s")
+
+
+if __name__ == "__main__":
+    main()
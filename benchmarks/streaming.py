@@ -0,0 +1,55 @@
+"""Peak memory and time to first output of run_file, with and without --stream.
+
+python -m benchmarks.streaming [size_in_mb]
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from plox.plox import LoxRunner
+from .common import generate_source
+
+
+class FirstWriteClock(io.StringIO):
+    """Discards output but remembers when the first write happened."""
+    def __init__(self) -> None:
+        super().__init__()
+        self.first_write = 0.0
+
+    def write(self, s: str) -> int:
+        if not self.first_write:
+            self.first_write = time.perf_counter()
+        return len(s)
+
+
+def measure(file_name: str, stream: bool) -> tuple[float, float, int]:
+    sink = FirstWriteClock()
+    tracemalloc.start()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(sink):
+        LoxRunner().run_file(file_name, stream)
+    total = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return sink.first_write - start, total, peak
+
+
+def main() -> None:
+    size_mb = float(sys.argv[1]) if len(sys.argv) > 1 else 0.5
+    with tempfile.NamedTemporaryFile("w", suffix=".lox", delete=False, encoding="utf-8") as file:
+        file.write(generate_source(int(size_mb * 1024 * 1024)))
+    try:
+        for stream in (False, True):
+            first, total, peak = measure(file.name, stream)
+            label = "streaming" if stream else "whole file"
+            print(f"{label:10} first output {first * 1000:9.1f}ms  total {total:6.2f}s  peak {peak / 2**20:7.1f} MiB")
+    finally:
+        os.unlink(file.name)
+
+
+if __name__ == "__main__":
+    main()
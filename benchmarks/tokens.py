@@ -0,0 +1,35 @@
+"""Memory held by a scanned token stream: list[Token] vs TokenBuffer.
+
+python -m benchmarks.tokens [size_in_mb]
+"""
+import sys
+import time
+import tracemalloc
+
+from plox.parser import Parser
+from plox.scanner import FastScanner
+from .common import generate_source
+
+
+def main() -> None:
+    size_mb = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+    source = generate_source(int(size_mb * 1024 * 1024))
+
+    for label, scan in (("list[Token]", lambda: FastScanner(source).scan_tokens()),
+                        ("TokenBuffer", lambda: FastScanner(source).scan_buffer())):
+        tracemalloc.start()
+        start = time.perf_counter()
+        tokens = scan()
+        scanned = time.perf_counter() - start
+        held, _ = tracemalloc.get_traced_memory()
+        Parser(tokens).parse()
+        total = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{label:12} {len(tokens)} tokens, {held / len(tokens):6.1f} B/token held, "
+              f"scan {scanned:.2f}s, scan+parse {total:.2f}s, peak {peak / 2**20:.1f} MiB")
+        del tokens
+
+
+if __name__ == "__main__":
+    main()
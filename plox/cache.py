@@ -0,0 +1,100 @@
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+from typing import Optional
+
+from .stmt import Stmt
+
+_fingerprint: Optional[bytes] = None
+
+
+def default_directory() -> str:
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "plox")
+
+
+def interpreter_fingerprint() -> bytes:
+    """Digest of the Python version and every plox module.
+
+    Any change to the interpreter, including to the AST classes the cache
+    pickles, therefore invalidates everything cached before it.
+    """
+    global _fingerprint
+    if _fingerprint is None:
+        digest = hashlib.sha256(sys.implementation.cache_tag.encode())
+        package = os.path.dirname(os.path.abspath(__file__))
+        for name in sorted(os.listdir(package)):
+            if name.endswith(".py"):
+                with open(os.path.join(package, name), "rb") as module:
+                    digest.update(name.encode())
+                    digest.update(module.read())
+        _fingerprint = digest.digest()
+    return _fingerprint
+
+
+class CompilationCache:
+    """Scanned, parsed and resolved programs stored on disk.
+
+    Entries are keyed by a hash of the source and the interpreter
+    fingerprint, and hold the statements together with the Interpreter's
+    side tables, pickled in one go so the keys stay the very nodes in the
+    tree. Writers go through a temporary file and an atomic rename, so
+    concurrent runs never see a partial entry; an unreadable entry is
+    treated as a miss and overwritten.
+
+    Loading an entry unpickles it, which can run arbitrary code, so the
+    directory must not be shared with, or writable by, anyone else.
+    """
+    def __init__(self, directory: str, options: str = "") -> None:
+        self.directory = directory
+        # Anything else that changes the compiled program, e.g. "no-opt".
+        self.options = options
+
+    def key(self, source: str) -> str:
+        digest = hashlib.sha256(interpreter_fingerprint())
+        digest.update(self.options.encode())
+        digest.update(source.encode("utf-8", "surrogatepass"))
+        return digest.hexdigest()
+
+    def load(self, source: str) -> Optional[tuple[list[Stmt], tuple[dict | set, ...]]]:
+        key = self.key(source)
+        try:
+            with open(self.__path(key), "rb") as entry:
+                stored_key, statements, resolved = pickle.load(entry)
+        except FileNotFoundError:
+            return None
+        except Exception:  # pylint: disable=broad-except
+            # Truncated or otherwise corrupt entries surface as a variety of
+            # unpickling errors; recompile and overwrite them.
+            return None
+        if stored_key != key:
+            return None
+        return statements, resolved
+
+    def store(self, source: str, statements: list[Stmt], resolved: tuple[dict | set, ...]) -> None:
+        key = self.key(source)
+        try:
+            data = pickle.dumps((key, statements, resolved), pickle.HIGHEST_PROTOCOL)
+        except RecursionError:
+            # Too deeply nested to pickle; just don't cache it.
+            return
+
+        try:
+            os.makedirs(self.directory, mode=0o700, exist_ok=True)
+            fd, temporary = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        except OSError:
+            return
+        try:
+            with os.fdopen(fd, "wb") as entry:
+                entry.write(data)
+            os.replace(temporary, self.__path(key))
+        except OSError:
+            try:
+                os.unlink(temporary)
+            except OSError:
+                pass
+
+    def __path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".pickle")
@@ -0,0 +1,169 @@
+from bisect import bisect_right
+from enum import IntEnum
+from typing import Any, Optional
+
+from .environment import FrameLayout
+from .interpreter import stringify
+from .stmt import Function
+
+
+class OpCode(IntEnum):
+    CONSTANT = 0
+    POP = 1
+    GET_LOCAL = 2
+    SET_LOCAL = 3
+    DEFINE_LOCAL = 4
+    GET_CELL = 5
+    SET_CELL = 6
+    DEFINE_CELL = 7
+    NEW_CELL = 8
+    GET_UPVALUE = 9
+    SET_UPVALUE = 10
+    GET_GLOBAL = 11
+    SET_GLOBAL = 12
+    DEFINE_GLOBAL = 13
+    GET_PROPERTY = 14
+    CHECK_INSTANCE = 15
+    SET_PROPERTY = 16
+    GET_SUPER = 17
+    EQUAL = 18
+    NOT_EQUAL = 19
+    GREATER = 20
+    GREATER_EQUAL = 21
+    LESS = 22
+    LESS_EQUAL = 23
+    ADD = 24
+    SUBTRACT = 25
+    MULTIPLY = 26
+    DIVIDE = 27
+    NOT = 28
+    NEGATE = 29
+    PRINT = 30
+    JUMP = 31
+    JUMP_IF_FALSE = 32
+    JUMP_IF_TRUE = 33
+    POP_JUMP_IF_FALSE = 34
+    CALL = 35
+    CLOSURE = 36
+    INHERIT = 37
+    CLASS = 38
+    RETURN = 39
+
+
+# Instructions are an opcode followed by this many operands, 0 if not listed.
+# Global variable instructions take the name's constant, then its cell's.
+OPERANDS = {
+    OpCode.CONSTANT: 1,
+    OpCode.GET_LOCAL: 1,
+    OpCode.SET_LOCAL: 1,
+    OpCode.DEFINE_LOCAL: 1,
+    OpCode.GET_CELL: 1,
+    OpCode.SET_CELL: 1,
+    OpCode.DEFINE_CELL: 1,
+    OpCode.NEW_CELL: 1,
+    OpCode.GET_UPVALUE: 1,
+    OpCode.SET_UPVALUE: 1,
+    OpCode.GET_GLOBAL: 2,
+    OpCode.SET_GLOBAL: 2,
+    OpCode.DEFINE_GLOBAL: 2,
+    OpCode.GET_PROPERTY: 1,
+    OpCode.CHECK_INSTANCE: 1,
+    OpCode.SET_PROPERTY: 1,
+    OpCode.GET_SUPER: 1,
+    OpCode.JUMP: 1,
+    OpCode.JUMP_IF_FALSE: 1,
+    OpCode.JUMP_IF_TRUE: 1,
+    OpCode.POP_JUMP_IF_FALSE: 1,
+    OpCode.CALL: 1,
+    OpCode.CLOSURE: 1,
+    OpCode.CLASS: 3,
+}
+
+# Operands that index the constant pool, which the disassembler shows.
+_CONSTANT_OPERANDS = {
+    OpCode.CONSTANT, OpCode.GET_GLOBAL, OpCode.SET_GLOBAL, OpCode.DEFINE_GLOBAL, OpCode.GET_PROPERTY,
+    OpCode.CHECK_INSTANCE, OpCode.SET_PROPERTY, OpCode.GET_SUPER, OpCode.CLOSURE, OpCode.CLASS,
+}
+
+
+class Chunk:
+    """Bytecode: opcodes and operands, their constants and their lines."""
+    def __init__(self) -> None:
+        self.code: list[int] = []
+        # Values, and the names, global cells and prototypes instructions take.
+        self.constants: list[Any] = []
+        self.__constant_indices: dict[tuple[type, object], int] = {}
+        # (offset, line) wherever the line changes, rather than one per instruction.
+        self.lines: list[tuple[int, int]] = []
+
+    def write(self, line: int, op: OpCode, *operands: int) -> int:
+        """Append an instruction and return its offset."""
+        offset = len(self.code)
+        if not self.lines or self.lines[-1][1] != line:
+            self.lines.append((offset, line))
+        self.code.append(int(op))
+        self.code.extend(operands)
+        return offset
+
+    def patch_jump(self, offset: int) -> None:
+        """Point the jump at `offset` to the next instruction written."""
+        self.code[offset + 1] = len(self.code)
+
+    def add_constant(self, value: object) -> int:
+        try:
+            # By hex for floats, as -0.0 == 0.0 but prints differently.
+            key = (type(value), value.hex() if isinstance(value, float) else value)
+            index = self.__constant_indices.get(key)
+        except TypeError:
+            key, index = None, None
+        if index is None:
+            index = len(self.constants)
+            self.constants.append(value)
+            if key:
+                self.__constant_indices[key] = index
+        return index
+
+    def line(self, offset: int) -> int:
+        return self.lines[bisect_right(self.lines, (offset, float("inf"))) - 1][1]
+
+
+class Prototype:
+    """A compiled function, from which the VM creates its closures."""
+    def __init__(self, name: str, declaration: Optional[Function], layout: FrameLayout,
+                 is_initializer: bool = False) -> None:
+        self.name = name
+        self.declaration = declaration
+        self.layout = layout
+        self.is_initializer = is_initializer
+        self.chunk = Chunk()
+
+    def __str__(self) -> str:
+        return f"<fn {self.name}>"
+
+
+def disassemble(prototype: Prototype) -> str:
+    """A listing of `prototype`'s bytecode and that of every function in it."""
+    chunk = prototype.chunk
+    listing = [f"== {prototype.name} =="]
+    nested = []
+    offset = 0
+    previous_line = None
+    while offset < len(chunk.code):
+        op = OpCode(chunk.code[offset])
+        operands = chunk.code[offset + 1:offset + 1 + OPERANDS.get(op, 0)]
+        line = chunk.line(offset)
+        text = f"{offset:04} {'   |' if line == previous_line else f'{line:4}'} {op.name:<17}"
+        if operands:
+            text += " ".join(f"{operand:4}" for operand in operands)
+        if op in _CONSTANT_OPERANDS:
+            constant = chunk.constants[operands[0]]
+            text += f" '{getattr(constant, 'lexeme', None) or stringify(constant)}'"
+            if isinstance(constant, Prototype):
+                nested.append(constant)
+        listing.append(text.rstrip())
+        previous_line = line
+        offset += 1 + len(operands)
+    for function in nested:
+        listing.append("")
+        listing.append(disassemble(function))
+    return "\n".join(listing)
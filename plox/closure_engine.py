@@ -0,0 +1,521 @@
+import numbers
+from sys import intern
+from typing import Any, Callable, Optional, cast
+
+from .environment import CELL, LOCAL, UNDEFINED, Cell, FrameLayout
+from .expr import Assign, Binary, Call, Expr, Get, Grouping, Literal, Logical, Set, Super, This, Unary, Variable
+from .interpreter import Interpreter, is_equal, stringify
+from .lox_callable import LoxCallable, LoxFunction
+from .lox_class import LoxClass, LoxInstance
+from .runtime_exception import PloxRuntimeException
+from .stmt import Block, Class, Expression, Function, If, Print, Return, Stmt, Var, While
+from .tokens import Token, TokenType
+
+# Compiled code takes the running frame: the function's slots followed by
+# the list of cells its closure captured.
+Frame = list
+Code = Callable[[Frame], object]
+
+# Compiled statements return None, or what a return statement among them
+# returned, with this standing in for a returned None.
+_NONE = object()
+
+
+class CompiledFunction(LoxFunction):
+    """A LoxFunction whose body has been compiled to a closure."""
+    def __init__(self, declaration: Function, layout: FrameLayout, upvalues: list[Cell], body: Code,
+                 is_initializer: bool = False, receiver: Optional[object] = None):
+        super().__init__(declaration, layout, upvalues, is_initializer, receiver)
+        self.body = body
+
+    def bind(self, instance: object) -> 'CompiledFunction':
+        return CompiledFunction(self.declaration, self.layout, self.upvalues, self.body, self.is_initializer, instance)
+
+    def call(self, interpreter: Interpreter, arguments: list[object]) -> object:
+        size, boxed, _ = self.layout
+        if self.receiver is None:
+            frame = arguments + [None] * (size - len(arguments))
+        else:
+            frame = [self.receiver, *arguments] + [None] * (size - 1 - len(arguments))
+        frame.append(self.upvalues)
+        for slot in boxed:
+            frame[slot] = Cell(frame[slot])
+        result = self.body(frame)
+        if self.is_initializer:
+            return self.receiver
+        return None if result is _NONE else result
+
+
+class ClosureInterpreter(Interpreter):
+    """Runs programs by first compiling every node into a Python closure.
+
+    Each closure has its operands' closures, resolved slots and tokens
+    bound when it's created, so running the program is nothing but calls
+    between them: no dispatch on node types and no side table lookups.
+    Behaves exactly like Interpreter, which it takes the resolver's side
+    tables, the globals and output handling from.
+    """
+    def interpret(self, statements: list[Stmt]) -> None:
+        compiled = []
+        for statement in statements:
+            layout = self.frames.get(statement)
+            self.__upvalue_slot = layout[0] if layout else 0
+            compiled.append((self.__upvalue_slot, self.compile_statement(statement)))
+        try:
+            for size, code in compiled:
+                code([None] * size + [[]])
+        except PloxRuntimeException as pre:
+            from .plox import error
+            error(pre.line, pre.message)
+
+    def compile_statement(self, statement: Stmt) -> Code:
+        match statement:
+            case Block(statements):
+                return self.__sequence(statements)
+            case Expression(expression):
+                value = self.compile_expr(expression)
+
+                def expression_statement(frame: Frame) -> None:
+                    value(frame)
+                return expression_statement
+            case Print(expression):
+                value = self.compile_expr(expression)
+                if self.capture_output:
+                    output = self.output
+
+                    def print_captured(frame: Frame) -> None:
+                        output.append(stringify(value(frame)))
+                    return print_captured
+
+                def print_statement(frame: Frame) -> None:
+                    print(stringify(value(frame)))
+                return print_statement
+            case Return(_, return_value):
+                if not return_value:
+                    def return_none(frame: Frame) -> object:
+                        return _NONE
+                    return return_none
+                value = self.compile_expr(return_value)
+
+                def return_statement(frame: Frame) -> object:
+                    result = value(frame)
+                    return _NONE if result is None else result
+                return return_statement
+            case Var(name, initializer):
+                initial = self.compile_expr(initializer) if initializer else None
+                declare = self.__declaration(statement, name)
+
+                def var(frame: Frame) -> None:
+                    declare(frame, initial(frame) if initial else None)
+                return var
+            case Function(name, _, _):
+                return self.__function_declaration(statement, name, self.__closure(statement))
+            case If(condition, then_branch, else_branch):
+                test = self.compile_expr(condition)
+                then_code = self.compile_statement(then_branch)
+                if else_branch:
+                    else_code = self.compile_statement(else_branch)
+
+                    def if_else(frame: Frame) -> object:
+                        if test(frame):
+                            return then_code(frame)
+                        return else_code(frame)
+                    return if_else
+
+                def if_then(frame: Frame) -> object:
+                    if test(frame):
+                        return then_code(frame)
+                    return None
+                return if_then
+            case While(condition, body):
+                test = self.compile_expr(condition)
+                body_code = self.compile_statement(body)
+
+                def while_loop(frame: Frame) -> object:
+                    while test(frame):
+                        result = body_code(frame)
+                        if result is not None:
+                            return result
+                    return None
+                return while_loop
+            case Class() as klass:
+                return self.__class(klass)
+        raise Exception(f"Unexpected statement {statement}")
+
+    def compile_expr(self, expr: Expr) -> Code:
+        match expr:
+            case Binary(left, op, right):
+                return self.__binary(self.compile_expr(left), op, self.compile_expr(right))
+            case Call(callee, paren, arguments):
+                return self.__call(self.compile_expr(callee), paren, [self.compile_expr(arg) for arg in arguments])
+            case Get(obj, name):
+                instance = self.compile_expr(obj)
+                lexeme = name.lexeme
+                # Inline caches: the field's slot in the last shape seen here
+                # (None if it has no such field), and the method found for
+                # the last class. Shapes and classes never change, so
+                # neither can go stale.
+                field_cache: list = [None, None]
+                method_cache: list = [None, None]
+
+                def get(frame: Frame) -> object:
+                    target = instance(frame)
+                    if not isinstance(target, LoxInstance):
+                        raise PloxRuntimeException(name, "Only instances have properties")
+                    shape = target.shape
+                    if shape is None:
+                        return target.get(name)
+                    if shape is not field_cache[0]:
+                        field_cache[0], field_cache[1] = shape, shape.slots.get(lexeme)
+                    slot = field_cache[1]
+                    if slot is not None:
+                        return target.values[slot]
+                    klass = target.klass
+                    if klass is not method_cache[0]:
+                        method_cache[0], method_cache[1] = klass, klass.find_method(lexeme)
+                    method = method_cache[1]
+                    if method:
+                        return method.bind(target)
+                    raise PloxRuntimeException(name, f"Undefined property '{lexeme}'.")
+                return get
+            case Grouping(expression):
+                return self.compile_expr(expression)
+            case Literal(value):
+                def literal(frame: Frame) -> object:
+                    return value
+                return literal
+            case Unary(op, right):
+                return self.__unary(op, self.compile_expr(right))
+            case Variable(name) | This(name):
+                return self.__load(self.locals.get(expr), name)
+            case Assign(name, value):
+                return self.__store(self.locals.get(expr), name, self.compile_expr(value))
+            case Logical(left, op, right):
+                first = self.compile_expr(left)
+                second = self.compile_expr(right)
+                if op.token_type == TokenType.OR:
+                    def logical_or(frame: Frame) -> object:
+                        return first(frame) or second(frame)
+                    return logical_or
+
+                def logical_and(frame: Frame) -> object:
+                    return first(frame) and second(frame)
+                return logical_and
+            case Set(obj, name, value):
+                instance = self.compile_expr(obj)
+                new_value = self.compile_expr(value)
+                lexeme = name.lexeme
+                # What setting the field did to the last shape seen here:
+                # the shape, the field's slot in it, and if the field had to
+                # be added instead, the shape that led to.
+                set_cache: list = [None, None, None]
+
+                def set_field(frame: Frame) -> None:
+                    target = instance(frame)
+                    if not isinstance(target, LoxInstance):
+                        raise PloxRuntimeException(name, "Only instances have fields.")
+                    evaluated = new_value(frame)
+                    shape = target.shape
+                    if shape is set_cache[0] and shape is not None:
+                        added = set_cache[2]
+                        if added:
+                            target.shape = added
+                            target.values.append(evaluated)
+                        else:
+                            target.values[set_cache[1]] = evaluated
+                        return None
+                    target.set(name, evaluated)
+                    if shape is not None and target.shape is not None:
+                        slot = shape.slots.get(lexeme)
+                        set_cache[0], set_cache[1], set_cache[2] = \
+                            shape, slot, None if slot is not None else target.shape
+                    return None
+                return set_field
+            case Super(keyword, method):
+                superclass = self.__load(self.locals[expr], keyword)
+                this = self.__load(self.implicit[expr], keyword)
+                # The method found in the last superclass seen here.
+                super_cache: list = [None, None]
+
+                def super_method(frame: Frame) -> object:
+                    superklass = superclass(frame)
+                    assert isinstance(superklass, LoxClass)
+                    instance = this(frame)
+                    assert isinstance(instance, LoxInstance)
+                    if superklass is not super_cache[0]:
+                        super_cache[0], super_cache[1] = superklass, superklass.find_method(method.lexeme)
+                    found = super_cache[1]
+                    if not found:
+                        raise PloxRuntimeException(keyword, "Couldn't find super method?")
+                    return found.bind(instance)
+                return super_method
+        raise Exception(f"Unexpected expr {expr}")
+
+    def __sequence(self, statements: list[Stmt]) -> Code:
+        codes = [self.compile_statement(statement) for statement in statements]
+        if len(codes) == 1:
+            return codes[0]
+
+        def sequence(frame: Frame) -> object:
+            for code in codes:
+                result = code(frame)
+                if result is not None:
+                    return result
+            return None
+        return sequence
+
+    def __load(self, access: Optional[list[int]], name: Token) -> Code:
+        if not access:
+            global_cell = self.globals.cell(name.lexeme)
+
+            def global_variable(frame: Frame) -> object:
+                value = global_cell.value
+                if value is UNDEFINED:
+                    raise PloxRuntimeException(name, f"Undefined variable {name.lexeme}.")
+                return value
+            return global_variable
+        kind, index = access
+        if kind == LOCAL:
+            def local(frame: Frame) -> object:
+                return frame[index]
+            return local
+        if kind == CELL:
+            def cell(frame: Frame) -> object:
+                return frame[index].value
+            return cell
+        upvalues = self.__upvalue_slot
+
+        def upvalue(frame: Frame) -> object:
+            return frame[upvalues][index].value
+        return upvalue
+
+    def __store(self, access: Optional[list[int]], name: Token, value: Code) -> Code:
+        if not access:
+            global_cell = self.globals.cell(name.lexeme)
+
+            def assign_global(frame: Frame) -> object:
+                result = value(frame)
+                if global_cell.value is UNDEFINED:
+                    raise PloxRuntimeException(name, f"Undefined variable '{name.lexeme}'")
+                global_cell.value = result
+                return result
+            return assign_global
+        kind, index = access
+        if kind == LOCAL:
+            def assign_local(frame: Frame) -> object:
+                result = frame[index] = value(frame)
+                return result
+            return assign_local
+        if kind == CELL:
+            def assign_cell(frame: Frame) -> object:
+                result = frame[index].value = value(frame)
+                return result
+            return assign_cell
+        upvalues = self.__upvalue_slot
+
+        def assign_upvalue(frame: Frame) -> object:
+            result = frame[upvalues][index].value = value(frame)
+            return result
+        return assign_upvalue
+
+    def __declaration(self, declaration: Stmt, name: Token) -> Callable[[Frame, object], None]:
+        access = self.declarations.get(declaration)
+        if not access:
+            global_cell = self.globals.cell(name.lexeme)
+
+            def define_global(frame: Frame, value: object) -> None:
+                global_cell.value = value
+            return define_global
+        kind, index = access
+        if kind == CELL:
+            # A new cell every time, so each pass through a loop body gets
+            # variables of its own.
+            def define_cell(frame: Frame, value: object) -> None:
+                frame[index] = Cell(value)
+            return define_cell
+
+        def define_local(frame: Frame, value: object) -> None:
+            frame[index] = value
+        return define_local
+
+    def __forward_declaration(self, declaration: Stmt) -> Optional[Callable[[Frame], Cell]]:
+        """For a captured function or class, code creating its cell up front,
+        so that it can capture itself."""
+        access = self.declarations.get(declaration)
+        if not access or access[0] != CELL:
+            return None
+        index = access[1]
+
+        def forward_declare(frame: Frame) -> Cell:
+            cell = frame[index] = Cell(None)
+            return cell
+        return forward_declare
+
+    def __function_declaration(self, declaration: Stmt, name: Token, create: Code) -> Code:
+        forward_declare = self.__forward_declaration(declaration)
+        if forward_declare:
+            def declare_captured(frame: Frame) -> None:
+                cell = forward_declare(frame)
+                cell.value = create(frame)
+            return declare_captured
+        declare = self.__declaration(declaration, name)
+
+        def declare_function(frame: Frame) -> None:
+            declare(frame, create(frame))
+        return declare_function
+
+    def __closure(self, declaration: Function, is_initializer: bool = False) -> Code:
+        """Code creating a CompiledFunction for `declaration` in the running frame."""
+        layout = self.frames[declaration]
+        enclosing_upvalues = self.__upvalue_slot
+        self.__upvalue_slot = layout[0]
+        body = self.__sequence(declaration.body)
+        self.__upvalue_slot = enclosing_upvalues
+        captures = layout[2]
+        if declaration in self.pure:
+            # Pure functions are global ones, which capture nothing.
+            def memoized_closure(frame: Frame) -> LoxFunction:
+                return self.memoized(CompiledFunction(declaration, layout, [], body))
+            return memoized_closure
+
+        def closure(frame: Frame) -> CompiledFunction:
+            captured = [frame[index] if in_frame else frame[enclosing_upvalues][index]
+                        for in_frame, index in captures]
+            return CompiledFunction(declaration, layout, captured, body, is_initializer)
+        return closure
+
+    def __class(self, klass: Class) -> Code:
+        name = klass.name
+        superclass = self.compile_expr(klass.superclass) if klass.superclass else None
+        super_slot = self.implicit[klass][1] if klass.superclass else None
+        super_captured = klass.superclass is not None and self.implicit[klass][0] == CELL
+        methods = [(method.name.lexeme, self.__closure(method, method.name.lexeme == "init"))
+                   for method in klass.methods]
+
+        def create(frame: Frame) -> LoxClass:
+            evaluated_superclass = None
+            if superclass:
+                evaluated = superclass(frame)
+                if not isinstance(evaluated, LoxClass):
+                    assert klass.superclass
+                    raise PloxRuntimeException(klass.superclass.name, "Superclass not a class")
+                assert super_slot is not None
+                frame[super_slot] = Cell(evaluated) if super_captured else evaluated
+                evaluated_superclass = evaluated
+            # Each closure creates a CompiledFunction, a LoxFunction.
+            method_map = cast(dict[str, LoxFunction], {method_name: closure(frame) for method_name, closure in methods})
+            return LoxClass(name.lexeme, evaluated_superclass, method_map)
+        return self.__function_declaration(klass, name, create)
+
+    def __call(self, callee: Code, paren: Token, arguments: list[Code]) -> Code:
+        def call(frame: Frame) -> object:
+            function = callee(frame)
+            evaluated = [argument(frame) for argument in arguments]
+            if isinstance(function, LoxCallable):
+                if len(evaluated) != function.arity():
+                    raise PloxRuntimeException(
+                        paren, f"Expected {function.arity()} arguments but got {len(evaluated)}.")
+                return function.call(self, evaluated)
+            raise PloxRuntimeException(paren, f"Can't call {function}. Can only call functions and classes.")
+        return call
+
+    def __unary(self, op: Token, right: Code) -> Code:
+        match op.token_type:
+            case TokenType.BANG:
+                def negate(frame: Frame) -> object:
+                    return not right(frame)
+                return negate
+            case TokenType.MINUS:
+                def minus(frame: Frame) -> object:
+                    value = right(frame)
+                    if type(value) is not float and not isinstance(value, numbers.Real):
+                        raise PloxRuntimeException(op, "Operand must be a number")
+                    return -value
+                return minus
+        raise PloxRuntimeException(op, f"Unexpected token type {op}")
+
+    def __binary(self, left: Code, op: Token, right: Code) -> Code:
+        # Floats take the fast path; anything else goes through the same
+        # checks as Interpreter, which accepts any numbers.Real.
+        def check(left_value: object, right_value: object) -> None:
+            if not (isinstance(left_value, numbers.Real) and isinstance(right_value, numbers.Real)):
+                raise PloxRuntimeException(op, "Operands must be numbers")
+
+        match op.token_type:
+            case TokenType.PLUS:
+                def add(frame: Frame) -> object:
+                    left_value: Any = left(frame)
+                    right_value: Any = right(frame)
+                    if type(left_value) is float and type(right_value) is float:
+                        return left_value + right_value
+                    if isinstance(left_value, str) and isinstance(right_value, str):
+                        return intern(left_value + right_value)
+                    if isinstance(left_value, numbers.Real) and isinstance(right_value, numbers.Real):
+                        return left_value + right_value
+                    raise PloxRuntimeException(op, "Can only combine numbers or strings")
+                return add
+            case TokenType.MINUS:
+                def subtract(frame: Frame) -> object:
+                    left_value: Any = left(frame)
+                    right_value: Any = right(frame)
+                    if type(left_value) is not float or type(right_value) is not float:
+                        check(left_value, right_value)
+                    return left_value - right_value
+                return subtract
+            case TokenType.STAR:
+                def multiply(frame: Frame) -> object:
+                    left_value: Any = left(frame)
+                    right_value: Any = right(frame)
+                    if type(left_value) is not float or type(right_value) is not float:
+                        check(left_value, right_value)
+                    return left_value * right_value
+                return multiply
+            case TokenType.SLASH:
+                def divide(frame: Frame) -> object:
+                    left_value: Any = left(frame)
+                    right_value: Any = right(frame)
+                    if type(left_value) is not float or type(right_value) is not float:
+                        check(left_value, right_value)
+                    return left_value / right_value
+                return divide
+            case TokenType.GREATER:
+                def greater(frame: Frame) -> object:
+                    left_value: Any = left(frame)
+                    right_value: Any = right(frame)
+                    if type(left_value) is not float or type(right_value) is not float:
+                        check(left_value, right_value)
+                    return left_value > right_value
+                return greater
+            case TokenType.GREATER_EQUAL:
+                def greater_equal(frame: Frame) -> object:
+                    left_value: Any = left(frame)
+                    right_value: Any = right(frame)
+                    if type(left_value) is not float or type(right_value) is not float:
+                        check(left_value, right_value)
+                    return left_value >= right_value
+                return greater_equal
+            case TokenType.LESS:
+                def less(frame: Frame) -> object:
+                    left_value: Any = left(frame)
+                    right_value: Any = right(frame)
+                    if type(left_value) is not float or type(right_value) is not float:
+                        check(left_value, right_value)
+                    return left_value < right_value
+                return less
+            case TokenType.LESS_EQUAL:
+                def less_equal(frame: Frame) -> object:
+                    left_value: Any = left(frame)
+                    right_value: Any = right(frame)
+                    if type(left_value) is not float or type(right_value) is not float:
+                        check(left_value, right_value)
+                    return left_value <= right_value
+                return less_equal
+            case TokenType.EQUAL_EQUAL:
+                def equal(frame: Frame) -> object:
+                    return is_equal(left(frame), right(frame))
+                return equal
+            case TokenType.BANG_EQUAL:
+                def not_equal(frame: Frame) -> object:
+                    return not is_equal(left(frame), right(frame))
+                return not_equal
+        raise PloxRuntimeException(op, f"Unexpected token type {op}")
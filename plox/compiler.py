@@ -0,0 +1,231 @@
+from typing import Callable, Optional
+
+from .chunk import Chunk, OpCode, Prototype
+from .environment import CELL, LOCAL
+from .expr import Assign, Binary, Call, Expr, Get, Grouping, Literal, Logical, Set, Super, This, Unary, Variable
+from .interpreter import Interpreter
+from .stmt import Block, Class, Expression, Function, If, Print, Return, Stmt, Var, While
+from .tokens import Token, TokenType
+
+_BINARY = {
+    TokenType.PLUS: OpCode.ADD,
+    TokenType.MINUS: OpCode.SUBTRACT,
+    TokenType.STAR: OpCode.MULTIPLY,
+    TokenType.SLASH: OpCode.DIVIDE,
+    TokenType.GREATER: OpCode.GREATER,
+    TokenType.GREATER_EQUAL: OpCode.GREATER_EQUAL,
+    TokenType.LESS: OpCode.LESS,
+    TokenType.LESS_EQUAL: OpCode.LESS_EQUAL,
+    TokenType.EQUAL_EQUAL: OpCode.EQUAL,
+    TokenType.BANG_EQUAL: OpCode.NOT_EQUAL,
+}
+
+# Variable instructions by access kind (globals are the None entries).
+_GET = {None: OpCode.GET_GLOBAL, LOCAL: OpCode.GET_LOCAL, CELL: OpCode.GET_CELL}
+_SET = {None: OpCode.SET_GLOBAL, LOCAL: OpCode.SET_LOCAL, CELL: OpCode.SET_CELL}
+_DEFINE = {None: OpCode.DEFINE_GLOBAL, LOCAL: OpCode.DEFINE_LOCAL, CELL: OpCode.DEFINE_CELL}
+
+
+class Compiler:
+    """Compiles resolved statements to bytecode for the VM.
+
+    Slots, cells and upvalues are the ones the Resolver laid out in
+    `resolved`'s side tables, so the VM's frames look just like
+    Interpreter's, and globals are reached through the cells of
+    `resolved`'s globals. Each instruction that can fail carries the line
+    of the token Interpreter would report the error at.
+    """
+    def __init__(self, resolved: Interpreter) -> None:
+        self.locals = resolved.locals
+        self.declarations = resolved.declarations
+        self.implicit = resolved.implicit
+        self.frames = resolved.frames
+        self.globals = resolved.globals
+        self.chunk = Chunk()
+        self.line = 1
+
+    def compile(self, statements: list[Stmt]) -> Prototype:
+        """The whole program as a function taking no arguments.
+
+        Top-level statements share one frame big enough for any of them.
+        """
+        size = max((self.frames[statement][0] for statement in statements if statement in self.frames), default=0)
+        script = Prototype("script", None, (size, (), ()))
+        self.chunk = script.chunk
+        for statement in statements:
+            self.visit_statement(statement)
+        self.__emit(OpCode.CONSTANT, self.chunk.add_constant(None))
+        self.__emit(OpCode.RETURN)
+        return script
+
+    def visit_statement(self, statement: Stmt) -> None:
+        match statement:
+            case Block(statements):
+                for inner in statements:
+                    self.visit_statement(inner)
+            case Expression(expression):
+                self.visit_expr(expression)
+                self.__emit(OpCode.POP)
+            case Print(expression):
+                self.visit_expr(expression)
+                self.__emit(OpCode.PRINT)
+            case Return(keyword, value):
+                self.line = keyword.line
+                if value:
+                    self.visit_expr(value)
+                else:
+                    self.__emit(OpCode.CONSTANT, self.chunk.add_constant(None))
+                self.__emit(OpCode.RETURN)
+            case Var(name, initializer):
+                if initializer:
+                    self.visit_expr(initializer)
+                else:
+                    self.__emit(OpCode.CONSTANT, self.chunk.add_constant(None))
+                self.__define(statement, name)
+            case Function(name, _, _) as fn:
+                self.line = name.line
+                self.__declare(fn, name, lambda: self.__closure(fn))
+            case If(condition, then_branch, else_branch):
+                self.visit_expr(condition)
+                skip_then = self.__emit(OpCode.POP_JUMP_IF_FALSE, 0)
+                self.visit_statement(then_branch)
+                if else_branch:
+                    skip_else = self.__emit(OpCode.JUMP, 0)
+                    self.chunk.patch_jump(skip_then)
+                    self.visit_statement(else_branch)
+                    self.chunk.patch_jump(skip_else)
+                else:
+                    self.chunk.patch_jump(skip_then)
+            case While(condition, body):
+                start = len(self.chunk.code)
+                self.visit_expr(condition)
+                exit_jump = self.__emit(OpCode.POP_JUMP_IF_FALSE, 0)
+                self.visit_statement(body)
+                self.__emit(OpCode.JUMP, start)
+                self.chunk.patch_jump(exit_jump)
+            case Class(name, _, _) as klass:
+                self.line = name.line
+                self.__declare(klass, name, lambda: self.__class(klass))
+            case _:
+                raise Exception(f"Unexpected statement {statement}")
+
+    def visit_expr(self, expr: Expr) -> None:
+        match expr:
+            case Binary(left, op, right):
+                self.visit_expr(left)
+                self.visit_expr(right)
+                self.line = op.line
+                self.__emit(_BINARY[op.token_type])
+            case Call(callee, paren, arguments):
+                self.visit_expr(callee)
+                for argument in arguments:
+                    self.visit_expr(argument)
+                self.line = paren.line
+                self.__emit(OpCode.CALL, len(arguments))
+            case Get(obj, name):
+                self.visit_expr(obj)
+                self.line = name.line
+                self.__emit(OpCode.GET_PROPERTY, self.chunk.add_constant(name))
+            case Grouping(expression):
+                self.visit_expr(expression)
+            case Literal(value):
+                self.__emit(OpCode.CONSTANT, self.chunk.add_constant(value))
+            case Unary(op, right):
+                self.visit_expr(right)
+                self.line = op.line
+                self.__emit(OpCode.NEGATE if op.token_type == TokenType.MINUS else OpCode.NOT)
+            case Variable(name) | This(name):
+                self.line = name.line
+                self.__load(self.locals.get(expr), name)
+            case Assign(name, value):
+                self.visit_expr(value)
+                self.line = name.line
+                access = self.locals.get(expr)
+                self.__access(_SET, access, name)
+            case Logical(left, op, right):
+                self.visit_expr(left)
+                short_circuit = self.__emit(
+                    OpCode.JUMP_IF_TRUE if op.token_type == TokenType.OR else OpCode.JUMP_IF_FALSE, 0)
+                self.__emit(OpCode.POP)
+                self.visit_expr(right)
+                self.chunk.patch_jump(short_circuit)
+            case Set(obj, name, value):
+                self.visit_expr(obj)
+                self.line = name.line
+                # Like Interpreter, the value isn't evaluated for a non-instance.
+                name_constant = self.chunk.add_constant(name)
+                self.__emit(OpCode.CHECK_INSTANCE, name_constant)
+                self.visit_expr(value)
+                self.line = name.line
+                self.__emit(OpCode.SET_PROPERTY, name_constant)
+            case Super(keyword, method):
+                self.line = keyword.line
+                self.__load(self.locals[expr], keyword)
+                self.__load(self.implicit[expr], keyword)
+                self.__emit(OpCode.GET_SUPER, self.chunk.add_constant(method.lexeme))
+            case _:
+                raise Exception(f"Unexpected expr {expr}")
+
+    def __emit(self, op: OpCode, *operands: int) -> int:
+        return self.chunk.write(self.line, op, *operands)
+
+    def __load(self, access: Optional[list[int]], name: Token) -> None:
+        self.__access(_GET, access, name)
+
+    def __access(self, ops: dict[Optional[int], OpCode], access: Optional[list[int]], name: Token) -> None:
+        if not access:
+            # The cell is the global's for good, so it's looked up just once, here.
+            self.__emit(ops[None], self.chunk.add_constant(name),
+                        self.chunk.add_constant(self.globals.cell(name.lexeme)))
+        elif access[0] in ops:
+            self.__emit(ops[access[0]], access[1])
+        elif ops is _GET:
+            self.__emit(OpCode.GET_UPVALUE, access[1])
+        else:
+            self.__emit(OpCode.SET_UPVALUE, access[1])
+
+    def __define(self, declaration: Stmt, name: Token) -> None:
+        self.__access(_DEFINE, self.declarations.get(declaration), name)
+
+    def __declare(self, declaration: Stmt, name: Token, create: Callable[[], None]) -> None:
+        """Compile `create`, which leaves a function or class on the stack,
+        then declare it, giving a captured one its cell first so that it
+        can capture itself."""
+        access = self.declarations.get(declaration)
+        if access and access[0] == CELL:
+            self.__emit(OpCode.NEW_CELL, access[1])
+            create()
+            self.__emit(OpCode.SET_CELL, access[1])
+            self.__emit(OpCode.POP)
+        else:
+            create()
+            self.__define(declaration, name)
+
+    def __closure(self, declaration: Function, is_initializer: bool = False) -> None:
+        prototype = Prototype(declaration.name.lexeme, declaration, self.frames[declaration], is_initializer)
+        enclosing, line = self.chunk, self.line
+        self.chunk = prototype.chunk
+        for statement in declaration.body:
+            self.visit_statement(statement)
+        self.__emit(OpCode.CONSTANT, self.chunk.add_constant(None))
+        self.__emit(OpCode.RETURN)
+        self.chunk, self.line = enclosing, line
+        self.__emit(OpCode.CLOSURE, self.chunk.add_constant(prototype))
+
+    def __class(self, klass: Class) -> None:
+        if klass.superclass:
+            self.visit_expr(klass.superclass)
+            self.line = klass.superclass.name.line
+            self.__emit(OpCode.INHERIT)
+            # 'super' is stored for the methods, and stays on the stack for CLASS.
+            kind, slot = self.implicit[klass]
+            if kind == CELL:
+                self.__emit(OpCode.DEFINE_CELL, slot)
+                self.__emit(OpCode.GET_CELL, slot)
+            else:
+                self.__emit(OpCode.SET_LOCAL, slot)
+        for method in klass.methods:
+            self.__closure(method, method.name.lexeme == "init")
+        self.line = klass.name.line
+        self.__emit(OpCode.CLASS, self.chunk.add_constant(klass.name.lexeme), len(klass.methods),
+                    1 if klass.superclass else 0)
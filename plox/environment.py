@@ -1,45 +1,69 @@
-
-
-from typing import Optional
 from .runtime_exception import PloxRuntimeException
 from .tokens import Token
 
+# How a resolved local is reached: an access is a [kind, index] pair.
+# LOCAL and CELL index the current frame; a CELL slot holds the Cell the
+# variable lives in because some closure captured it. UPVALUE indexes the
+# running closure's captured cells.
+LOCAL = 0
+CELL = 1
+UPVALUE = 2
+
+
+class Cell:
+    """A captured local, shared by its frame and the closures that captured it."""
+    __slots__ = ("value",)
+
+    def __init__(self, value: object) -> None:
+        self.value = value
+
+
+# (frame size, slots to box into Cells on entry, captured variables as
+# (in the enclosing frame?, index) pairs) of a function or top-level statement.
+FrameLayout = tuple[int, tuple[int, ...], tuple[tuple[bool, int], ...]]
+
+
+# What the cell of a global that hasn't been defined (yet) holds.
+UNDEFINED = object()
+
 
 class Environment:
-    def __init__(self, enclosing: Optional['Environment'] = None):
-        self.values: dict[str, object] = {}
-        self.enclosing = enclosing
+    """The global variables, each in a Cell of its own.
 
-    def define(self, name: str, value: object) -> None:
-        self.values[name] = value
+    Every other variable is resolved ahead of time to a slot in a flat
+    per-call frame, or to a Cell when a closure captures it. A global's
+    cell is created the first time it is defined or looked up, holding
+    UNDEFINED until it is defined, and stays that global's for good:
+    defining it again only changes the value. So a use of a global can
+    look its cell up once and keep it.
+    """
+    __slots__ = ("cells",)
 
-    def get(self, name: Token) -> object:
-        if name.lexeme in self.values:
-            return self.values[name.lexeme]
-        if self.enclosing:
-            return self.enclosing.get(name)
+    def __init__(self) -> None:
+        self.cells: dict[str, Cell] = {}
 
-        raise PloxRuntimeException(name, f"Undefined variable {name.lexeme}.")
+    @property
+    def values(self) -> dict[str, object]:
+        """The defined globals' values by name."""
+        return {name: cell.value for name, cell in self.cells.items() if cell.value is not UNDEFINED}
 
-    def get_at(self, distance: int, name: str) -> object:
-        return self.__ancestor(distance).values[name]
+    def cell(self, name: str) -> Cell:
+        cell = self.cells.get(name)
+        if cell is None:
+            cell = self.cells[name] = Cell(UNDEFINED)
+        return cell
+
+    def define(self, name: str, value: object) -> None:
+        self.cell(name).value = value
+
+    def get(self, name: Token) -> object:
+        value = self.cell(name.lexeme).value
+        if value is UNDEFINED:
+            raise PloxRuntimeException(name, f"Undefined variable {name.lexeme}.")
+        return value
 
     def assign(self, name: Token, value: object) -> None:
-        if name.lexeme in self.values:
-            self.values[name.lexeme] = value
-            return
-        if self.enclosing:
-            self.enclosing.assign(name, value)
-            return
-        raise PloxRuntimeException(name, f"Undefined variable '{name.lexeme}'")
-
-    def assign_at(self, distance: int, name: Token, value: object) -> None:
-        self.__ancestor(distance).values[name.lexeme] = value
-
-    def __ancestor(self, distance: int) -> 'Environment':
-        env = self
-        for _ in range(distance):
-            if not env.enclosing:
-                raise RuntimeError("Why isn't encloding defined")
-            env = env.enclosing
-        return env
+        cell = self.cell(name.lexeme)
+        if cell.value is UNDEFINED:
+            raise PloxRuntimeException(name, f"Undefined variable '{name.lexeme}'")
+        cell.value = value
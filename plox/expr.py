@@ -1,79 +1,94 @@
 from dataclasses import dataclass
+from sys import intern
 from .tokens import Token
 
 
-@dataclass(frozen=True)
+# Nodes compare and hash by identity: the resolver's side tables key on the
+# node itself, and two occurrences of the same expression are different
+# variable accesses. Structural hashing also failed on nodes holding lists.
+@dataclass(frozen=True, slots=True, eq=False)
 class Expr:
-    pass
+    def __reduce__(self):
+        # Rebuild through __init__ from the slot values; far cheaper to pickle than
+        # the generic state functions dataclasses gives frozen slotted classes.
+        return (type(self), tuple(map(self.__getattribute__, self.__slots__)))
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, eq=False)
 class Assign(Expr):
     name: Token
     value: Expr
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, eq=False)
 class Binary(Expr):
     left: Expr
     operator: Token
     right: Expr
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, eq=False)
 class Call(Expr):
     callee: Expr
     paren: Token
     arguments: list[Expr]
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, eq=False)
 class Get(Expr):
     object: Expr
     name: Token
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, eq=False)
 class Grouping(Expr):
     expression: Expr
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, eq=False)
 class Literal(Expr):
     value: object
 
+    def __reduce__(self):
+        return (_unpickle_literal, (self.value,))
 
-@dataclass(frozen=True)
+
+@dataclass(frozen=True, slots=True, eq=False)
 class Unary(Expr):
     operator: Token
     right: Expr
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, eq=False)
 class Variable(Expr):
     name: Token
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, eq=False)
 class Logical(Expr):
     left: Expr
     operator: Token
     right: Expr
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, eq=False)
 class Set(Expr):
     object: Expr
     name: Token
     value: Expr
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, eq=False)
 class This(Expr):
     keyword: Token
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, eq=False)
 class Super(Expr):
     keyword: Token
     method: Token
+
+
+def _unpickle_literal(value: object) -> Literal:
+    # See _unpickle_token: string values must stay identical to interned ones.
+    return Literal(intern(value) if isinstance(value, str) else value)
@@ -0,0 +1,214 @@
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, fields, is_dataclass
+from typing import Iterator, Optional
+
+from .parser import Parser
+from .scanner import FastScanner
+from .stmt import Stmt
+from .tokens import Token, TokenType
+from . import plox
+
+
+@dataclass
+class DeclarationSpan:
+    """A top-level declaration together with the trivia up to the next one.
+
+    `start`, `line`, the tokens, the statement and the error lines are all
+    in the coordinates the span was scanned at. Edits earlier in the
+    document only bump `shift`/`line_shift`; the tokens themselves are
+    rebuilt lazily, when somebody asks for them.
+    """
+    start: int
+    line: int
+    tokens: list[Token]
+    statement: Optional[Stmt]
+    # (index into tokens the error precedes, line, message)
+    scan_errors: list[tuple[int, int, str]]
+    parse_errors: list[tuple[int, str]]
+    shift: int = 0
+    line_shift: int = 0
+
+    @property
+    def current_start(self) -> int:
+        return self.start + self.shift
+
+
+class IncrementalDocument:
+    """Source text kept scanned and parsed across edits.
+
+    An edit re-scans from the start of the top-level declaration it touches
+    until the new token stream lines up with an old declaration boundary,
+    then re-parses only the declarations in between. Everything after that
+    is reused, so the work done is proportional to the damaged declarations
+    rather than the document (apart from bumping an offset per later span).
+    Results always match a full scan + parse of `source`.
+    """
+    def __init__(self, source: str = "") -> None:
+        self.source = source
+        self.spans: list[DeclarationSpan] = []
+        self.eof = Token(TokenType.EOF, "", None, 1, 0)
+        self.__update(0, 0, 0)
+
+    def edit(self, start: int, end: int, text: str) -> None:
+        """Replace source[start:end] with `text`."""
+        self.source = self.source[:start] + text + self.source[end:]
+        # The scanner looks up to two characters past a token ("1." + "5"),
+        # so an edit can change the token that ends two characters before it.
+        damaged = bisect_right(self.spans, max(start - 2, 0), key=_current_start) - 1
+        self.__update(max(damaged, 0), start + len(text), len(text) - (end - start))
+
+    def tokens(self) -> list[Token]:
+        self.__rebase()
+        return [token for span in self.spans for token in span.tokens] + [self.eof]
+
+    def statements(self) -> list[Stmt]:
+        self.__rebase()
+        return [span.statement for span in self.spans if span.statement]
+
+    def errors(self) -> list[tuple[int, str]]:
+        """Errors in the order a full scan followed by a full parse reports them."""
+        scan_errors = [(line + span.line_shift, message)
+                       for span in self.spans for _, line, message in span.scan_errors]
+        parse_errors = [(line + span.line_shift, message)
+                        for span in self.spans for line, message in span.parse_errors]
+        return scan_errors + parse_errors
+
+    def __update(self, first: int, new_end: int, delta: int) -> None:
+        if first < len(self.spans):
+            begin = self.spans[first].current_start
+            line = self.spans[first].line + self.spans[first].line_shift
+        else:
+            begin, line = 0, 1
+
+        scanner = FastScanner(self.source)
+        scanner.line = line
+        scanner.last_start = begin
+        tokens: list[Token] = []
+        scan_errors: list[tuple[int, int, str]] = []
+        stop = len(self.spans)
+        line_delta = 0
+        eof: Optional[Token] = None
+        with plox.collect_errors() as errors:
+            for token in scanner._scan(self.source, begin, len(self.source), 0, True):
+                scan_errors.extend((len(tokens), *error) for error in errors)
+                errors.clear()
+                if token.line_start >= new_end:
+                    reused = self.__find_span(token, token.line_start - delta, first + 1)
+                    if reused is not None:
+                        stop = reused
+                        old = self.spans[reused]
+                        line_delta = token.line - (old.tokens[0].line + old.line_shift)
+                        break
+                tokens.append(token)
+            else:
+                eof = scanner._eof()
+            scan_errors.extend((len(tokens), *error) for error in errors)
+        if eof is None:
+            eof = _shift(self.eof, delta, line_delta)
+
+        while True:
+            at_end = stop == len(self.spans)
+            sentinel = eof if at_end else Token(TokenType.EOF, "", None, 0, 0)
+            spans, tail = self.__parse(begin, line, tokens, scan_errors, sentinel)
+            if at_end:
+                break
+            # A declaration left open at the end of the region, or an 'if'
+            # that may be followed by an 'else', continues into the next span.
+            following = self.spans[stop]
+            if not tail and not (following.tokens and following.tokens[0].token_type is TokenType.ELSE):
+                break
+            scan_errors.extend((len(tokens) + index, error_line + following.line_shift + line_delta, message)
+                               for index, error_line, message in following.scan_errors)
+            tokens.extend(_shift(token, following.shift + delta, following.line_shift + line_delta)
+                          for token in following.tokens)
+            stop += 1
+
+        self.spans[first:stop] = spans
+        for span in self.spans[first + len(spans):]:
+            span.shift += delta
+            span.line_shift += line_delta
+        self.eof = eof
+
+    def __find_span(self, token: Token, old_start: int, low: int) -> Optional[int]:
+        index = bisect_left(self.spans, old_start, lo=low, key=_current_start)
+        if index >= len(self.spans):
+            return None
+        span = self.spans[index]
+        if span.current_start != old_start or not span.tokens:
+            return None
+        first = span.tokens[0]
+        if first.token_type is not token.token_type or first.lexeme != token.lexeme:
+            return None
+        return index
+
+    def __parse(self, begin: int, line: int, tokens: list[Token], scan_errors: list[tuple[int, int, str]],
+                sentinel: Token) -> tuple[list[DeclarationSpan], bool]:
+        pulled = 0
+
+        def feed() -> Iterator[Token]:
+            nonlocal pulled
+            for token in tokens:
+                pulled += 1
+                yield token
+            pulled += 1
+            yield sentinel
+
+        spans: list[DeclarationSpan] = []
+        boundary = 0
+        next_error = 0
+
+        def close(end: int, statement: Optional[Stmt], parse_errors: list[tuple[int, str]]) -> None:
+            nonlocal boundary, next_error, begin, line
+            # Errors in the trivia before the next declaration stay with this one.
+            last_error = next_error
+            while last_error < len(scan_errors) and scan_errors[last_error][0] <= end:
+                last_error += 1
+            span_errors = [(index - boundary, error_line, message)
+                           for index, error_line, message in scan_errors[next_error:last_error]]
+            spans.append(DeclarationSpan(begin, line, tokens[boundary:end], statement, span_errors, parse_errors))
+            boundary, next_error = end, last_error
+            if end < len(tokens):
+                begin, line = tokens[end].line_start, _start_line(tokens[end])
+
+        with plox.collect_errors() as errors:
+            parser = Parser(feed())
+            for statement in parser.iter_parse():
+                close(pulled - 1, statement, errors[:])
+                errors.clear()
+            tail = boundary < len(tokens)
+            if tail or errors or next_error < len(scan_errors):
+                close(len(tokens), None, errors[:])
+        return spans, tail
+
+    def __rebase(self) -> None:
+        for span in self.spans:
+            if span.shift or span.line_shift:
+                span.tokens = [_shift(token, span.shift, span.line_shift) for token in span.tokens]
+                span.statement = _shift(span.statement, span.shift, span.line_shift)
+                span.scan_errors = [(index, line + span.line_shift, message)
+                                    for index, line, message in span.scan_errors]
+                span.parse_errors = [(line + span.line_shift, message) for line, message in span.parse_errors]
+                span.start += span.shift
+                span.line += span.line_shift
+                span.shift = span.line_shift = 0
+
+
+def _current_start(span: DeclarationSpan) -> int:
+    return span.current_start
+
+
+def _start_line(token: Token) -> int:
+    if token.token_type is TokenType.STRING:
+        return token.line - token.lexeme.count("\n")
+    return token.line
+
+
+def _shift(node, offset: int, lines: int):
+    """Copy of a token or AST node with every token moved by offset/lines."""
+    if isinstance(node, Token):
+        return Token(node.token_type, node.lexeme, node.literal, node.line + lines, node.line_start + offset)
+    if isinstance(node, list):
+        return [_shift(child, offset, lines) for child in node]
+    if is_dataclass(node) and not isinstance(node, type):
+        return type(node)(*(_shift(getattr(node, field.name), offset, lines) for field in fields(node)))
+    return node
@@ -1,47 +1,116 @@
 import logging
-import numbers
-import time
-from typing import Optional
+from sys import intern
+from typing import TYPE_CHECKING, Any, Optional
 
-from .environment import Environment
+from .environment import CELL, LOCAL, UNDEFINED, Cell, Environment, FrameLayout
 from .stmt import Block, Class, Expression, Function, If, Print, Return, Stmt, Var, While
 from .expr import Assign, Binary, Call, Expr, Get, Grouping, Literal, Logical, Set, Super, This, Unary, Variable
-from .runtime_exception import PloxRuntimeException, ReturnException
+from .memo import DEFAULT_SIZE, Memo
+from .runtime_exception import PloxRuntimeException
 from .tokens import Token, TokenType
 
+if TYPE_CHECKING:
+    from .lox_callable import LoxFunction
+
+# What Lox treats as numbers: floats, and ints (bools among them, as with
+# numbers.Real), without numbers.Real's slow ABC check.
+_NUMBER = (float, int)
+
 
 class Interpreter:
     def __init__(self, capture_output=False):
-        from . import lox_callable
+        from . import quickening
         self.logger = logging.getLogger("interpreter")
         self.globals = Environment()
-        self.locals: dict[Expr, int] = {}
-        self.environment = self.globals
+        # What the Resolver worked out, keyed by node identity: how each local
+        # variable access and declaration reaches its variable, where the
+        # 'this' of a Super and the 'super' of a Class live, and the frame
+        # layout of each function and of top-level statements with locals.
+        self.locals: dict[Expr, list[int]] = {}
+        self.declarations: dict[Stmt, list[int]] = {}
+        self.implicit: dict[Expr | Stmt, list[int]] = {}
+        self.frames: dict[Stmt, FrameLayout] = {}
+        # The functions the Resolver found pure, if it was asked to look.
+        self.pure: set[Function] = set()
+        # Their calls' results, by declaration, each keeping memo_size.
+        self.memos: dict[Function, Memo] = {}
+        self.memo_size = DEFAULT_SIZE
+        # The cell of the global each Variable, This or Assign not in
+        # locals used so far refers to.
+        self.global_cells: dict[Expr, Cell] = {}
+        # What each Binary and Unary node evaluated so far has specialized
+        # to, for the operand types it has seen.
+        self.quickened: dict[Expr, quickening.Site] = {}
+        self.__site: type[quickening.Site] = quickening.Site
+        # The running function's locals and the cells its closure captured.
+        # Slots hold values, or for captured variables, their Cells.
+        self.frame: list[Any] = []
+        self.upvalues: list[Cell] = []
+        # The value of the return statement that completed last.
+        self.returned: object = None
         self.capture_output = capture_output
         self.output: list[str] = []
 
-        self.globals.define("clock", type('ClockFunction', (lox_callable.LoxCallable,), {
-            'arity': lambda self: 0,
-            'call': lambda self, interpreter, arguments: int(time.time())
-        })())
+        self.load("core")
 
     def interpret(self, statements: list[Stmt]) -> None:
         try:
             for statement in statements:
+                layout = self.frames.get(statement)
+                self.frame = [None] * layout[0] if layout else []
                 self.__execute(statement)
         except PloxRuntimeException as pre:
             from .plox import error
-            error(pre.token.line, pre.message)
+            error(pre.line, pre.message)
+        finally:
+            if self.quickened and self.logger.isEnabledFor(logging.DEBUG):
+                from .quickening import summarize
+                self.logger.debug("Quickening: %s", summarize(self.quickened.values()))
+
+    def load(self, module: str) -> None:
+        """Define the natives of the registered `module` as globals."""
+        from .natives import MODULES
+        for name, native in MODULES[module].functions.items():
+            self.globals.define(name, native)
+
+    def evaluate(self, expr: Expr) -> object:
+        return self.__evaluate(expr)
+
+    def resolve(self, expr: Expr, access: list[int]) -> None:
+        self.locals[expr] = access
+
+    def side_tables(self) -> tuple[dict | set, ...]:
+        """Everything the Resolver recorded, e.g. to cache with the statements."""
+        return self.locals, self.declarations, self.implicit, self.frames, self.pure
 
-    def resolve(self, expr: Expr, depth: int) -> None:
-        self.locals[expr] = depth
+    def memoized(self, function: 'LoxFunction') -> 'LoxFunction':
+        """`function`, answering calls from its declaration's Memo if it's pure."""
+        declaration = function.declaration
+        if declaration in self.pure:
+            memo = self.memos.get(declaration)
+            if memo is None:
+                memo = self.memos[declaration] = Memo(self.memo_size)
+            function.memoize(memo)
+        return function
 
     def __evaluate(self, expr: Expr) -> object:
         from . import lox_callable
         from . import lox_class
         match expr:
             case Binary(left, op, right):
-                return self.__visit_binary(left, op, right)
+                evaluated_left = self.__evaluate(left)
+                evaluated_right = self.__evaluate(right)
+                site = self.quickened.get(expr)
+                if site and type(evaluated_left) is site.left and type(evaluated_right) is site.right:
+                    site.hits += 1
+                    # Sites only match operand types while they have an operation.
+                    return site.operation(evaluated_left, evaluated_right)  # type: ignore[misc]
+                value = self.__visit_binary(op, evaluated_left, evaluated_right)
+                if not site:
+                    site = self.quickened[expr] = self.__site()
+                site.misses += 1
+                site.specialize(op.token_type, type(evaluated_left), type(evaluated_right))
+                return value
             case Call(callee, paren, arguments):
                 evaluated_callee = self.__evaluate(callee)
                 evaluated_arugments = [self.__evaluate(arg) for arg in arguments]
@@ -62,16 +131,35 @@ class Interpreter:
             case Literal(value):
                 return value
             case Unary(op, right):
-                return self.__visit_unary(op, right)
+                evaluated_right = self.__evaluate(right)
+                site = self.quickened.get(expr)
+                if site and type(evaluated_right) is site.left:
+                    site.hits += 1
+                    return site.operation(evaluated_right)  # type: ignore[misc]
+                value = self.__visit_unary(op, evaluated_right)
+                if not site:
+                    site = self.quickened[expr] = self.__site()
+                site.misses += 1
+                site.specialize(op.token_type, type(evaluated_right))
+                return value
             case Variable(name) as var:
                 return self.__lookup_variable(name, var)
             case Assign(name, value) as assign:
                 evaluated_value = self.__evaluate(value)
-                if assign in self.locals:
-                    depth = self.locals[assign]
-                    self.environment.assign_at(depth, name, evaluated_value)
+                access = self.locals.get(assign)
+                if access:
+                    kind, index = access
+                    if kind == LOCAL:
+                        self.frame[index] = evaluated_value
+                    elif kind == CELL:
+                        self.frame[index].value = evaluated_value
+                    else:
+                        self.upvalues[index].value = evaluated_value
                 else:
-                    self.globals.assign(name, evaluated_value)
+                    cell = self.global_cells.get(assign) or self.__global_cell(name, assign)
+                    if cell.value is UNDEFINED:
+                        raise PloxRuntimeException(name, f"Undefined variable '{name.lexeme}'")
+                    cell.value = evaluated_value
                 return evaluated_value
             case Logical(left, op, right):
                 return self.__visit__logical(left, op, right)
@@ -86,10 +174,9 @@ class Interpreter:
             case This(keyword) as this:
                 return self.__lookup_variable(keyword, this)
             case Super() as superclass:
-                distance = self.locals[superclass]
-                superklass = self.environment.get_at(distance, "super")
+                superklass = self.__load(self.locals[superclass])
                 assert isinstance(superklass, lox_class.LoxClass)
-                instance = self.environment.get_at(distance - 1, "this")
+                instance = self.__load(self.implicit[superclass])
                 assert isinstance(instance, lox_class.LoxInstance)
                 method = superklass.find_method(superclass.method.lexeme)
                 if not method:
@@ -98,41 +185,53 @@ class Interpreter:
 
         raise Exception(f"Unexpected expr {expr}")
 
-    def __execute(self, statement: Stmt) -> None:
+    def __execute(self, statement: Stmt) -> bool:
+        """Execute `statement`, returning True if a return statement ran.
+
+        The returned value is left in `returned`: a return unwinds through
+        its enclosing statements as plain return values, rather than by
+        raising through them.
+        """
         from . import lox_class
-        from .lox_callable import LoxFunction
         match statement:
             case Block(statements):
-                self.execute_block(statements, Environment(self.environment))
+                for inner in statements:
+                    if self.__execute(inner):
+                        return True
             case Expression(expression):
                 self.__evaluate(expression)
             case Print(expression):
-                string = self.__stringify(self.__evaluate(expression))
+                string = stringify(self.__evaluate(expression))
                 if self.capture_output:
                     self.output.append(string)
                 else:
                     print(string)
             case Return(_, return_value):
-                evaluated_value = None
-                if return_value:
-                    evaluated_value = self.__evaluate(return_value)
-                raise ReturnException(evaluated_value)
+                self.returned = self.__evaluate(return_value) if return_value else None
+                return True
             case Var(name, intializer):
                 value = None
                 if intializer:
                     value = self.__evaluate(intializer)
-                self.environment.define(name.lexeme, value)
+                self.__declare(statement, name, value)
             case Function(name, _, _) as fn:
-                lox_function = LoxFunction(fn, self.environment)
-                self.environment.define(name.lexeme, lox_function)
+                # A captured function gets its cell first, so that it can
+                # capture itself.
+                cell = self.__forward_declare(fn)
+                lox_function = self.__closure(fn)
+                if cell:
+                    cell.value = lox_function
+                else:
+                    self.__declare(fn, name, lox_function)
             case If(condition, then_branch, else_branch):
-                if self.__is_truthy(self.__evaluate(condition)):
-                    self.__execute(then_branch)
+                if self.is_truthy(self.__evaluate(condition)):
+                    return self.__execute(then_branch)
                 elif else_branch:
-                    self.__execute(else_branch)
+                    return self.__execute(else_branch)
             case While(condition, body):
-                while self.__is_truthy(self.__evaluate(condition)):
-                    self.__execute(body)
+                while self.is_truthy(self.__evaluate(condition)):
+                    if self.__execute(body):
+                        return True
             case Class(name, superclass, methods):
                 evaluated_superclass: Optional[lox_class.LoxClass] = None
                 if superclass:
@@ -141,95 +240,116 @@ class Interpreter:
                         raise PloxRuntimeException(superclass.name, "Superclass not a class")
                     evaluated_superclass = evaluated
 
-                self.environment.define(name.lexeme, None)
-
+                cell = self.__forward_declare(statement)
                 if superclass:
-                    self.environment = Environment(self.environment)
-                    self.environment.define("super", evaluated_superclass)
+                    kind, slot = self.implicit[statement]
+                    self.frame[slot] = Cell(evaluated_superclass) if kind == CELL else evaluated_superclass
                 method_map = {}
                 for method in methods:
-                    function = LoxFunction(method, self.environment, method.name.lexeme == "init")
+                    function = self.__closure(method, method.name.lexeme == "init")
                     method_map[method.name.lexeme] = function
                 klass = lox_class.LoxClass(name.lexeme, evaluated_superclass, method_map)
-                if superclass:
-                    assert self.environment.enclosing
-                    self.environment = self.environment.enclosing
-                self.environment.assign(name, klass)
+                if cell:
+                    cell.value = klass
+                else:
+                    self.__declare(statement, name, klass)
+        return False
 
-    def execute_block(self, statements: list[Stmt], environment: Environment) -> None:
-        prev = self.environment
+    def execute_body(self, statements: list[Stmt], frame: list[object], upvalues: list[Cell]) -> object:
+        """Run a function's body in `frame`, returning what it returned."""
+        prev = self.frame, self.upvalues
         try:
-            self.environment = environment
+            self.frame = frame
+            self.upvalues = upvalues
             for statement in statements:
-                self.__execute(statement)
+                if self.__execute(statement):
+                    return self.returned
+            return None
         finally:
-            self.environment = prev
+            self.frame, self.upvalues = prev
 
-    def __visit_unary(self, op: Token, right: Expr) -> object:
-        self.logger.debug("Evaluating unary: %s (%s)", op, right)
-        evaluated_right = self.__evaluate(right)
+    def __closure(self, declaration: Function, is_initializer: bool = False) -> 'LoxFunction':
+        from .lox_callable import LoxFunction
+        layout = self.frames[declaration]
+        captured = [self.frame[index] if in_frame else self.upvalues[index] for in_frame, index in layout[2]]
+        return self.memoized(LoxFunction(declaration, layout, captured, is_initializer))
 
+    def __declare(self, declaration: Stmt, name: Token, value: object) -> None:
+        access = self.declarations.get(declaration)
+        if not access:
+            self.globals.define(name.lexeme, value)
+        elif access[0] == CELL:
+            # A new cell every time, so each pass through a loop body gets
+            # variables of its own.
+            self.frame[access[1]] = Cell(value)
+        else:
+            self.frame[access[1]] = value
+
+    def __forward_declare(self, declaration: Stmt) -> Optional[Cell]:
+        access = self.declarations.get(declaration)
+        if access and access[0] == CELL:
+            cell = self.frame[access[1]] = Cell(None)
+            return cell
+        return None
+
+    def __visit_unary(self, op: Token, evaluated_right: object) -> object:
         match op.token_type:
             case TokenType.BANG:
-                return not self.__is_truthy(evaluated_right)
+                return not self.is_truthy(evaluated_right)
             case TokenType.MINUS:
-                if not isinstance(evaluated_right, numbers.Real):
+                if not isinstance(evaluated_right, _NUMBER):
                     raise PloxRuntimeException(op, "Operand must be a number")
                 return -evaluated_right
             case _:
                 raise PloxRuntimeException(op, f"Unexpected token type {op}")
 
-    def __visit_binary(self, left: Expr, op: Token, right: Expr) -> object:
-        self.logger.debug("Evaluating binary: %s (%s %s)", op, left, right)
-        evaluated_left = self.__evaluate(left)
-        evaluated_right = self.__evaluate(right)
-
+    def __visit_binary(self, op: Token, evaluated_left: object, evaluated_right: object) -> object:
         match op.token_type:
             case TokenType.GREATER:
-                if not (isinstance(evaluated_left, numbers.Real) and
-                        isinstance(evaluated_right, numbers.Real)):
+                if not (isinstance(evaluated_left, _NUMBER) and
+                        isinstance(evaluated_right, _NUMBER)):
                     raise PloxRuntimeException(op, "Operands must be numbers")
                 return evaluated_left > evaluated_right
             case TokenType.GREATER_EQUAL:
-                if not (isinstance(evaluated_left, numbers.Real) and
-                        isinstance(evaluated_right, numbers.Real)):
+                if not (isinstance(evaluated_left, _NUMBER) and
+                        isinstance(evaluated_right, _NUMBER)):
                     raise PloxRuntimeException(op, "Operands must be numbers")
                 return evaluated_left >= evaluated_right
             case TokenType.LESS:
-                if not (isinstance(evaluated_left, numbers.Real) and
-                        isinstance(evaluated_right, numbers.Real)):
+                if not (isinstance(evaluated_left, _NUMBER) and
+                        isinstance(evaluated_right, _NUMBER)):
                     raise PloxRuntimeException(op, "Operands must be numbers")
                 return evaluated_left < evaluated_right
             case TokenType.LESS_EQUAL:
-                if not (isinstance(evaluated_left, numbers.Real) and
-                        isinstance(evaluated_right, numbers.Real)):
+                if not (isinstance(evaluated_left, _NUMBER) and
+                        isinstance(evaluated_right, _NUMBER)):
                     raise PloxRuntimeException(op, "Operands must be numbers")
                 return evaluated_left <= evaluated_right
             case TokenType.BANG_EQUAL:
-                return not self.__is_equal(evaluated_left, evaluated_right)
+                return not is_equal(evaluated_left, evaluated_right)
             case TokenType.EQUAL_EQUAL:
-                return self.__is_equal(evaluated_left, evaluated_right)
+                return is_equal(evaluated_left, evaluated_right)
             case TokenType.MINUS:
-                if not (isinstance(evaluated_left, numbers.Real) and
-                        isinstance(evaluated_right, numbers.Real)):
+                if not (isinstance(evaluated_left, _NUMBER) and
+                        isinstance(evaluated_right, _NUMBER)):
                     raise PloxRuntimeException(op, "Operands must be numbers")
                 return evaluated_left - evaluated_right
             case TokenType.PLUS:
-                if (isinstance(evaluated_left, numbers.Real) and
-                        isinstance(evaluated_right, numbers.Real)) or (
-                        isinstance(evaluated_left, str) and
-                        isinstance(evaluated_right, str)):
+                if isinstance(evaluated_left, str) and isinstance(evaluated_right, str):
+                    # Interned like every other string, so equal strings stay identical.
+                    return intern(evaluated_left + evaluated_right)
+                if isinstance(evaluated_left, _NUMBER) and isinstance(evaluated_right, _NUMBER):
                     return evaluated_left + evaluated_right
                 # Handle float vs str differently?
                 raise PloxRuntimeException(op, "Can only combine numbers or strings")
             case TokenType.SLASH:
-                if not (isinstance(evaluated_left, numbers.Real) and
-                        isinstance(evaluated_right, numbers.Real)):
+                if not (isinstance(evaluated_left, _NUMBER) and
+                        isinstance(evaluated_right, _NUMBER)):
                     raise PloxRuntimeException(op, "Operands must be numbers")
                 return evaluated_left / evaluated_right
             case TokenType.STAR:
-                if not (isinstance(evaluated_left, numbers.Real) and
-                        isinstance(evaluated_right, numbers.Real)):
+                if not (isinstance(evaluated_left, _NUMBER) and
+                        isinstance(evaluated_right, _NUMBER)):
                     raise PloxRuntimeException(op, "Operands must be numbers")
                 return evaluated_left * evaluated_right
             case _:
@@ -239,35 +359,56 @@ class Interpreter:
         evaluated_left = self.__evaluate(left)
 
         if op.token_type == TokenType.OR:
-            if self.__is_truthy(evaluated_left):
-                return left
+            if self.is_truthy(evaluated_left):
+                return evaluated_left
         else:
             # And case
-            if not self.__is_truthy(evaluated_left):
+            if not self.is_truthy(evaluated_left):
                 return evaluated_left
         return self.__evaluate(right)
 
     def __lookup_variable(self, name: Token, expr: Expr) -> object:
-        if expr in self.locals:
-            depth = self.locals[expr]
-            res = self.environment.get_at(depth, name.lexeme)
-            return res
-        return self.globals.get(name)
+        access = self.locals.get(expr)
+        if access:
+            return self.__load(access)
+        cell = self.global_cells.get(expr) or self.__global_cell(name, expr)
+        value = cell.value
+        if value is UNDEFINED:
+            raise PloxRuntimeException(name, f"Undefined variable {name.lexeme}.")
+        return value
+
+    def __global_cell(self, name: Token, expr: Expr) -> Cell:
+        cell = self.global_cells[expr] = self.globals.cell(name.lexeme)
+        return cell
+
+    def __load(self, access: list[int]) -> object:
+        kind, index = access
+        if kind == LOCAL:
+            return self.frame[index]
+        if kind == CELL:
+            return self.frame[index].value
+        return self.upvalues[index].value
 
-    def __is_truthy(self, op: object) -> bool:
+    def is_truthy(self, op: object) -> bool:
         if not op:
             return False
         if isinstance(op, bool):
             return op
         return True
 
-    def __is_equal(self, left: object, right: object) -> bool:
-        if not left and not right:
-            return True
-        return left is right
 
-    def __stringify(self, obj: object) -> str:
-        if obj is None:
-            return "nil"
+def is_equal(left: object, right: object) -> bool:
+    if not left and not right:
+        return True
+    if isinstance(left, float) and isinstance(right, float):
+        # Numbers are values: two computations of 3 give different float
+        # objects that are still equal.
+        return left == right
+    return left is right
+
+
+def stringify(obj: object) -> str:
+    if obj is None:
+        return "nil"
 
-        return str(obj)
+    return str(obj)
@@ -0,0 +1,182 @@
+import functools
+import math
+import operator
+from array import array
+from typing import Any, Callable, Iterable, MutableSequence, cast
+
+from .interpreter import stringify
+from .lox_class import LoxClass, LoxInstance
+from .natives import NativeFunction, module
+from .runtime_exception import PloxRuntimeException
+from .tokens import Token
+
+# What LoxArray's items are while they are all floats: a contiguous buffer
+# of doubles, which bulk operations go through without boxing each one.
+NUMBERS = "d"
+
+# What Lox treats as numbers, bools among them, as Interpreter does.
+_NUMBER = (float, int)
+
+# What Array's map() can apply by name, each taking and giving floats.
+OPS: dict[str, Callable[[float], float]] = {
+    "abs": abs,
+    "negate": operator.neg,
+    "sqrt": math.sqrt,
+    "floor": lambda value: float(math.floor(value)),
+    "ceil": lambda value: float(math.ceil(value)),
+    "square": lambda value: value * value,
+}
+
+
+class LoxArray(LoxInstance):
+    """A native Lox array, whose methods are Python functions.
+
+    It is an instance without a shape, so every engine looks its methods
+    up through get(), which binds them to the array and to the name they
+    were looked up with, for reporting errors.
+    """
+    __slots__ = ("items", "bound")
+
+    def __init__(self, items: 'array[float] | list[object]') -> None:
+        self.klass = ARRAY
+        self.shape = None
+        self.values = []
+        self.named = {}
+        # An array of NUMBERS while every item is a float, else a list.
+        self.items = items
+        # The methods get() has bound, by name and the line they were
+        # looked up on, which is all errors report of the name.
+        self.bound: dict[tuple[str, int], NativeFunction] = {}
+
+    def get(self, name: Token) -> object:
+        key = (name.lexeme, name.line)
+        bound = self.bound.get(key)
+        if bound is None:
+            lexeme = name.lexeme
+            if lexeme not in METHODS:
+                raise PloxRuntimeException(name, f"Undefined property '{lexeme}'.")
+            arity, method = METHODS[lexeme]
+            bound = self.bound[key] = NativeFunction(lexeme, arity, functools.partial(method, self, name))
+        return bound
+
+    def set(self, name: Token, value: object) -> None:
+        raise PloxRuntimeException(name, "Can't add properties to an Array.")
+
+    def store(self, index: int, value: object) -> None:
+        """Put `value` at `index`, or after the last item if it is the length."""
+        items: MutableSequence[Any] = self.items
+        if type(items) is array and type(value) is not float:
+            items = self.items = list(items)
+        if index == len(items):
+            items.append(value)
+        else:
+            items[index] = value
+
+    def __str__(self) -> str:
+        return "[" + ", ".join(stringify(item) for item in self.items) + "]"
+
+
+ARRAY = LoxClass("Array", None, {})
+
+# Array's methods by name, with their arity. Each takes the array and the
+# name it was looked up with before its arguments.
+METHODS: dict[str, tuple[int, Callable[..., object]]] = {}
+
+
+def _method(name: str, arity: int) -> Callable[[Callable[..., object]], Callable[..., object]]:
+    def register(method: Callable[..., object]) -> Callable[..., object]:
+        METHODS[name] = (arity, method)
+        return method
+    return register
+
+
+def _storage(values: list[object]) -> 'array[float] | list[object]':
+    if all(type(value) is float for value in values):
+        return array(NUMBERS, cast(list[float], values))
+    return values
+
+
+def _index(name: Token, index: object, length: int, end: bool = False) -> int:
+    """`index` as an int, if it is a whole number indexing an item of an
+    array of `length` items, or is `length` itself, with `end`."""
+    if not isinstance(index, _NUMBER) or index != index or index % 1:
+        raise PloxRuntimeException(name, "Array indexes must be whole numbers.")
+    if not 0 <= index <= (length if end else length - 1):
+        raise PloxRuntimeException(name, f"Index {stringify(index)} is out of bounds for an Array of length {length}.")
+    return int(index)
+
+
+def _numbers(name: Token, items: 'array[float] | list[object]') -> Iterable[float]:
+    if type(items) is not array and not all(isinstance(item, _NUMBER) for item in items):
+        raise PloxRuntimeException(name, f"Array's {name.lexeme}() needs numbers.")
+    return cast(Iterable[float], items)
+
+
+@_method("length", 0)
+def _length(self: LoxArray, name: Token) -> float:
+    return float(len(self.items))
+
+
+@_method("get", 1)
+def _get(self: LoxArray, name: Token, index: object) -> object:
+    return self.items[_index(name, index, len(self.items))]
+
+
+@_method("set", 2)
+def _set(self: LoxArray, name: Token, index: object, value: object) -> None:
+    self.store(_index(name, index, len(self.items)), value)
+
+
+@_method("append", 1)
+def _append(self: LoxArray, name: Token, value: object) -> None:
+    self.store(len(self.items), value)
+
+
+@_method("slice", 2)
+def _slice(self: LoxArray, name: Token, start: object, end: object) -> LoxArray:
+    """A new array of the items from `start` up to, not including, `end`."""
+    length = len(self.items)
+    return LoxArray(self.items[_index(name, start, length, True):_index(name, end, length, True)])
+
+
+@_method("sum", 0)
+def _sum(self: LoxArray, name: Token) -> object:
+    return sum(_numbers(name, self.items), 0.0)
+
+
+@_method("dot", 1)
+def _dot(self: LoxArray, name: Token, other: object) -> object:
+    if not isinstance(other, LoxArray) or len(other.items) != len(self.items):
+        raise PloxRuntimeException(name, "Can only take the dot product of Arrays of the same length.")
+    return sum(map(operator.mul, _numbers(name, self.items), _numbers(name, other.items)), 0.0)
+
+
+@_method("map", 1)
+def _map(self: LoxArray, name: Token, op: object) -> LoxArray:
+    """A new array of the op named `op`, or the native function `op`,
+    applied to each item."""
+    function: Callable[[Any], Any]
+    named = type(op) is str and op in OPS
+    if named:
+        function = OPS[op]  # type: ignore[index]
+    elif isinstance(op, NativeFunction) and op.arity() == 1:
+        function = op.function
+    else:
+        raise PloxRuntimeException(
+            name, f"Can only map a native function taking 1 argument or one of: {', '.join(OPS)}.")
+    try:
+        # The named ops give floats for floats, so those need no checking.
+        if named and type(self.items) is array:
+            return LoxArray(array(NUMBERS, map(function, self.items)))
+        return LoxArray(_storage(list(map(function, self.items))))
+    except (ArithmeticError, TypeError, ValueError):
+        raise PloxRuntimeException(name, f"Can't map {stringify(op)} over every item.")
+
+
+arrays = module("array")
+
+
+@arrays.native("Array")
+def new_array() -> LoxArray:
+    """An empty array."""
+    return LoxArray(array(NUMBERS))
@@ -1,7 +1,8 @@
 from abc import abstractmethod
+from typing import Optional
 
-from .runtime_exception import ReturnException
-from .environment import Environment
+from .environment import Cell, FrameLayout
+from .memo import MISSING, Memo, arguments_key
 from .stmt import Function
 from .interpreter import Interpreter
 
@@ -17,33 +18,56 @@ class LoxCallable:
 
 
 class LoxFunction(LoxCallable):
-    def __init__(self, declaration: Function, closure: Environment, is_initializer: bool = False):
+    # The Memo answering calls of a pure function, once memoize() gave it one.
+    memo: Optional[Memo] = None
+
+    def __init__(self, declaration: Function, layout: FrameLayout, upvalues: list[Cell],
+                 is_initializer: bool = False, receiver: Optional[object] = None):
         self.declaration = declaration
-        self.closure = closure
+        self.layout = layout
+        # Only the cells of the variables this function captured, rather than
+        # every scope that was live when it was created.
+        self.upvalues = upvalues
         self.is_initializer = is_initializer
+        self.receiver = receiver
 
     def bind(self, instance: object) -> 'LoxFunction':
-        env = Environment(self.closure)
-        env.define("this", instance)
-        return LoxFunction(self.declaration, env, self.is_initializer)
+        return LoxFunction(self.declaration, self.layout, self.upvalues, self.is_initializer, instance)
 
     def arity(self) -> int:
         return len(self.declaration.params)
 
-    def call(self, interpreter: Interpreter, arguments: list[object]) -> object:
-        env = Environment(self.closure)
-        for (i, param) in enumerate(self.declaration.params):
-            env.define(param.lexeme, arguments[i])
-        try:
-            interpreter.execute_block(self.declaration.body, env)
-        except ReturnException as re:
-            if self.is_initializer:
-                return self.closure.get_at(0, "this")
-            return re.value
+    def memoize(self, memo: Memo) -> None:
+        """Answer calls from `memo` where it can, the function being pure.
+
+        The memoizing call() is set on the instance, so functions that
+        aren't memoized don't pay for checking whether they are.
+        """
+        call = self.call
 
+        def memoized(interpreter: Interpreter, arguments: list[object]) -> object:
+            key = arguments_key(arguments)
+            result = memo.get(key)
+            if result is MISSING:
+                result = call(interpreter, arguments)
+                memo.put(key, result)
+            return result
+        self.call = memoized  # type: ignore[method-assign]
+        self.memo = memo
+
+    def call(self, interpreter: Interpreter, arguments: list[object]) -> object:
+        size, boxed, _ = self.layout
+        # 'this' (for methods) and the parameters take the first slots.
+        if self.receiver is None:
+            frame = arguments + [None] * (size - len(arguments))
+        else:
+            frame = [self.receiver, *arguments] + [None] * (size - 1 - len(arguments))
+        for slot in boxed:
+            frame[slot] = Cell(frame[slot])
+        result = interpreter.execute_body(self.declaration.body, frame, self.upvalues)
         if self.is_initializer:
-            return self.closure.get_at(0, "this")
-        return None
+            return self.receiver
+        return result
 
     def __str__(self) -> str:
         return f"<fn {self.declaration.name.lexeme}>"
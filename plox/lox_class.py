@@ -10,51 +10,109 @@ class LoxClass(LoxCallable):
         self.name = name
         self.superclass = superclass
         self.methods = methods
+        # Inherited methods as well, flattened when the class is created
+        # (classes never change afterwards), so finding any method is one
+        # lookup however deep the hierarchy.
+        self.method_table: dict[str, LoxFunction] = {**superclass.method_table, **methods} if superclass else methods
+        self.initializer = self.method_table.get("init")
+        # Where the shapes of this class's instances start from.
+        self.shape = Shape({})
+        self.__arity = self.initializer.arity() if self.initializer else 0
 
     def __str__(self) -> str:
         return self.name
 
     def find_method(self, name: str) -> Optional[LoxFunction]:
-        if name in self.methods:
-            return self.methods[name]
-        if self.superclass:
-            return self.superclass.find_method(name)
-        return None
+        return self.method_table.get(name)
 
     def call(self, interpreter: Interpreter, arguments: list[object]) -> object:
         instance = LoxInstance(self)
-        initializer = self.find_method("init")
-        if initializer:
-            initializer.bind(instance).call(interpreter, arguments)
+        if self.initializer:
+            self.initializer.bind(instance).call(interpreter, arguments)
         return instance
 
     def arity(self) -> int:
-        match self.find_method("init"):
-            case LoxFunction() as lf:
-                return lf.arity()
-            case None:
-                return 0
-            case _:
-                raise RuntimeError("stupid")
+        return self.__arity
+
+
+class Shape:
+    """The layout shared by instances that were assigned the same fields in
+    the same order: which slot of their `values` holds each field."""
+    __slots__ = ("slots", "transitions")
+
+    # Instances with more fields than this keep them in a dict instead.
+    MAX_FIELDS = 64
+
+    def __init__(self, slots: dict[str, int]) -> None:
+        self.slots = slots
+        self.transitions: dict[str, 'Shape'] = {}
+
+    def add(self, name: str) -> Optional['Shape']:
+        """The shape after adding field `name`, None if it would be too big."""
+        shape = self.transitions.get(name)
+        if shape is None:
+            if len(self.slots) >= self.MAX_FIELDS:
+                return None
+            shape = self.transitions[name] = Shape({**self.slots, name: len(self.slots)})
+        return shape
 
 
 class LoxInstance:
+    __slots__ = ("klass", "shape", "values", "named")
+
     def __init__(self, klass: LoxClass) -> None:
         self.klass = klass
-        self.fields: dict[str, object] = {}
+        # The fields' values in the order of shape's slots, or, once there
+        # are too many fields to track, shape is None and named holds them
+        # by name instead.
+        self.shape: Optional[Shape] = klass.shape
+        self.values: list[object] = []
+        self.named: Optional[dict[str, object]] = None
+
+    @property
+    def fields(self) -> dict[str, object]:
+        if self.named is not None:
+            return dict(self.named)
+        assert self.shape is not None
+        return dict(zip(self.shape.slots, self.values))
 
     def get(self, name: Token) -> object:
-        if name.lexeme in self.fields:
-            return self.fields[name.lexeme]
+        lexeme = name.lexeme
+        if self.shape is None:
+            assert self.named is not None
+            if lexeme in self.named:
+                return self.named[lexeme]
+        else:
+            slot = self.shape.slots.get(lexeme)
+            if slot is not None:
+                return self.values[slot]
 
-        method = self.klass.find_method(name.lexeme)
+        method = self.klass.find_method(lexeme)
         if method:
             return method.bind(self)
 
-        raise PloxRuntimeException(name, f"Undefined property '{name.lexeme}'.")
+        raise PloxRuntimeException(name, f"Undefined property '{lexeme}'.")
 
     def set(self, name: Token, value: object) -> None:
-        self.fields[name.lexeme] = value
+        lexeme = name.lexeme
+        shape = self.shape
+        if shape is None:
+            assert self.named is not None
+            self.named[lexeme] = value
+            return
+        slot = shape.slots.get(lexeme)
+        if slot is not None:
+            self.values[slot] = value
+            return
+        added = shape.add(lexeme)
+        if added:
+            self.shape = added
+            self.values.append(value)
+        else:
+            self.named = dict(zip(shape.slots, self.values))
+            self.named[lexeme] = value
+            self.values = []
+            self.shape = None
 
     def __str__(self) -> str:
         return self.klass.name + " instance"
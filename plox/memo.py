@@ -0,0 +1,55 @@
+from collections import OrderedDict
+from typing import Iterable
+
+DEFAULT_SIZE = 1024
+
+# What Memo.get returns for arguments it holds no result for.
+MISSING = object()
+
+
+def arguments_key(arguments: Iterable[object]) -> tuple:
+    """What to cache a call with `arguments` under.
+
+    Numbers that compare equal can still print differently (1 and 1.0,
+    0.0 and -0.0, true and 1), so unless the arguments are all strings
+    and non-zero floats, the key tells those apart too.
+    """
+    key = tuple(arguments)
+    for argument in key:
+        if type(argument) is not str and (type(argument) is not float or not argument):
+            return tuple((type(a), a.hex() if type(a) is float else a) for a in key)
+    return key
+
+
+class Memo:
+    """The results of a pure function's calls by their arguments, keeping
+    the `size` most recently used."""
+    __slots__ = ("size", "results", "hits", "misses")
+
+    def __init__(self, size: int = DEFAULT_SIZE) -> None:
+        self.size = size
+        self.results: OrderedDict[tuple, object] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple) -> object:
+        result = self.results.get(key, MISSING)
+        if result is MISSING:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.results.move_to_end(key)
+        return result
+
+    def put(self, key: tuple, result: object) -> None:
+        self.results[key] = result
+        if len(self.results) > self.size:
+            self.results.popitem(last=False)
+
+    def hit_rate(self) -> float:
+        calls = self.hits + self.misses
+        return self.hits / calls if calls else 0.0
+
+    def __str__(self) -> str:
+        return (f"{self.hits} hits, {self.misses} misses ({self.hit_rate():.1%}), "
+                f"{len(self.results)}/{self.size} cached")
@@ -0,0 +1,72 @@
+import inspect
+import time
+from typing import Callable, Optional
+
+from .interpreter import Interpreter
+from .lox_callable import LoxCallable
+
+
+class NativeFunction(LoxCallable):
+    """A Python callable that Lox calls with its arguments, positionally.
+
+    Engines that know about natives call `function` directly, so a call
+    costs no more than the Python call itself.
+    """
+
+    def __init__(self, name: str, parameters: int, function: Callable[..., object]) -> None:
+        self.name = name
+        self.parameters = parameters
+        self.function = function
+
+    def arity(self) -> int:
+        return self.parameters
+
+    def call(self, interpreter: Interpreter, arguments: list[object]) -> object:
+        return self.function(*arguments)
+
+    def __str__(self) -> str:
+        return "<native fn>"
+
+
+class NativeModule:
+    """Natives that are loaded into a program's globals together."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.functions: dict[str, NativeFunction] = {}
+
+    def native(self, name: Optional[str] = None,
+               arity: Optional[int] = None) -> Callable[[Callable[..., object]], Callable[..., object]]:
+        """Register the decorated callable, under its own name and with as
+        many parameters as it has unless told otherwise."""
+        def register(function: Callable[..., object]) -> Callable[..., object]:
+            parameters = len(inspect.signature(function).parameters) if arity is None else arity
+            native_name = name or function.__name__
+            self.functions[native_name] = NativeFunction(native_name, parameters, function)
+            return function
+        return register
+
+
+# Every module there is to load, by name.
+MODULES: dict[str, NativeModule] = {}
+
+
+def module(name: str) -> NativeModule:
+    """The module called `name`, registering it if it is new."""
+    if name not in MODULES:
+        MODULES[name] = NativeModule(name)
+    return MODULES[name]
+
+
+# What every program can call.
+core = module("core")
+
+
+@core.native()
+def clock() -> float:
+    """Seconds since an arbitrary point, to the nanosecond, for timing."""
+    return time.perf_counter_ns() / 1e9
+
+
+# The modules that ship besides core register themselves when imported.
+from . import lox_array  # noqa: E402,F401
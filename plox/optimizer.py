@@ -0,0 +1,118 @@
+from typing import Optional
+
+from .environment import LOCAL
+from .expr import Assign, Binary, Call, Expr, Get, Grouping, Literal, Logical, Set, Unary, Variable
+from .interpreter import Interpreter
+from .runtime_exception import PloxRuntimeException
+from .stmt import Block, Class, Expression, Function, If, Print, Return, Stmt, Var, While
+
+
+class Optimizer:
+    """Simplifies a resolved program without changing what it does.
+
+    Folds operators applied to literals, propagates local variables that
+    are initialized with a literal and never assigned, unwraps groupings
+    and drops branches and loops whose condition is a literal. Anything
+    that would raise at runtime, such as adding a number to a string or
+    dividing by zero, is left for the interpreter to report.
+
+    `resolved` must have resolved exactly these statements. The result is
+    a new tree that has to be resolved again before it's interpreted.
+    """
+    def __init__(self, resolved: Interpreter) -> None:
+        # Folding evaluates through the interpreter itself, so the results
+        # are whatever running the code would have produced.
+        self.evaluator = resolved
+        self.locals = resolved.locals
+        self.declarations = resolved.declarations
+        # Accesses from the declaring function share one access list per
+        # variable, so these identify variables that are ever assigned.
+        self.assigned = {id(access) for node, access in resolved.locals.items() if isinstance(node, Assign)}
+        self.constants: dict[int, Literal] = {}
+
+    def optimize(self, statements: list[Stmt]) -> list[Stmt]:
+        optimized = []
+        for statement in statements:
+            result = self.visit_statement(statement)
+            if result:
+                optimized.append(result)
+        return optimized
+
+    def visit_statement(self, statement: Stmt) -> Optional[Stmt]:
+        match statement:
+            case Block(statements):
+                return Block(self.optimize(statements))
+            case Expression(expression):
+                return Expression(self.visit_expr(expression))
+            case Print(expression):
+                return Print(self.visit_expr(expression))
+            case Return(keyword, value):
+                return Return(keyword, self.visit_expr(value) if value else None)
+            case Var(name, initializer):
+                if initializer:
+                    initializer = self.visit_expr(initializer)
+                access = self.declarations.get(statement)
+                # Captured variables are left alone: closures may assign them.
+                if isinstance(initializer, Literal) and access and access[0] == LOCAL \
+                        and id(access) not in self.assigned:
+                    self.constants[id(access)] = initializer
+                return Var(name, initializer)
+            case Function() as fn:
+                return self.__function(fn)
+            case Class(name, superclass, methods):
+                return Class(name, superclass, [self.__function(method) for method in methods])
+            case If(condition, then_branch, else_branch):
+                condition = self.visit_expr(condition)
+                if isinstance(condition, Literal):
+                    taken = then_branch if self.evaluator.is_truthy(condition.value) else else_branch
+                    return self.visit_statement(taken) if taken else None
+                return If(condition, self.__branch(then_branch),
+                          self.visit_statement(else_branch) if else_branch else None)
+            case While(condition, body):
+                condition = self.visit_expr(condition)
+                if isinstance(condition, Literal) and not self.evaluator.is_truthy(condition.value):
+                    return None
+                return While(condition, self.__branch(body))
+        raise Exception(f"Unexpected statement {statement}")
+
+    def visit_expr(self, expr: Expr) -> Expr:
+        match expr:
+            case Grouping(expression):
+                return self.visit_expr(expression)
+            case Binary(left, op, right):
+                binary = Binary(self.visit_expr(left), op, self.visit_expr(right))
+                if isinstance(binary.left, Literal) and isinstance(binary.right, Literal):
+                    return self.__fold(binary)
+                return binary
+            case Unary(op, right):
+                unary = Unary(op, self.visit_expr(right))
+                if isinstance(unary.right, Literal):
+                    return self.__fold(unary)
+                return unary
+            case Logical(left, op, right):
+                return Logical(self.visit_expr(left), op, self.visit_expr(right))
+            case Call(callee, paren, arguments):
+                return Call(self.visit_expr(callee), paren, [self.visit_expr(argument) for argument in arguments])
+            case Get(obj, name):
+                return Get(self.visit_expr(obj), name)
+            case Set(obj, name, value):
+                return Set(self.visit_expr(obj), name, self.visit_expr(value))
+            case Assign(name, value):
+                return Assign(name, self.visit_expr(value))
+            case Variable():
+                access = self.locals.get(expr)
+                if access:
+                    return self.constants.get(id(access), expr)
+        return expr
+
+    def __function(self, fn: Function) -> Function:
+        return Function(fn.name, fn.params, self.optimize(fn.body))
+
+    def __branch(self, statement: Stmt) -> Stmt:
+        return self.visit_statement(statement) or Block([])
+
+    def __fold(self, expr: Expr) -> Expr:
+        try:
+            return Literal(self.evaluator.evaluate(expr))
+        except (PloxRuntimeException, ArithmeticError):
+            return expr
@@ -0,0 +1,85 @@
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, Optional
+
+from .stmt import Stmt
+from .tokens import Token
+from . import parser
+from . import plox
+from . import scanner
+
+# Just enough of the lexical structure to track nesting: strings and comments
+# (so braces inside them don't count), brackets, and declaration keywords.
+_STRUCTURE = re.compile(r'"[^"]*"?|//[^\n]*|[{}()]|\b(?:class|fun|var)\b')
+
+# Chunks handed out per worker, so one slow chunk doesn't leave the others idle.
+CHUNKS_PER_JOB = 4
+
+
+def split_declarations(source: str, pieces: int) -> list[tuple[int, int]]:
+    """(offset, line) of up to `pieces` places to cut `source` at.
+
+    Every cut but the first sits on a `class`, `fun` or `var` keyword
+    outside any braces or parentheses, which in a valid program always
+    starts a top-level declaration.
+    """
+    target = max(len(source) // pieces, 1)
+    cuts = [(0, 1)]
+    next_cut = target
+    line = 1
+    counted = 0
+    depth = 0
+    for match in _STRUCTURE.finditer(source):
+        char = source[match.start()]
+        if char == "{" or char == "(":
+            depth += 1
+        elif char == "}" or char == ")":
+            depth -= 1
+        elif char.isalpha() and depth == 0 and match.start() >= next_cut:
+            start = match.start()
+            line += source.count("\n", counted, start)
+            counted = start
+            cuts.append((start, line))
+            next_cut = start + target
+    return cuts
+
+
+def parse(source: str, jobs: Optional[int] = None, pieces: Optional[int] = None) -> list[Stmt]:
+    """Scan and parse `source` across a pool of `jobs` processes.
+
+    The statements, tokens and error lines are the same as a sequential
+    FastScanner + Parser run. Workers only collect their errors: if any
+    chunk has one, the source is parsed again sequentially to report them,
+    since a declaration cut short at a chunk boundary would see a different
+    token after it than in the whole program.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    cuts = split_declarations(source, pieces or jobs * CHUNKS_PER_JOB)
+    if len(cuts) > 1:
+        ends = [offset for offset, _ in cuts[1:]] + [len(source)]
+        chunks = [(source[offset:end], offset, line) for (offset, line), end in zip(cuts, ends)]
+        statements: list[Stmt] = []
+        failed = False
+        with ProcessPoolExecutor(jobs) as pool:
+            for chunk_statements, errors in pool.map(_parse_chunk, chunks):
+                statements.extend(chunk_statements)
+                failed = failed or bool(errors)
+        if not failed:
+            return statements
+    return parser.Parser(scanner.FastScanner(source).scan_buffer()).parse()
+
+
+def _parse_chunk(chunk: tuple[str, int, int]) -> tuple[list[Stmt], list[tuple[int, str]]]:
+    text, offset, line = chunk
+    sc = scanner.FastScanner(text)
+    sc.line = line
+    sc.last_start = offset
+
+    def tokens() -> Iterator[Token]:
+        yield from sc._scan(text, 0, len(text), offset, True)
+        yield sc._eof()
+
+    with plox.collect_errors() as errors:
+        statements = parser.Parser(tokens()).parse()
+    return statements, errors
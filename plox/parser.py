@@ -1,8 +1,8 @@
 import logging
-from typing import Optional
+from typing import Iterable, Iterator, Optional
 
 from .stmt import Block, Class, Expression, Function, If, Print, Return, Stmt, Var, While
-from .tokens import Token, TokenType
+from .tokens import Token, TokenBuffer, TokenType
 from .expr import Assign, Call, Expr, Binary, Grouping, Literal, Logical, Set, This, Unary, Variable, Get, Super
 from . import plox
 
@@ -11,24 +11,69 @@ class ParseException(Exception):
     pass
 
 
+# How tightly each infix operator binds; higher binds tighter.
+INFIX_POWER: dict[TokenType, int] = {
+    TokenType.OR: 1,
+    TokenType.AND: 2,
+    TokenType.BANG_EQUAL: 3,
+    TokenType.EQUAL_EQUAL: 3,
+    TokenType.GREATER: 4,
+    TokenType.GREATER_EQUAL: 4,
+    TokenType.LESS: 4,
+    TokenType.LESS_EQUAL: 4,
+    TokenType.MINUS: 5,
+    TokenType.PLUS: 5,
+    TokenType.SLASH: 6,
+    TokenType.STAR: 6,
+}
+
+
 class Parser:
-    def __init__(self, tokens: list[Token]):
-        self.tokens = tokens
-        self.current = 0
+    def __init__(self, tokens: Iterable[Token]):
+        # A TokenBuffer is read by position, building Tokens only for what
+        # the AST keeps or an error reports. Other tokens are pulled lazily,
+        # so only the current and previous ones are ever held here. Either
+        # must end with an EOF token.
+        self.buffer = tokens if isinstance(tokens, TokenBuffer) else None
+        self.position = 0
+        if self.buffer is not None:
+            self.current_type = self.buffer.token_type(0)
+        else:
+            self.tokens = iter(tokens)
+            self.current_token = next(self.tokens)
+            self.previous_token = self.current_token
+            self.current_type = self.current_token.token_type
         self.logger = logging.getLogger("parser")
 
     def parse(self) -> list[Stmt]:
-        statements: list[Stmt] = []
+        return list(self.iter_parse())
+
+    def iter_parse(self) -> Iterator[Stmt]:
+        """Yield top-level statements as soon as each one has been parsed."""
         while not self.__is_at_end():
             declaration = self.__declaration()
             if declaration:
-                statements.append(declaration)
+                yield declaration
             else:
                 self.logger.warning("Empty declaration, how to handle???")
-        return statements
 
     def __expression(self) -> Expr:
-        return self.__assignment()
+        expr = self.__infix(1)
+
+        # Assignment binds loosest and is right-associative, and its target
+        # has to be validated, so it sits outside the power table.
+        if self.current_type is TokenType.EQUAL:
+            equals = self.__take()
+            value = self.__expression()
+
+            match expr:
+                case Variable(name):
+                    return Assign(name, value)
+                case Get(obj, name):
+                    return Set(obj, name, value)
+                case _:
+                    self.__error(equals, "Invalid assignment target")
+        return expr
 
     def __declaration(self) -> Optional[Stmt]:
         try:
@@ -47,53 +92,16 @@ class Parser:
         name = self.__consume(TokenType.IDENTIFIER, "Expect class name.")
         superclass = None
         if self.__match(TokenType.LESS):
-            self.__consume(TokenType.IDENTIFIER, "Expect superclass name")
-            superclass = Variable(self.__previous())
-        self.__consume(TokenType.LEFT_BRACE, "Expect '{' before class body.")
+            superclass = Variable(self.__consume(TokenType.IDENTIFIER, "Expect superclass name"))
+        self.__expect(TokenType.LEFT_BRACE, "Expect '{' before class body.")
 
         methods = []
         while not self.__check(TokenType.RIGHT_BRACE) and not self.__is_at_end():
             methods.append(self.__function("method"))
 
-        self.__consume(TokenType.RIGHT_BRACE, "Expect '}' after class body.")
+        self.__expect(TokenType.RIGHT_BRACE, "Expect '}' after class body.")
         return Class(name, superclass, methods)
 
-    def __assignment(self) -> Expr:
-        expr = self.__or()
-
-        if self.__match(TokenType.EQUAL):
-            equals = self.__previous()
-            value = self.__assignment()
-
-            match expr:
-                case Variable(name):
-                    return Assign(name, value)
-                case Get(obj, name):
-                    return Set(obj, name, value)
-                case _:
-                    self.__error(equals, "Invalid assignment target")
-        return expr
-
-    def __or(self) -> Expr:
-        expr = self.__and()
-
-        while self.__match(TokenType.OR):
-            operator = self.__previous()
-            right = self.__and()
-            expr = Logical(expr, operator, right)
-
-        return expr
-
-    def __and(self) -> Expr:
-        expr = self.__equality()
-
-        while self.__match(TokenType.AND):
-            operator = self.__previous()
-            right = self.__equality()
-            expr = Logical(expr, operator, right)
-
-        return expr
-
     def __statement(self) -> Stmt:
         if self.__match(TokenType.FOR):
             return self.__for_statement()
@@ -110,7 +118,7 @@ class Parser:
         return self.__expression_statement()
 
     def __for_statement(self) -> Stmt:
-        self.__consume(TokenType.LEFT_PAREN, "Expect '(' after 'for'.")
+        self.__expect(TokenType.LEFT_PAREN, "Expect '(' after 'for'.")
 
         initializer = None
         if self.__match(TokenType.SEMICOLON):
@@ -123,12 +131,12 @@ class Parser:
         condition = None
         if not self.__check(TokenType.SEMICOLON):
             condition = self.__expression()
-        self.__consume(TokenType.SEMICOLON, "Expect ';' after loop condition.")
+        self.__expect(TokenType.SEMICOLON, "Expect ';' after loop condition.")
 
         increment = None
         if not self.__check(TokenType.RIGHT_PAREN):
             increment = self.__expression()
-        self.__consume(TokenType.RIGHT_PAREN, "Expect ')' after for clauses.")
+        self.__expect(TokenType.RIGHT_PAREN, "Expect ')' after for clauses.")
         body = self.__statement()
 
         if increment:
@@ -143,7 +151,7 @@ class Parser:
 
     def __function(self, kind: str) -> Function:
         name = self.__consume(TokenType.IDENTIFIER, f"Expect {kind} name.")
-        self.__consume(TokenType.LEFT_PAREN, f"Exepect '(' after {kind} name")
+        self.__expect(TokenType.LEFT_PAREN, f"Exepect '(' after {kind} name")
         parameters = []
         if not self.__check(TokenType.RIGHT_PAREN):
             parameters.append(self.__consume(TokenType.IDENTIFIER, "Expect parameter name"))
@@ -151,16 +159,16 @@ class Parser:
                 if len(parameters) > 255:
                     self.__error(self.__peek(), "Can't have more than 255 parameters.")
                 parameters.append(self.__consume(TokenType.IDENTIFIER, "Expect parameter name"))
-        self.__consume(TokenType.RIGHT_PAREN, "Expect ')' after parameters")
+        self.__expect(TokenType.RIGHT_PAREN, "Expect ')' after parameters")
 
-        self.__consume(TokenType.LEFT_BRACE, f"Expect '{{' before {kind} body")
+        self.__expect(TokenType.LEFT_BRACE, f"Expect '{{' before {kind} body")
         body = self.__block_statement()
         return Function(name, parameters, body.statements)
 
     def __if_statement(self) -> Stmt:
-        self.__consume(TokenType.LEFT_PAREN, "Expect '(' after 'if'.")
+        self.__expect(TokenType.LEFT_PAREN, "Expect '(' after 'if'.")
         condition = self.__expression()
-        self.__consume(TokenType.RIGHT_PAREN, "Expect ')' after if condition")
+        self.__expect(TokenType.RIGHT_PAREN, "Expect ')' after if condition")
 
         then_branch = self.__statement()
         else_branch = None
@@ -171,7 +179,7 @@ class Parser:
 
     def __print_statement(self) -> Stmt:
         value = self.__expression()
-        self.__consume(TokenType.SEMICOLON, "Expect ';' after value.")
+        self.__expect(TokenType.SEMICOLON, "Expect ';' after value.")
         return Print(value)
 
     def __return_statement(self) -> Stmt:
@@ -180,7 +188,7 @@ class Parser:
         if not self.__check(TokenType.SEMICOLON):
             value = self.__expression()
 
-        self.__consume(TokenType.SEMICOLON, "Expect ';' after return value.")
+        self.__expect(TokenType.SEMICOLON, "Expect ';' after return value.")
         return Return(keyword, value)
 
     def __var_declaration(self) -> Stmt:
@@ -190,19 +198,19 @@ class Parser:
         if self.__match(TokenType.EQUAL):
             initializer = self.__expression()
 
-        self.__consume(TokenType.SEMICOLON, "Expect ';' after variable declaration")
+        self.__expect(TokenType.SEMICOLON, "Expect ';' after variable declaration")
         return Var(name, initializer)
 
     def __while_statement(self) -> Stmt:
-        self.__consume(TokenType.LEFT_PAREN, "Expected '(' after while")
+        self.__expect(TokenType.LEFT_PAREN, "Expected '(' after while")
         condition = self.__expression()
-        self.__consume(TokenType.RIGHT_PAREN, "Expected '' after while condition")
+        self.__expect(TokenType.RIGHT_PAREN, "Expected '' after while condition")
 
         return While(condition, self.__statement())
 
     def __expression_statement(self):
         value = self.__expression()
-        self.__consume(TokenType.SEMICOLON, "Expect ';' after expression.")
+        self.__expect(TokenType.SEMICOLON, "Expect ';' after expression.")
         return Expression(value)
 
     def __block_statement(self) -> Block:
@@ -215,73 +223,45 @@ class Parser:
             else:
                 self.logger.warning("Empty declaration, how to handle???")
 
-        self.__consume(TokenType.RIGHT_BRACE, "Expect '}' after block")
+        self.__expect(TokenType.RIGHT_BRACE, "Expect '}' after block")
         return Block(statements)
 
-    def __equality(self) -> Expr:
-        expr = self.__comparison()
-        self.logger.debug("Entering equality with base of %s", expr)
-
-        while self.__match(TokenType.BANG_EQUAL, TokenType.EQUAL_EQUAL):
-            operator = self.__previous()
-            right = self.__comparison()
-            expr = Binary(expr, operator, right)
-
-        return expr
-
-    def __comparison(self) -> Expr:
-        expr = self.__term()
-        self.logger.debug("Entering comparison with base of %s", expr)
-        while self.__match(TokenType.GREATER, TokenType.GREATER_EQUAL, TokenType.LESS, TokenType.LESS_EQUAL):
-            operator = self.__previous()
-            right = self.__term()
-            expr = Binary(expr, operator, right)
-
-        return expr
-
-    def __term(self) -> Expr:
-        expr = self.__factor()
-        self.logger.debug("Entering term with base of %s", expr)
-
-        while self.__match(TokenType.MINUS, TokenType.PLUS):
-            self.logger.debug('advancing term match')
-            operator = self.__previous()
-            right = self.__factor()
-            expr = Binary(expr, operator, right)
-
-        return expr
-
-    def __factor(self) -> Expr:
-        expr = self.__unary()
-        self.logger.debug("Entering factor with base of %s", expr)
-
-        while self.__match(TokenType.SLASH, TokenType.STAR):
-            operator = self.__previous()
-            right = self.__unary()
-            expr = Binary(expr, operator, right)
-
-        return expr
+    def __infix(self, min_power: int) -> Expr:
+        """Parse operands joined by infix operators binding at least `min_power` tightly."""
+        left = self.__unary()
+        while True:
+            power = INFIX_POWER.get(self.current_type, 0)
+            if power < min_power:
+                return left
+            operator = self.__take()
+            # Operators of equal power are left-associative.
+            right = self.__infix(power + 1)
+            if operator.token_type is TokenType.OR or operator.token_type is TokenType.AND:
+                left = Logical(left, operator, right)
+            else:
+                left = Binary(left, operator, right)
 
     def __unary(self) -> Expr:
-        self.logger.debug("Entering unary, looking at %s", self.__peek())
-        if self.__match(TokenType.BANG, TokenType.MINUS):
-            operator = self.__previous()
-            right = self.__unary()
-            return Unary(operator, right)
+        token_type = self.current_type
+        if token_type is TokenType.BANG or token_type is TokenType.MINUS:
+            operator = self.__take()
+            return Unary(operator, self.__unary())
         return self.__call()
 
     def __call(self) -> Expr:
         expr = self.__primary()
 
         while True:
-            if self.__match(TokenType.LEFT_PAREN):
+            token_type = self.current_type
+            if token_type is TokenType.LEFT_PAREN:
+                self.__advance()
                 expr = self.__finish_call(expr)
-            elif self.__match(TokenType.DOT):
+            elif token_type is TokenType.DOT:
+                self.__advance()
                 name = self.__consume(TokenType.IDENTIFIER, "Expect property name after '.'.")
                 expr = Get(expr, name)
             else:
-                break
-        return expr
+                return expr
 
     def __finish_call(self, callee: Expr) -> Expr:
         arguments = []
@@ -297,42 +277,55 @@ class Parser:
         return Call(callee, paren, arguments)
 
     def __primary(self) -> Expr:
-        if self.__match(TokenType.FALSE):
-            return Literal(False)
-        if self.__match(TokenType.TRUE):
-            return Literal(True)
-        if self.__match(TokenType.NIL):
-            return Literal(TokenType.NIL)
-
-        if self.__match(TokenType.NUMBER, TokenType.STRING):
-            return Literal(self.__previous().literal)
-
-        if self.__match(TokenType.SUPER):
-            keyword = self.__previous()
-            self.__consume(TokenType.DOT, "Expect '.' after 'super'.")
-            method = self.__consume(TokenType.IDENTIFIER, "Expect superclass method name.")
-            return Super(keyword, method)
-        if self.__match(TokenType.THIS):
-            return This(self.__previous())
-
-        if self.__match(TokenType.IDENTIFIER):
-            return Variable(self.__previous())
-
-        if self.__match(TokenType.LEFT_PAREN):
-            expr = self.__expression()
-            self.__consume(TokenType.RIGHT_PAREN, "Expect ')' after expression.")
-            return Grouping(expr)
+        match self.current_type:
+            case TokenType.IDENTIFIER:
+                return Variable(self.__take())
+            case TokenType.NUMBER | TokenType.STRING:
+                if self.buffer is not None:
+                    literal = self.buffer.literal(self.position)
+                else:
+                    literal = self.current_token.literal
+                self.__advance()
+                return Literal(literal)
+            case TokenType.LEFT_PAREN:
+                self.__advance()
+                expr = self.__expression()
+                self.__expect(TokenType.RIGHT_PAREN, "Expect ')' after expression.")
+                return Grouping(expr)
+            case TokenType.THIS:
+                return This(self.__take())
+            case TokenType.FALSE:
+                self.__advance()
+                return Literal(False)
+            case TokenType.TRUE:
+                self.__advance()
+                return Literal(True)
+            case TokenType.NIL:
+                self.__advance()
+                return Literal(TokenType.NIL)
+            case TokenType.SUPER:
+                keyword = self.__take()
+                self.__expect(TokenType.DOT, "Expect '.' after 'super'.")
+                method = self.__consume(TokenType.IDENTIFIER, "Expect superclass method name.")
+                return Super(keyword, method)
 
         # Make lint happy
         return Unary(self.__error(self.__peek(), "Expected expression"), Literal("failed"))
 
     def __consume(self, token_type: TokenType, message: str) -> Token:
         if self.__check(token_type):
-            return self.__advance()
+            return self.__take()
 
         # Make lint happy
         return self.__error(self.__peek(), message)
 
+    def __expect(self, token_type: TokenType, message: str) -> None:
+        """Like __consume, for tokens the AST doesn't keep."""
+        if self.__check(token_type):
+            self.__advance()
+        else:
+            self.__error(self.__peek(), message)
+
     def __error(self, token: Token, message: str) -> Token:
         plox.error(token.line, message)
         raise ParseException()
@@ -343,7 +336,7 @@ class Parser:
         while not self.__is_at_end():
             if self.__previous().token_type is TokenType.SEMICOLON:
                 return
-            match self.__peek().token_type:
+            match self.current_type:
                 case TokenType.CLASS | TokenType.FUN | TokenType.VAR | TokenType.FOR | TokenType.IF | TokenType.WHILE | TokenType.RETURN:
                     return
             self.__advance()
@@ -351,26 +344,38 @@ class Parser:
     def __match(self, *types) -> bool:
         for t in types:
             if self.__check(t):
-                self.logger.debug("Match, %s is a %s. Advancing", self.__peek(), t)
                 self.__advance()
                 return True
         return False
 
     def __check(self, token_type: TokenType) -> bool:
-        if self.__is_at_end():
-            return False
-        return self.__peek().token_type is token_type
+        return self.current_type is token_type and token_type is not TokenType.EOF
+
+    def __advance(self) -> None:
+        if self.current_type is TokenType.EOF:
+            return
+        if self.buffer is not None:
+            self.position += 1
+            self.current_type = self.buffer.token_type(self.position)
+        else:
+            self.previous_token = self.current_token
+            self.current_token = next(self.tokens)
+            self.current_type = self.current_token.token_type
 
-    def __advance(self) -> Token:
-        if not self.__is_at_end():
-            self.current += 1
+    def __take(self) -> Token:
+        """Advance, returning the token advanced past."""
+        self.__advance()
         return self.__previous()
 
     def __is_at_end(self) -> bool:
-        return self.__peek().token_type is TokenType.EOF
+        return self.current_type is TokenType.EOF
 
     def __peek(self) -> Token:
-        return self.tokens[self.current]
+        if self.buffer is not None:
+            return self.buffer[self.position]
+        return self.current_token
 
     def __previous(self) -> Token:
-        return self.tokens[self.current - 1]
+        if self.buffer is not None:
+            return self.buffer[max(self.position - 1, 0)]
+        return self.previous_token
@@ -1,38 +1,154 @@
+import functools
 import logging
 import argparse
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional, Sequence, TextIO
+from . import cache
+from . import closure_engine
 from . import interpreter
+from . import memo
+from . import natives
+from . import optimizer
+from . import parallel
 from . import parser
 from . import resolver
 from . import scanner
+from . import transpiler
+from . import vm
+from .stmt import Stmt
 
 had_error = False
+error_sink: Optional[list[tuple[int, str]]] = None
+
+# What --engine chooses between to execute programs.
+ENGINES: dict[str, type[interpreter.Interpreter]] = {
+    "tree": interpreter.Interpreter,
+    "closure": closure_engine.ClosureInterpreter,
+    "vm": vm.VM,
+    "python": transpiler.PythonInterpreter,
+}
 
 
 def error(line: int, message: str) -> None:
     global had_error
     had_error = True
+    if error_sink is not None:
+        error_sink.append((line, message))
+        return
     print(f"[line {line}] Error: {message}")
 
 
+@contextmanager
+def collect_errors() -> Iterator[list[tuple[int, str]]]:
+    """Gather (line, message) pairs passed to error() instead of printing them.
+
+    had_error is restored on exit, so collecting doesn't affect the runner.
+    """
+    global error_sink, had_error
+    saved = error_sink, had_error
+    error_sink = []
+    try:
+        yield error_sink
+    finally:
+        error_sink, had_error = saved
+
+
 class LoxRunner:
+    def __init__(self, cache_dir: Optional[str] = None, jobs: int = 1, optimize: bool = True,
+                 engine: str = "tree", max_depth: Optional[int] = None, memo_size: Optional[int] = None,
+                 modules: Sequence[str] = ()) -> None:
+        options = " ".join(option for option, enabled in (("no-opt", not optimize), ("memo", memo_size)) if enabled)
+        self.cache = cache.CompilationCache(cache_dir, options) if cache_dir else None
+        self.jobs = jobs
+        self.optimize = optimize
+        # Memoize pure functions, keeping this many results of each.
+        self.memo_size = memo_size
+        # The native modules to load besides core, which always is.
+        self.modules = modules
+        self.engine: Callable[[], interpreter.Interpreter] = ENGINES[engine]
+        if max_depth is not None:
+            # The other engines nest Python calls for Lox ones, so Python's
+            # recursion limit is theirs.
+            if engine != "vm":
+                raise ValueError("max_depth needs the vm engine")
+            self.engine = functools.partial(vm.VM, max_depth=max_depth)
+
     def run(self, contents: str) -> None:
-        sc = scanner.Scanner(contents)
-        tokens = sc.scan_tokens()
-        p = parser.Parser(tokens)
-        statements = p.parse()
-        if had_error:
-            return
+        interp = self.__interpreter()
+        if self.memo_size:
+            interp.memo_size = self.memo_size
+        cached = self.cache.load(contents) if self.cache else None
+        if cached:
+            statements, resolved = cached
+            for table, entries in zip(interp.side_tables(), resolved):
+                table.update(entries)
+        else:
+            if self.jobs > 1:
+                statements = parallel.parse(contents, self.jobs)
+            else:
+                sc = scanner.FastScanner(contents)
+                tokens = sc.scan_buffer()
+                p = parser.Parser(tokens)
+                statements = p.parse()
+            if had_error:
+                return
 
-        interp = interpreter.Interpreter()
-        resolve = resolver.Resolver(interp)
-        resolve.resolve(statements)
-        if had_error:
-            return
+            statements = self.__resolve(interp, statements)
+            if had_error:
+                return
+            if self.cache:
+                self.cache.store(contents, statements, interp.side_tables())
         interp.interpret(statements)
+        if interp.memos and interp.logger.isEnabledFor(logging.DEBUG):
+            for declaration, function_memo in interp.memos.items():
+                interp.logger.debug("Memo of %s: %s", declaration.name.lexeme, function_memo)
+
+    def run_stream(self, file: TextIO) -> None:
+        """Scan, parse and execute `file` one top-level statement at a time.
+
+        Memory stays flat regardless of the file's size, but unlike run() the
+        statements before the first error have already executed by the time
+        it is reported. Pure functions are only known once the whole
+        program is resolved, so they aren't memoized.
+        """
+        interp = self.__interpreter()
+        p = parser.Parser(scanner.StreamingScanner(file))
+        for statement in p.iter_parse():
+            if had_error:
+                return
+            statements = self.__resolve(interp, [statement])
+            if had_error:
+                return
+            interp.interpret(statements)
+
+    def __interpreter(self) -> interpreter.Interpreter:
+        interp = self.engine()
+        for module in self.modules:
+            interp.load(module)
+        return interp
+
+    def __resolve(self, interp: interpreter.Interpreter, statements: list[Stmt]) -> list[Stmt]:
+        """Resolve `statements` into `interp`, optimizing them first if enabled."""
+        find_pure = bool(self.memo_size)
+        if not self.optimize:
+            resolver.Resolver(interp, find_pure).resolve(statements)
+            return statements
+        # Resolve the program as written first, so errors in code the
+        # optimizer drops are still reported.
+        original = interpreter.Interpreter()
+        resolver.Resolver(original).resolve(statements)
+        if had_error:
+            return statements
+        statements = optimizer.Optimizer(original).optimize(statements)
+        resolver.Resolver(interp, find_pure).resolve(statements)
+        return statements
 
-    def run_file(self, file_name: str) -> None:
+    def run_file(self, file_name: str, stream: bool = False) -> None:
         with open(file_name, 'r', encoding='utf-8') as file:
-            self.run(file.read())
+            if stream:
+                self.run_stream(file)
+            else:
+                self.run(file.read())
 
     def run_prompt(self) -> None:
         global had_error
@@ -47,12 +163,40 @@ def main() -> None:
     arg_parser = argparse.ArgumentParser(prog='plox')
     arg_parser.add_argument('-f', '--file', required=False)
     arg_parser.add_argument('-d', "--debug", action='store_true')
+    arg_parser.add_argument('-s', '--stream', action='store_true',
+                            help='execute each statement of --file as soon as it is parsed')
+    arg_parser.add_argument('--cache-dir', default=cache.default_directory(),
+                            help='where compiled --file programs are cached (default: %(default)s); entries '
+                                 'are pickles, which run code when loaded, so only use a directory no one else '
+                                 'can write to')
+    arg_parser.add_argument('--no-cache', action='store_true', help="don't use the compilation cache")
+    arg_parser.add_argument('-j', '--jobs', type=int, default=1,
+                            help='scan and parse --file across this many processes')
+    arg_parser.add_argument('--no-opt', action='store_true', help="don't optimize programs before running them")
+    arg_parser.add_argument('--engine', choices=ENGINES, default="tree",
+                            help='how to execute programs: walk the tree, compile it to closures, '
+                                 'to bytecode for a VM, or to Python (default: %(default)s)')
+    arg_parser.add_argument('--max-depth', type=int,
+                            help=f'how deeply calls may nest with --engine vm (default: {vm.DEFAULT_MAX_DEPTH})')
+    arg_parser.add_argument('--memoize', type=int, nargs='?', const=memo.DEFAULT_SIZE, metavar='SIZE',
+                            help='cache the results of calls to pure functions, keeping the SIZE most recently used '
+                                 'of each (default: %(const)s); with --debug, their hit rates are logged')
+    arg_parser.add_argument('--load', action='append', default=[], choices=natives.MODULES, metavar='MODULE',
+                            help='define the natives of MODULE as globals, as is done with core; '
+                                 f'may be repeated (one of: {", ".join(natives.MODULES)})')
     args = arg_parser.parse_args()
-    lox = LoxRunner()
+    if args.max_depth is not None and args.engine != "vm":
+        arg_parser.error("--max-depth needs --engine vm")
+    if args.memoize is not None and args.memoize < 1:
+        arg_parser.error("--memoize needs a SIZE of at least 1")
+    if args.memoize and args.stream:
+        arg_parser.error("--memoize needs the whole program, so it can't be used with --stream")
+    lox = LoxRunner(args.cache_dir if args.file and not args.no_cache else None, args.jobs, not args.no_opt,
+                    args.engine, args.max_depth, args.memoize, args.load)
     if args.debug:
         logging.basicConfig(level=logging.DEBUG)
     if args.file:
-        lox.run_file(args.file)
+        lox.run_file(args.file, args.stream)
     else:
         lox.run_prompt()
 
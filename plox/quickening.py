@@ -0,0 +1,77 @@
+import operator
+from sys import intern
+from typing import Callable, Iterable, Optional
+
+from .interpreter import is_equal
+from .tokens import TokenType
+
+# Operations for operands of types that already pass Interpreter's checks,
+# keyed by operator and operand types.
+BINARY: dict[tuple[TokenType, type, type], Callable[..., object]] = {
+    (TokenType.PLUS, float, float): operator.add,
+    (TokenType.MINUS, float, float): operator.sub,
+    (TokenType.STAR, float, float): operator.mul,
+    (TokenType.SLASH, float, float): operator.truediv,
+    (TokenType.GREATER, float, float): operator.gt,
+    (TokenType.GREATER_EQUAL, float, float): operator.ge,
+    (TokenType.LESS, float, float): operator.lt,
+    (TokenType.LESS_EQUAL, float, float): operator.le,
+    # is_equal compares floats by value.
+    (TokenType.EQUAL_EQUAL, float, float): operator.eq,
+    (TokenType.BANG_EQUAL, float, float): operator.ne,
+    (TokenType.PLUS, str, str): lambda left, right: intern(left + right),
+    (TokenType.EQUAL_EQUAL, str, str): is_equal,
+    (TokenType.BANG_EQUAL, str, str): lambda left, right: not is_equal(left, right),
+}
+UNARY: dict[tuple[TokenType, type], Callable[..., object]] = {
+    (TokenType.MINUS, float): operator.neg,
+    (TokenType.BANG, bool): operator.not_,
+}
+
+# Sites whose guard failed more often than this stay generic.
+MAX_DEOPTS = 3
+
+
+class Site:
+    """What a Binary or Unary node has specialized to, and how often that held.
+
+    While specialized, `operation` is only valid for operands of exactly
+    `left` (and `right`) type; while generic, both are None, which no
+    operand's type is.
+    """
+    __slots__ = ("left", "right", "operation", "hits", "misses", "deopts")
+
+    def __init__(self) -> None:
+        self.left: Optional[type] = None
+        self.right: Optional[type] = None
+        self.operation: Optional[Callable[..., object]] = None
+        self.hits = 0
+        self.misses = 0
+        self.deopts = 0
+
+    def specialize(self, operator_type: TokenType, left: type, right: Optional[type] = None) -> None:
+        """Specialize to the operand types just seen, if there is an
+        operation for them and the site hasn't deoptimized too often."""
+        if self.operation:
+            self.deopts += 1
+        operation: Optional[Callable[..., object]]
+        if self.deopts > MAX_DEOPTS:
+            operation = None
+        elif right is None:
+            operation = UNARY.get((operator_type, left))
+        else:
+            operation = BINARY.get((operator_type, left, right))
+        self.operation = operation
+        self.left, self.right = (left, right) if operation else (None, None)
+
+
+def summarize(sites: Iterable[Site]) -> dict[str, int]:
+    """Totals of the counters of `sites`, and how many are specialized."""
+    totals = {"sites": 0, "specialized": 0, "hits": 0, "misses": 0, "deopts": 0}
+    for site in sites:
+        totals["sites"] += 1
+        totals["specialized"] += site.operation is not None
+        totals["hits"] += site.hits
+        totals["misses"] += site.misses
+        totals["deopts"] += site.deopts
+    return totals
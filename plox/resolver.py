@@ -1,13 +1,59 @@
 from enum import Enum
+from typing import Optional
 
 from .tokens import Token
+from .environment import CELL, LOCAL, UPVALUE
 from .expr import Assign, Binary, Call, Expr, Get, Grouping, Literal, Logical, Set, Super, This, Unary, Variable
 from .stmt import Block, Class, Expression, Function, If, Print, Return, Stmt, Var, While
 from .interpreter import Interpreter
 from . import plox
 
 
+class _FunctionScope:
+    """Frame layout of a function (or top-level statement) being resolved."""
+    def __init__(self, enclosing: Optional['_FunctionScope']) -> None:
+        self.enclosing = enclosing
+        self.next_slot = 0
+        self.size = 0
+        self.upvalues: list[tuple[bool, int]] = []
+        self.upvalue_indices: dict[_Local, int] = {}
+
+    def allocate(self) -> int:
+        slot = self.next_slot
+        self.next_slot += 1
+        self.size = max(self.size, self.next_slot)
+        return slot
+
+
+class _Local:
+    def __init__(self, slot: int, function: _FunctionScope) -> None:
+        # Shared by every access from the declaring function, so capturing
+        # the variable later turns all of them into CELL accesses at once.
+        self.access = [LOCAL, slot]
+        self.function = function
+        self.defined = True
+
+
+class _Purity:
+    """What resolving a global function found out about its purity."""
+    def __init__(self, function: Function) -> None:
+        self.function = function
+        self.impure = False
+        # The globals it reads, which must be pure functions for it to be.
+        self.reads: set[str] = set()
+
+
 class Resolver:
+    """Resolves variables to slots, cells and upvalues in the interpreter's
+    side tables, and reports scoping errors.
+
+    With `find_pure`, it also puts in the interpreter's `pure` table the
+    global functions whose calls can be memoized: those that don't print,
+    assign to globals, use fields or create closures or instances, and
+    read no globals but pure functions declared once and never assigned
+    to. That is only known once the whole program is resolved, so it has
+    to be resolved in a single resolve() call.
+    """
     class FunctionType(Enum):
         NONE = 1
         FUNCTION = 2
@@ -19,15 +65,35 @@ class Resolver:
         CLASS = 2
         SUBClASS = 3
 
-    def __init__(self, interpreter: Interpreter):
+    def __init__(self, interpreter: Interpreter, find_pure: bool = False):
         self.interpreter = interpreter
-        self.scopes: list[dict[str, bool]] = []
+        self.scopes: list[dict[str, _Local]] = []
+        self.function: Optional[_FunctionScope] = None
         self.current_function = self.FunctionType.NONE
         self.current_class = self.ClassType.NONE
+        self.find_pure = find_pure
+        # The global function whose body is being resolved, and every one so far.
+        self.purity: Optional[_Purity] = None
+        self.candidates: list[_Purity] = []
+        # How often each global is declared, and which are assigned to.
+        self.global_declarations: dict[str, int] = {}
+        self.assigned_globals: set[str] = set()
 
     def resolve(self, statements: list[Stmt]) -> None:
+        top_level = not self.function
         for statement in statements:
+            if self.function:
+                self.visit_statement(statement)
+                continue
+            # Locals of a top-level statement (in its blocks, or a class's
+            # 'super') live in a frame of the statement's own.
+            self.function = _FunctionScope(None)
             self.visit_statement(statement)
+            if self.function.size:
+                self.interpreter.frames[statement] = (self.function.size, (), ())
+            self.function = None
+        if top_level and self.find_pure:
+            self.__find_pure()
 
     def visit_statement(self, statement: Stmt) -> None:
         match statement:
@@ -35,7 +101,10 @@ class Resolver:
                 self.__begin_scope()
                 self.resolve(statements)
                 self.__end_scope()
-            case Expression(expression) | Print(expression):
+            case Expression(expression):
+                self.visit_expr(expression)
+            case Print(expression):
+                self.__impure()
                 self.visit_expr(expression)
             case Return(keyword, return_value):
                 if self.current_function == self.FunctionType.NONE:
@@ -45,14 +114,24 @@ class Resolver:
                         plox.error(keyword.line, "Can't return a value from an initializer.")
                     self.visit_expr(return_value)
             case Var(name, initializer):
-                self.__declare(name)
+                self.__declare_global(name)
+                self.__declare(name, statement)
                 if initializer:
                     self.visit_expr(initializer)
                 self.__define(name)
             case Function(name, _, _) as fn:
-                self.__declare(name)
+                self.__declare(name, fn)
                 self.__define(name)
-                self.__resolve_function(fn, self.FunctionType.FUNCTION)
+                if self.scopes:
+                    # A closure, which each call creates anew.
+                    self.__impure()
+                    self.__resolve_function(fn, self.FunctionType.FUNCTION)
+                else:
+                    self.__declare_global(name)
+                    self.purity = _Purity(fn)
+                    self.candidates.append(self.purity)
+                    self.__resolve_function(fn, self.FunctionType.FUNCTION)
+                    self.purity = None
             case If(condition, then_branch, else_branch):
                 self.visit_expr(condition)
                 self.visit_statement(then_branch)
@@ -61,10 +140,12 @@ class Resolver:
             case While(condition, while_body):
                 self.visit_expr(condition)
                 self.visit_statement(while_body)
-            case Class(name, superclass, methods):
+            case Class(name, superclass, methods) as klass:
                 enclosing_class = self.current_class
                 self.current_class = self.ClassType.CLASS
-                self.__declare(name)
+                self.__impure()
+                self.__declare_global(name)
+                self.__declare(name, klass)
                 self.__define(name)
 
                 if superclass:
@@ -73,10 +154,7 @@ class Resolver:
                     self.current_class = self.ClassType.SUBClASS
                     self.visit_expr(superclass)
                     self.__begin_scope()
-                    self.scopes[-1]["super"] = True
-
-                self.__begin_scope()
-                self.scopes[-1]["this"] = True
+                    self.interpreter.implicit[klass] = self.__add_local("super").access
 
                 for method in methods:
                     declaration = self.FunctionType.METHOD
@@ -84,7 +162,6 @@ class Resolver:
                         declaration = self.FunctionType.INITIALIZER
                     self.__resolve_function(method, declaration)
 
-                self.__end_scope()
                 if superclass:
                     self.__end_scope()
                 self.current_class = enclosing_class
@@ -94,68 +171,155 @@ class Resolver:
             case Assign(name, value) as assign:
                 self.visit_expr(value)
                 self.__resolve_local(assign, name)
+                access = self.interpreter.locals.get(assign)
+                if not access or access[0] == UPVALUE:
+                    self.__impure()
+                if not access:
+                    self.assigned_globals.add(name.lexeme)
             case Binary(left, _, right) | Logical(left, _, right):
                 self.visit_expr(left)
                 self.visit_expr(right)
             case Call(callee, _, arguments):
                 self.visit_expr(callee)
+                # Only calls of (what must be) pure global functions can be pure.
+                if not isinstance(callee, Variable) or callee in self.interpreter.locals:
+                    self.__impure()
                 for argument in arguments:
                     self.visit_expr(argument)
-            case Grouping(value) | Unary(_, value) | Get(value, _):
+            case Grouping(value) | Unary(_, value):
                 self.visit_expr(value)
+            case Get(obj, _):
+                self.__impure()
+                self.visit_expr(obj)
             case Literal():
                 pass
             case Variable(name) as var:
-                if len(self.scopes) > 0 and self.scopes[-1].get(name.lexeme, None) is False:
+                if len(self.scopes) > 0 and name.lexeme in self.scopes[-1] and not self.scopes[-1][name.lexeme].defined:
                     plox.error(name.line, "Can't read local variable in its own initializer.")
                 self.__resolve_local(var, name)
+                if self.purity and var not in self.interpreter.locals:
+                    self.purity.reads.add(name.lexeme)
             case Set(obj, _, value):
+                self.__impure()
                 self.visit_expr(value)
                 self.visit_expr(obj)
             case This(keyword) as this:
+                self.__impure()
                 if self.current_class == self.ClassType.NONE:
                     plox.error(keyword.line, "Can't use 'this' outside of a class.")
                     return
                 self.__resolve_local(this, keyword)
             case Super(keyword, _) as superclass:
+                self.__impure()
                 if self.current_class == self.ClassType.NONE:
                     plox.error(keyword.line, "Can't use 'super' outside of a class.")
                 if self.current_class == self.ClassType.CLASS:
                     plox.error(keyword.line, "Can't use 'super' in a class with no superclass.")
                 self.__resolve_local(superclass, keyword)
+                this_access = self.__access("this")
+                if this_access:
+                    self.interpreter.implicit[superclass] = this_access
 
     def __resolve_function(self, function: Function, function_type: FunctionType) -> None:
         enclosing_function = self.current_function
         self.current_function = function_type
+        self.function = _FunctionScope(self.function)
         self.__begin_scope()
+        # A method's receiver comes first in its frame, then the parameters.
+        if function_type in (self.FunctionType.METHOD, self.FunctionType.INITIALIZER):
+            self.__add_local("this")
         for param in function.params:
             self.__declare(param)
             self.__define(param)
+        entry = list(self.scopes[-1].values())
         self.resolve(function.body)
+        # Parameters (and 'this') are already in their slots when the call
+        # starts, so it's the call that boxes the captured ones.
+        boxed = tuple(local.access[1] for local in entry if local.access[0] == CELL)
         self.__end_scope()
+        self.interpreter.frames[function] = (self.function.size, boxed, tuple(self.function.upvalues))
+        self.function = self.function.enclosing
         self.current_function = enclosing_function
 
+    def __impure(self) -> None:
+        if self.purity:
+            self.purity.impure = True
+
+    def __declare_global(self, name: Token) -> None:
+        if not self.scopes:
+            self.global_declarations[name.lexeme] = self.global_declarations.get(name.lexeme, 0) + 1
+
+    def __find_pure(self) -> None:
+        """Narrow the functions found nothing impure in down to those that
+        only read globals that are themselves pure functions."""
+        pure = [candidate for candidate in self.candidates if not candidate.impure]
+        while True:
+            names = {candidate.function.name.lexeme for candidate in pure}
+            kept = [candidate for candidate in pure
+                    if all(name in names and self.global_declarations.get(name) == 1
+                           and name not in self.assigned_globals for name in candidate.reads)]
+            if len(kept) == len(pure):
+                break
+            pure = kept
+        self.interpreter.pure.update(candidate.function for candidate in pure)
+
     def __begin_scope(self) -> None:
         self.scopes.append({})
 
     def __end_scope(self) -> None:
-        self.scopes.pop()
+        scope = self.scopes.pop()
+        # Slots are reused by whatever comes after the scope.
+        assert self.function
+        self.function.next_slot -= len(scope)
 
-    def __declare(self, name: Token) -> None:
+    def __declare(self, name: Token, declaration: Optional[Stmt] = None) -> None:
         if len(self.scopes) == 0:
             return
-        if name.lexeme in self.scopes[-1]:
+        local = self.scopes[-1].get(name.lexeme)
+        if local:
             plox.error(name.line, "Already a variable with this name in this scope.")
-        self.scopes[-1][name.lexeme] = False
+        else:
+            local = self.__add_local(name.lexeme)
+        local.defined = False
+        if declaration:
+            self.interpreter.declarations[declaration] = local.access
 
     def __define(self, name: Token) -> None:
         if len(self.scopes) == 0:
             return
-        self.scopes[-1][name.lexeme] = True
+        self.scopes[-1][name.lexeme].defined = True
+
+    def __add_local(self, name: str) -> _Local:
+        assert self.function
+        local = _Local(self.function.allocate(), self.function)
+        self.scopes[-1][name] = local
+        return local
 
     def __resolve_local(self, expr: Expr, name: Token) -> None:
-        for i in reversed(range(len(self.scopes))):
-            scope = self.scopes[i]
-            if name.lexeme in scope:
-                self.interpreter.resolve(expr, len(self.scopes) - 1 - i)
-                return
+        access = self.__access(name.lexeme)
+        if access:
+            self.interpreter.resolve(expr, access)
+
+    def __access(self, name: str) -> Optional[list[int]]:
+        for scope in reversed(self.scopes):
+            local = scope.get(name)
+            if local:
+                if local.function is self.function:
+                    return local.access
+                local.access[0] = CELL
+                assert self.function
+                return [UPVALUE, self.__upvalue(self.function, local)]
+        return None
+
+    def __upvalue(self, function: _FunctionScope, local: _Local) -> int:
+        """Index of `local` among the variables `function` captures, adding it
+        (and to every function in between) if need be."""
+        index = function.upvalue_indices.get(local)
+        if index is None:
+            assert function.enclosing
+            if function.enclosing is local.function:
+                function.upvalues.append((True, local.access[1]))
+            else:
+                function.upvalues.append((False, self.__upvalue(function.enclosing, local)))
+            index = function.upvalue_indices[local] = len(function.upvalues) - 1
+        return index
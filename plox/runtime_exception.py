@@ -1,14 +1,15 @@
+from typing import Optional
+
 from .tokens import Token
 
 
 class PloxRuntimeException(Exception):
-    def __init__(self, token: Token, message: str):
+    def __init__(self, token: Optional[Token], message: str, line: Optional[int] = None):
         self.message = message
         super().__init__(message)
         self.token = token
-
-
-class ReturnException(Exception):
-    def __init__(self, value: object):
-        super().__init__("placeholder")
-        self.value = value
+        # Engines that only keep a line table, like the VM, give the line instead.
+        if token is not None:
+            line = token.line
+        assert line is not None, "Runtime errors need a token or a line"
+        self.line = line
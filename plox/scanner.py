@@ -1,4 +1,8 @@
-from .tokens import Token, TokenType
+import re
+from sys import intern
+from typing import Generator, Iterator, TextIO
+
+from .tokens import Token, TokenBuffer, TokenType
 from . import plox
 
 KEYWORDS: dict[str, TokenType] = {
@@ -20,6 +24,49 @@ KEYWORDS: dict[str, TokenType] = {
     "while": TokenType.WHILE
 }
 
+OPERATORS: dict[str, TokenType] = {
+    "(": TokenType.LEFT_PAREN,
+    ")": TokenType.RIGHT_PAREN,
+    "{": TokenType.LEFT_BRACE,
+    "}": TokenType.RIGHT_BRACE,
+    ",": TokenType.COMMA,
+    ".": TokenType.DOT,
+    "-": TokenType.MINUS,
+    "+": TokenType.PLUS,
+    ";": TokenType.SEMICOLON,
+    "/": TokenType.SLASH,
+    "*": TokenType.STAR,
+    "!": TokenType.BANG,
+    "!=": TokenType.BANG_EQUAL,
+    "=": TokenType.EQUAL,
+    "==": TokenType.EQUAL_EQUAL,
+    ">": TokenType.GREATER,
+    ">=": TokenType.GREATER_EQUAL,
+    "<": TokenType.LESS,
+    "<=": TokenType.LESS_EQUAL,
+}
+
+# Alternatives are tried in order: '//' has to win over '/', and a terminated
+# string over an unterminated one. The last group catches anything else.
+TOKEN_PATTERN = re.compile(r"""
+    (?P<whitespace>[ \t\r\n]+)
+  | (?P<comment>//[^\n]*)
+  | (?P<number>[0-9]+(?:\.[0-9]+)?)
+  | (?P<identifier>[A-Za-z_][A-Za-z0-9_]*)
+  | (?P<string>"[^"]*")
+  | (?P<unterminated>"[^"]*)
+  | (?P<operator>[!=<>]=?|[(){},.\-+;*/])
+  | (?P<unexpected>.)
+""", re.VERBOSE | re.DOTALL)
+
+_WHITESPACE = TOKEN_PATTERN.groupindex["whitespace"]
+_COMMENT = TOKEN_PATTERN.groupindex["comment"]
+_NUMBER = TOKEN_PATTERN.groupindex["number"]
+_IDENTIFIER = TOKEN_PATTERN.groupindex["identifier"]
+_STRING = TOKEN_PATTERN.groupindex["string"]
+_UNTERMINATED = TOKEN_PATTERN.groupindex["unterminated"]
+_OPERATOR = TOKEN_PATTERN.groupindex["operator"]
+
 
 class Scanner:
     def __init__(self, source: str) -> None:
@@ -103,7 +150,7 @@ class Scanner:
 
         text = self.source[self.start:self.current]
         token_type = KEYWORDS.get(text, TokenType.IDENTIFIER)
-        self.__add_token(token_type)
+        self.__add_token(token_type, intern_lexeme=True)
 
     def __number(self) -> None:
         while self.__is_digit(self.__peek()):
@@ -129,7 +176,7 @@ class Scanner:
         # Closing "
         self.__advance()
 
-        value = self.source[self.start + 1:self.current - 1]
+        value = intern(self.source[self.start + 1:self.current - 1])
         self.__add_token(TokenType.STRING, value)
 
     def __peek(self) -> str:
@@ -155,6 +202,160 @@ class Scanner:
         self.current += 1
         return char
 
-    def __add_token(self, token_type: TokenType, literal: object = None) -> None:
+    def __add_token(self, token_type: TokenType, literal: object = None, intern_lexeme: bool = False) -> None:
         text = self.source[self.start:self.current]
+        if intern_lexeme:
+            # Identifiers end up as Environment/field/method keys, which then
+            # compare by identity instead of character by character.
+            text = intern(text)
         self.tokens.append(Token(token_type, text, literal, self.line, self.start))
+
+
+class FastScanner:
+    """Drop-in replacement for Scanner driven by a single compiled regex.
+
+    Produces exactly the same tokens (including the EOF token's offset) and
+    reports the same errors, but lets the regex engine do the per-character
+    work instead of a chain of Python method calls.
+    """
+    def __init__(self, source: str) -> None:
+        self.source = source
+        self.tokens: list[Token] = []
+        self.line = 1
+        # Offset of the last lexeme Scanner would have started, which it
+        # reuses for the EOF token.
+        self.last_start = 0
+
+    def scan_tokens(self) -> list[Token]:
+        self.tokens.extend(self._scan(self.source, 0, len(self.source), 0, True))
+        self.tokens.append(self._eof())
+        return self.tokens
+
+    def scan_buffer(self) -> TokenBuffer:
+        """Like scan_tokens, but fill a TokenBuffer without creating Tokens."""
+        source = self.source
+        buffer = TokenBuffer(source)
+        types = buffer.types.append
+        starts = buffer.starts.append
+        lengths = buffer.lengths.append
+        lines = buffer.lines.append
+        line = self.line
+        last_start = self.last_start
+        identifier = TokenType.IDENTIFIER.value
+        keywords = {text: token_type.value for text, token_type in KEYWORDS.items()}
+        operators = {text: token_type.value for text, token_type in OPERATORS.items()}
+
+        for match in TOKEN_PATTERN.finditer(source):
+            kind = match.lastindex
+            start, stop = match.span()
+            last_start = start
+            if kind == _WHITESPACE:
+                line += source.count("\n", start, stop)
+                last_start = stop - 1
+                continue
+            if kind == _OPERATOR:
+                types(operators[match.group()])
+            elif kind == _IDENTIFIER:
+                types(keywords.get(match.group(), identifier))
+            elif kind == _NUMBER:
+                types(TokenType.NUMBER.value)
+            elif kind == _STRING:
+                line += source.count("\n", start, stop)
+                types(TokenType.STRING.value)
+            elif kind == _COMMENT:
+                continue
+            elif kind == _UNTERMINATED:
+                line += source.count("\n", start, stop)
+                plox.error(line, "unterminated string")
+                continue
+            else:
+                plox.error(line, f"Unexpected character {match.group()}")
+                continue
+            starts(start)
+            lengths(stop - start)
+            lines(line)
+
+        self.line = line
+        self.last_start = last_start
+        buffer.append(TokenType.EOF, last_start, 0, line)
+        return buffer
+
+    def _eof(self) -> Token:
+        return Token(TokenType.EOF, "", None, self.line, self.last_start)
+
+    def _scan(self, source: str, begin: int, end: int, offset: int, final: bool) -> Generator[Token, None, int]:
+        """Tokenize source[begin:end], adding `offset` to every token position.
+
+        Unless `final` is set, scanning stops in front of an unterminated
+        string since more input may still close it. Returns the index where
+        scanning stopped.
+        """
+        line = self.line
+        last_start = self.last_start
+
+        for match in TOKEN_PATTERN.finditer(source, begin, end):
+            kind = match.lastindex
+            start, stop = match.span()
+            last_start = start + offset
+            if kind == _WHITESPACE:
+                line += source.count("\n", start, stop)
+                last_start = stop - 1 + offset
+            elif kind == _OPERATOR:
+                text = match.group()
+                yield Token(OPERATORS[text], text, None, line, start + offset)
+            elif kind == _IDENTIFIER:
+                text = intern(match.group())
+                yield Token(KEYWORDS.get(text, TokenType.IDENTIFIER), text, None, line, start + offset)
+            elif kind == _NUMBER:
+                text = match.group()
+                yield Token(TokenType.NUMBER, text, float(text), line, start + offset)
+            elif kind == _STRING:
+                text = match.group()
+                line += text.count("\n")
+                yield Token(TokenType.STRING, text, intern(text[1:-1]), line, start + offset)
+            elif kind == _COMMENT:
+                pass
+            elif kind == _UNTERMINATED:
+                if not final:
+                    self.line = line
+                    return start
+                line += source.count("\n", start, stop)
+                plox.error(line, "unterminated string")
+            else:
+                plox.error(line, f"Unexpected character {match.group()}")
+
+        self.line = line
+        self.last_start = last_start
+        return end
+
+
+class StreamingScanner(FastScanner):
+    """Lazily tokenize a text file, reading it `chunk_size` characters at a time.
+
+    Only the unscanned tail of the current chunk is buffered. Chunks are cut
+    after their last newline, which no token other than a string can span;
+    a string left open at the cut is carried over to the next chunk.
+    """
+    def __init__(self, file: TextIO, chunk_size: int = 1 << 16) -> None:
+        super().__init__("")
+        self.file = file
+        self.chunk_size = chunk_size
+
+    def scan_tokens(self) -> list[Token]:
+        self.tokens.extend(self)
+        return self.tokens
+
+    def __iter__(self) -> Iterator[Token]:
+        buffer = ""
+        offset = 0
+        while chunk := self.file.read(self.chunk_size):
+            buffer += chunk
+            end = buffer.rfind("\n") + 1
+            if end == 0:
+                continue
+            end = yield from self._scan(buffer, 0, end, offset, False)
+            buffer = buffer[end:]
+            offset += end
+
+        yield from self._scan(buffer, 0, len(buffer), offset, True)
+        yield self._eof()
@@ -5,59 +5,60 @@ from .tokens import Token
 from .expr import Expr, Variable
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, eq=False)
 class Stmt:
-    pass
+    def __reduce__(self):
+        return (type(self), tuple(map(self.__getattribute__, self.__slots__)))
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, eq=False)
 class Block(Stmt):
     statements: list[Stmt]
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, eq=False)
 class Expression(Stmt):
     expression: Expr
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, eq=False)
 class Print(Stmt):
     expression: Expr
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, eq=False)
 class Return(Stmt):
     keyword: Token
     value: Optional[Expr]
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, eq=False)
 class Var(Stmt):
     name: Token
     initializer: Optional[Expr]
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, eq=False)
 class Function(Stmt):
     name: Token
     params: list[Token]
     body: list[Stmt]
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, eq=False)
 class If(Stmt):
     condition: Expr
     then_branch: Stmt
     else_branch: Optional[Stmt]
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, eq=False)
 class While(Stmt):
     condition: Expr
     body: Stmt
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, eq=False)
 class Class(Stmt):
     name: Token
     superclass: Optional[Variable]
@@ -1,5 +1,8 @@
+from array import array
 from dataclasses import dataclass
 from enum import Enum
+from sys import intern
+from typing import Iterator, cast
 
 
 class TokenType(Enum):
@@ -52,10 +55,106 @@ class TokenType(Enum):
     EOF = 39
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Token:
     token_type: TokenType
     lexeme: str
     literal: object
     line: int
     line_start: int
+
+    def __reduce__(self):
+        return (_unpickle_token, (self.token_type.value, self.lexeme, self.literal, self.line, self.line_start))
+
+
+def _unpickle_token(type_value: int, lexeme: str, literal: object, line: int, line_start: int) -> Token:
+    # Enum members pickle by value through a call to TokenType; decoding the
+    # value ourselves is much cheaper. Unpickled strings aren't interned either,
+    # so re-intern them to keep tokens loaded from the cache or a worker
+    # process identical to freshly scanned ones.
+    token_type = _TYPES_BY_VALUE[type_value]
+    if token_type is TokenType.IDENTIFIER:
+        lexeme = intern(lexeme)
+    elif token_type is TokenType.STRING:
+        literal = intern(cast(str, literal))
+    return Token(token_type, lexeme, literal, line, line_start)
+
+
+# TokenType members indexed by value, for decoding TokenBuffer.types.
+_TYPES_BY_VALUE = cast(tuple[TokenType, ...], (None, *TokenType))
+# The values of the types whose tokens TokenBuffer builds specially.
+_IDENTIFIER, _NUMBER, _STRING = TokenType.IDENTIFIER.value, TokenType.NUMBER.value, TokenType.STRING.value
+
+
+class TokenBuffer:
+    """Struct-of-arrays token storage over a shared source string.
+
+    Each token costs four array entries instead of a Token object and a
+    lexeme copy. Lexemes and literals are sliced out of the source on
+    demand, and Tokens are only built for the positions that get indexed
+    or iterated. A Parser reads a buffer by position and indexes only the
+    tokens its AST keeps or an error reports.
+    """
+    def __init__(self, source: str) -> None:
+        self.source = source
+        self.types = array('B')
+        self.starts = array('I')
+        self.lengths = array('I')
+        self.lines = array('I')
+
+    def append(self, token_type: TokenType, start: int, length: int, line: int) -> None:
+        self.types.append(token_type.value)
+        self.starts.append(start)
+        self.lengths.append(length)
+        self.lines.append(line)
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    def token_type(self, index: int) -> TokenType:
+        return _TYPES_BY_VALUE[self.types[index]]
+
+    def lexeme(self, index: int) -> str:
+        start = self.starts[index]
+        lexeme = self.source[start:start + self.lengths[index]]
+        if self.types[index] == _IDENTIFIER:
+            return intern(lexeme)
+        return lexeme
+
+    def line(self, index: int) -> int:
+        return self.lines[index]
+
+    def literal(self, index: int) -> object:
+        token_type = self.types[index]
+        if token_type == _NUMBER:
+            return float(self.lexeme(index))
+        if token_type == _STRING:
+            start = self.starts[index]
+            return intern(self.source[start + 1:start + self.lengths[index] - 1])
+        return None
+
+    def __getitem__(self, index: int) -> Token:
+        value = self.types[index]
+        start = self.starts[index]
+        lexeme = self.source[start:start + self.lengths[index]]
+        literal: object = None
+        if value == _IDENTIFIER:
+            lexeme = intern(lexeme)
+        elif value == _NUMBER:
+            literal = float(lexeme)
+        elif value == _STRING:
+            literal = intern(lexeme[1:-1])
+        return Token(_TYPES_BY_VALUE[value], lexeme, literal, self.lines[index], start)
+
+    def __iter__(self) -> Iterator[Token]:
+        source = self.source
+        for value, start, length, line in zip(self.types, self.starts, self.lengths, self.lines):
+            lexeme = source[start:start + length]
+            literal: object = None
+            if value == _IDENTIFIER:
+                lexeme = intern(lexeme)
+            elif value == _NUMBER:
+                literal = float(lexeme)
+            elif value == _STRING:
+                literal = intern(lexeme[1:-1])
+            yield Token(_TYPES_BY_VALUE[value], lexeme, literal, line, start)
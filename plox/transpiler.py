@@ -0,0 +1,453 @@
+import functools
+import math
+import numbers
+import operator
+from sys import intern
+from types import CodeType
+from typing import Any, Callable, Optional
+
+from .environment import CELL, LOCAL, UNDEFINED, Cell, FrameLayout
+from .expr import Assign, Binary, Call, Expr, Get, Grouping, Literal, Logical, Set, Super, This, Unary, Variable
+from .interpreter import Interpreter, is_equal, stringify
+from .lox_callable import LoxCallable, LoxFunction
+from .lox_class import LoxClass, LoxInstance
+from .memo import MISSING, Memo, arguments_key
+from .natives import NativeFunction
+from .runtime_exception import PloxRuntimeException
+from .stmt import Block, Class, Expression, Function, If, Print, Return, Stmt, Var, While
+from .tokens import Token, TokenType
+
+
+class PythonFunction(LoxFunction):
+    """A Lox function translated to a Python one.
+
+    `function` takes the receiver (for methods) and the arguments, and
+    reaches what it captured through keyword defaults.
+    """
+    def __init__(self, function: Callable, declaration: Function, layout: FrameLayout, upvalues: list[Cell],
+                 is_initializer: bool = False, receiver: Optional[object] = None):
+        super().__init__(declaration, layout, upvalues, is_initializer, receiver)
+        self.function = function
+        self.bound: Callable[..., object] = function
+        if receiver is not None:
+            self.bound = functools.partial(function, receiver)
+        # How many arguments call sites can pass straight to `bound`, or None
+        # if calls have to go through call().
+        self.direct = None if is_initializer else len(declaration.params)
+
+    def bind(self, instance: object) -> 'PythonFunction':
+        return PythonFunction(self.function, self.declaration, self.layout, self.upvalues, self.is_initializer,
+                              instance)
+
+    def memoize(self, memo: Memo) -> None:
+        # Calls from call sites and call() alike go through `bound`.
+        bound = self.bound
+
+        def memoized(*arguments: object) -> object:
+            key = arguments_key(arguments)
+            result = memo.get(key)
+            if result is MISSING:
+                result = bound(*arguments)
+                memo.put(key, result)
+            return result
+        self.bound = memoized
+        self.memo = memo
+
+    def call(self, interpreter: Interpreter, arguments: list[object]) -> object:
+        result = self.bound(*arguments)
+        if self.is_initializer:
+            return self.receiver
+        return result
+
+
+# The slow paths of operators, for anything other than two floats.
+def _check_numbers(left: object, right: object, line: int) -> None:
+    if not (isinstance(left, numbers.Real) and isinstance(right, numbers.Real)):
+        raise PloxRuntimeException(None, "Operands must be numbers", line)
+
+
+def _add(left: object, right: object, line: int) -> object:
+    if isinstance(left, str) and isinstance(right, str):
+        return intern(left + right)
+    if isinstance(left, numbers.Real) and isinstance(right, numbers.Real):
+        return left + right
+    raise PloxRuntimeException(None, "Can only combine numbers or strings", line)
+
+
+def _arithmetic(function: Callable[..., object]) -> Callable[[object, object, int], object]:
+    def slow_path(left: object, right: object, line: int) -> object:
+        _check_numbers(left, right, line)
+        return function(left, right)
+    return slow_path
+
+
+def _negate(value: object, line: int) -> object:
+    if not isinstance(value, numbers.Real):
+        raise PloxRuntimeException(None, "Operand must be a number", line)
+    return -value
+
+
+_BINARY = {
+    TokenType.MINUS: ("-", "_sub"),
+    TokenType.STAR: ("*", "_mul"),
+    TokenType.SLASH: ("/", "_div"),
+    TokenType.GREATER: (">", "_gt"),
+    TokenType.GREATER_EQUAL: (">=", "_ge"),
+    TokenType.LESS: ("<", "_lt"),
+    TokenType.LESS_EQUAL: ("<=", "_le"),
+    TokenType.PLUS: ("+", "_add"),
+}
+
+
+class Transpiler:
+    """Translates a resolved program to the source of a Python function.
+
+    Lox functions become nested Python functions. Locals are Python locals
+    named after their slots, and captured ones hold a Cell, passed on to the
+    functions that capture it as keyword defaults, so they are bound when
+    the function is created just like the other engines' upvalues. Classes
+    and instances stay LoxClass and LoxInstance, with the methods being
+    PythonFunctions. Operators test for floats inline and leave everything
+    else to helpers with Interpreter's checks and error messages.
+
+    Values the source can't spell, like tokens, strings (which must stay
+    interned) and the cells of `resolved`'s globals, are named in
+    `constants`, which the code runs with.
+    """
+    PROGRAM = "__program__"
+
+    def __init__(self, resolved: Interpreter) -> None:
+        self.locals = resolved.locals
+        self.declarations = resolved.declarations
+        self.implicit = resolved.implicit
+        self.frames = resolved.frames
+        self.globals = resolved.globals
+        self.pure = resolved.pure
+        self.lines: list[str] = []
+        self.indent = 0
+        self.constants: dict[str, object] = {}
+        self.__constant_names: dict[tuple[type, object], str] = {}
+        self.__temporaries = 0
+        self.__functions = 0
+
+    def transpile(self, statements: list[Stmt]) -> str:
+        self.lines = [f"def {self.PROGRAM}():"]
+        self.__block(statements)
+        return "\n".join(self.lines) + "\n"
+
+    def visit_statement(self, statement: Stmt) -> None:
+        match statement:
+            case Block(statements):
+                for inner in statements:
+                    self.visit_statement(inner)
+            case Expression(Assign(name, value) as assign):
+                self.__assign_statement(assign, name, value)
+            case Expression(expression):
+                self.__emit(self.visit_expr(expression))
+            case Print(expression):
+                self.__emit(f"_print(_stringify({self.visit_expr(expression)}))")
+            case Return(_, value):
+                self.__emit(f"return {self.visit_expr(value) if value else 'None'}")
+            case Var(name, initializer):
+                self.__define(statement, name, self.visit_expr(initializer) if initializer else "None")
+            case Function(name, _, _) as fn:
+                self.__declare(fn, name, lambda: self.__function(fn))
+            case If(condition, then_branch, else_branch):
+                self.__emit(f"if {self.visit_expr(condition)}:")
+                self.__block([then_branch])
+                if else_branch:
+                    self.__emit("else:")
+                    self.__block([else_branch])
+            case While(condition, body):
+                self.__emit(f"while {self.visit_expr(condition)}:")
+                self.__block([body])
+            case Class(name, _, _) as klass:
+                self.__declare(klass, name, lambda: self.__class(klass))
+            case _:
+                raise Exception(f"Unexpected statement {statement}")
+
+    def visit_expr(self, expr: Expr) -> str:
+        match expr:
+            case Binary(left, op, right):
+                left_value, right_value = self.visit_expr(left), self.visit_expr(right)
+                if op.token_type in (TokenType.EQUAL_EQUAL, TokenType.BANG_EQUAL):
+                    equal = f"_is_equal({left_value}, {right_value})"
+                    return equal if op.token_type == TokenType.EQUAL_EQUAL else f"(not {equal})"
+                symbol, slow_path = _BINARY[op.token_type]
+                l, r = self.__temporary(), self.__temporary()
+                return (f"({l} {symbol} {r} if (type({l} := {left_value}) is float) & "
+                        f"(type({r} := {right_value}) is float) else {slow_path}({l}, {r}, {op.line}))")
+            case Call(callee, paren, arguments):
+                # Picks what to call before the arguments are evaluated, so
+                # each appears once; anything but a PythonFunction or native
+                # taking them directly is checked, and reported, by _calling.
+                function = self.__temporary()
+                evaluated = ", ".join(self.visit_expr(argument) for argument in arguments)
+                return (f"({function}.bound if type({function} := {self.visit_expr(callee)}) is _PythonFunction "
+                        f"and {function}.direct == {len(arguments)} else {function}.function "
+                        f"if type({function}) is _NativeFunction and {function}.parameters == {len(arguments)} "
+                        f"else _calling({function}, {paren.line}))"
+                        f"({evaluated})")
+            case Get(obj, name):
+                # Native instances, like arrays, subclass LoxInstance; plain
+                # ones pass the cheaper test.
+                instance = self.__temporary()
+                return (f"({instance}.get({self.__constant(name)}) if type({instance} := {self.visit_expr(obj)}) "
+                        f"is _LoxInstance or isinstance({instance}, _LoxInstance) "
+                        f"else _not_instance({self.__constant(name)}, 'Only instances have properties'))")
+            case Grouping(expression):
+                return self.visit_expr(expression)
+            case Literal(value):
+                if value is None or isinstance(value, bool) or isinstance(value, float) and math.isfinite(value):
+                    return repr(value)
+                return self.__constant(value)
+            case Unary(op, right):
+                if op.token_type == TokenType.BANG:
+                    return f"(not {self.visit_expr(right)})"
+                value = self.__temporary()
+                return (f"(-{value} if type({value} := {self.visit_expr(right)}) is float "
+                        f"else _negate({value}, {op.line}))")
+            case Variable(name) | This(name):
+                return self.__load(self.locals.get(expr), name)
+            case Assign(name, value):
+                return self.__assign(self.locals.get(expr), name, self.visit_expr(value))
+            case Logical(left, op, right):
+                python_keyword = "or" if op.token_type == TokenType.OR else "and"
+                return f"({self.visit_expr(left)} {python_keyword} {self.visit_expr(right)})"
+            case Set(obj, name, value):
+                # Like Interpreter, the value isn't evaluated for a non-instance.
+                instance = self.__temporary()
+                return (f"({instance}.set({self.__constant(name)}, {self.visit_expr(value)}) "
+                        f"if type({instance} := {self.visit_expr(obj)}) is _LoxInstance "
+                        f"or isinstance({instance}, _LoxInstance) "
+                        f"else _not_instance({self.__constant(name)}, 'Only instances have fields.'))")
+            case Super(keyword, method):
+                return (f"_super({self.__load(self.locals[expr], keyword)}, "
+                        f"{self.__load(self.implicit[expr], keyword)}, {self.__constant(method.lexeme)}, "
+                        f"{keyword.line})")
+        raise Exception(f"Unexpected expr {expr}")
+
+    def __emit(self, line: str) -> None:
+        self.lines.append("    " * self.indent + line)
+
+    def __block(self, statements: list[Stmt]) -> None:
+        self.indent += 1
+        start = len(self.lines)
+        for statement in statements:
+            self.visit_statement(statement)
+        if len(self.lines) == start:
+            self.__emit("pass")
+        self.indent -= 1
+
+    def __temporary(self) -> str:
+        self.__temporaries += 1
+        return f"_t{self.__temporaries}"
+
+    def __constant(self, value: object) -> str:
+        key = (type(value), value)
+        name = self.__constant_names.get(key)
+        if not name:
+            name = self.__constant_names[key] = f"_k{len(self.constants)}"
+            self.constants[name] = value
+        return name
+
+    def __object(self, value: object) -> str:
+        """A name for an unhashable or identity-compared constant."""
+        name = f"_k{len(self.constants)}"
+        self.constants[name] = value
+        return name
+
+    def __global_cell(self, name: Token) -> str:
+        """The constant holding the cell of the global `name`, which is the
+        global's for good, so it's looked up just once, here."""
+        return self.__constant(self.globals.cell(name.lexeme))
+
+    def __load(self, access: Optional[list[int]], name: Token) -> str:
+        if not access:
+            value = self.__temporary()
+            return (f"({value} if ({value} := {self.__global_cell(name)}.value) is not _UNDEFINED "
+                    f"else _undefined({self.__constant(name)}))")
+        kind, index = access
+        if kind == LOCAL:
+            return f"s{index}"
+        if kind == CELL:
+            return f"s{index}.value"
+        return f"u{index}.value"
+
+    def __assign(self, access: Optional[list[int]], name: Token, value: str) -> str:
+        if not access:
+            return f"_assign_global({self.__global_cell(name)}, {self.__constant(name)}, {value})"
+        kind, index = access
+        if kind == LOCAL:
+            return f"(s{index} := {value})"
+        return f"_store({'s' if kind == CELL else 'u'}{index}, {value})"
+
+    def __assign_statement(self, assign: Assign, name: Token, value: Expr) -> None:
+        """An assignment whose value isn't used, as a Python statement."""
+        access = self.locals.get(assign)
+        evaluated = self.visit_expr(value)
+        if not access:
+            self.__emit(self.__assign(access, name, evaluated))
+            return
+        kind, index = access
+        if kind == LOCAL:
+            self.__emit(f"s{index} = {evaluated}")
+        else:
+            self.__emit(f"{'s' if kind == CELL else 'u'}{index}.value = {evaluated}")
+
+    def __define(self, declaration: Stmt, name: Token, value: str) -> None:
+        access = self.declarations.get(declaration)
+        if not access:
+            self.__emit(f"{self.__global_cell(name)}.value = {value}")
+        elif access[0] == CELL:
+            # A new cell every time, so each pass through a loop body gets
+            # variables of its own.
+            self.__emit(f"s{access[1]} = _Cell({value})")
+        else:
+            self.__emit(f"s{access[1]} = {value}")
+
+    def __declare(self, declaration: Stmt, name: Token, create: Callable[[], str]) -> None:
+        """Declare the function or class `create` emits the code for, giving
+        a captured one its cell first so that it can capture itself."""
+        access = self.declarations.get(declaration)
+        if access and access[0] == CELL:
+            self.__emit(f"s{access[1]} = _Cell(None)")
+            self.__emit(f"s{access[1]}.value = {create()}")
+        else:
+            self.__define(declaration, name, create())
+
+    def __function(self, declaration: Function, is_method: bool = False, is_initializer: bool = False) -> str:
+        """Emit the Python function for `declaration` and return an
+        expression creating its PythonFunction."""
+        layout = self.frames[declaration]
+        _, boxed, upvalues = layout
+        # A method's receiver comes first, as in the Resolver's layout.
+        first = 1 if is_method else 0
+        parameters = ["s0"] * first + [f"s{index + first}" for index in range(len(declaration.params))]
+        captured = [f"s{index}" if in_frame else f"u{index}" for in_frame, index in upvalues]
+        if captured:
+            parameters += ["*"] + [f"u{index}={cell}" for index, cell in enumerate(captured)]
+        self.__functions += 1
+        name = f"_{declaration.name.lexeme}_{self.__functions}"
+        self.__emit(f"def {name}({', '.join(parameters)}):")
+        self.indent += 1
+        for slot in boxed:
+            self.__emit(f"s{slot} = _Cell(s{slot})")
+        self.indent -= 1
+        self.__block(declaration.body)
+        function = (f"_PythonFunction({name}, {self.__object(declaration)}, {self.__object(layout)}, "
+                    f"[{', '.join(captured)}], {is_initializer})")
+        return f"_memoized({function})" if declaration in self.pure else function
+
+    def __class(self, klass: Class) -> str:
+        superclass = "None"
+        if klass.superclass:
+            superclass = self.__temporary()
+            self.__emit(f"{superclass} = _superclass({self.visit_expr(klass.superclass)}, "
+                        f"{self.__constant(klass.superclass.name)})")
+            kind, slot = self.implicit[klass]
+            self.__emit(f"s{slot} = _Cell({superclass})" if kind == CELL else f"s{slot} = {superclass}")
+        methods = ", ".join(
+            f"{self.__constant(method.name.lexeme)}: {self.__function(method, True, method.name.lexeme == 'init')}"
+            for method in klass.methods)
+        return f"_LoxClass({self.__constant(klass.name.lexeme)}, {superclass}, {{{methods}}})"
+
+
+@functools.lru_cache(maxsize=64)
+def _compile(source: str) -> CodeType:
+    return compile(source, "<lox>", "exec")
+
+
+class PythonInterpreter(Interpreter):
+    """Runs programs by transpiling them to Python and letting CPython
+    compile and run that.
+
+    Code objects are cached by their source, so running the same program
+    again skips Python's compiler. A program beyond what the compiler
+    accepts, such as loops nested too deeply, is interpreted instead.
+    """
+    def interpret(self, statements: list[Stmt]) -> None:
+        transpiler = Transpiler(self)
+        try:
+            code = _compile(transpiler.transpile(statements))
+        except (SyntaxError, RecursionError, MemoryError):
+            super().interpret(statements)
+            return
+        namespace = self.__runtime()
+        namespace.update(transpiler.constants)
+        exec(code, namespace)
+        try:
+            namespace[Transpiler.PROGRAM]()
+        except PloxRuntimeException as pre:
+            from .plox import error
+            error(pre.line, pre.message)
+
+    def __runtime(self) -> dict[str, Any]:
+        """What the transpiled code refers to, besides its constants."""
+        def call(callee: object, line: int, *arguments: object) -> object:
+            if isinstance(callee, LoxCallable):
+                if len(arguments) != callee.arity():
+                    raise PloxRuntimeException(None, f"Expected {callee.arity()} arguments but got {len(arguments)}.",
+                                               line)
+                return callee.call(self, list(arguments))
+            raise PloxRuntimeException(None, f"Can't call {callee}. Can only call functions and classes.", line)
+
+        def undefined(name: Token) -> object:
+            raise PloxRuntimeException(name, f"Undefined variable {name.lexeme}.")
+
+        def assign_global(cell: Cell, name: Token, value: object) -> object:
+            if cell.value is UNDEFINED:
+                raise PloxRuntimeException(name, f"Undefined variable '{name.lexeme}'")
+            cell.value = value
+            return value
+
+        return {
+            "_UNDEFINED": UNDEFINED,
+            "_print": self.output.append if self.capture_output else print,
+            "_stringify": stringify,
+            "_is_equal": is_equal,
+            "_Cell": Cell,
+            "_PythonFunction": PythonFunction,
+            "_NativeFunction": NativeFunction,
+            "_memoized": self.memoized,
+            "_LoxClass": LoxClass,
+            "_LoxInstance": LoxInstance,
+            "_add": _add,
+            "_sub": _arithmetic(operator.sub),
+            "_mul": _arithmetic(operator.mul),
+            "_div": _arithmetic(operator.truediv),
+            "_gt": _arithmetic(operator.gt),
+            "_ge": _arithmetic(operator.ge),
+            "_lt": _arithmetic(operator.lt),
+            "_le": _arithmetic(operator.le),
+            "_negate": _negate,
+            "_calling": lambda callee, line: functools.partial(call, callee, line),
+            "_undefined": undefined,
+            "_assign_global": assign_global,
+            "_store": _store,
+            "_not_instance": _not_instance,
+            "_superclass": _superclass,
+            "_super": _super,
+        }
+
+
+def _store(cell: Cell, value: object) -> object:
+    cell.value = value
+    return value
+
+
+def _not_instance(name: Token, message: str) -> object:
+    raise PloxRuntimeException(name, message)
+
+
+def _superclass(superclass: object, name: Token) -> LoxClass:
+    if not isinstance(superclass, LoxClass):
+        raise PloxRuntimeException(name, "Superclass not a class")
+    return superclass
+
+
+def _super(superclass: LoxClass, instance: LoxInstance, name: str, line: int) -> object:
+    method = superclass.find_method(name)
+    if not method:
+        raise PloxRuntimeException(None, "Couldn't find super method?", line)
+    return method.bind(instance)
@@ -0,0 +1,395 @@
+import logging
+import numbers
+from sys import intern
+from typing import Any, Optional
+
+from .chunk import Chunk, OpCode, Prototype, disassemble
+from .compiler import Compiler
+from .environment import UNDEFINED, Cell
+from .interpreter import Interpreter, is_equal, stringify
+from .lox_callable import LoxCallable, LoxFunction
+from .memo import MISSING, arguments_key
+from .lox_class import LoxClass, LoxInstance
+from .natives import NativeFunction
+from .runtime_exception import PloxRuntimeException
+from .stmt import Stmt
+
+# Plain ints, which compare faster than the OpCode members in the dispatch loop.
+CONSTANT, POP = int(OpCode.CONSTANT), int(OpCode.POP)
+GET_LOCAL, SET_LOCAL, DEFINE_LOCAL = int(OpCode.GET_LOCAL), int(OpCode.SET_LOCAL), int(OpCode.DEFINE_LOCAL)
+GET_CELL, SET_CELL, DEFINE_CELL = int(OpCode.GET_CELL), int(OpCode.SET_CELL), int(OpCode.DEFINE_CELL)
+NEW_CELL, GET_UPVALUE, SET_UPVALUE = int(OpCode.NEW_CELL), int(OpCode.GET_UPVALUE), int(OpCode.SET_UPVALUE)
+GET_GLOBAL, SET_GLOBAL, DEFINE_GLOBAL = int(OpCode.GET_GLOBAL), int(OpCode.SET_GLOBAL), int(OpCode.DEFINE_GLOBAL)
+GET_PROPERTY, CHECK_INSTANCE = int(OpCode.GET_PROPERTY), int(OpCode.CHECK_INSTANCE)
+SET_PROPERTY, GET_SUPER = int(OpCode.SET_PROPERTY), int(OpCode.GET_SUPER)
+EQUAL, NOT_EQUAL = int(OpCode.EQUAL), int(OpCode.NOT_EQUAL)
+GREATER, GREATER_EQUAL = int(OpCode.GREATER), int(OpCode.GREATER_EQUAL)
+LESS, LESS_EQUAL = int(OpCode.LESS), int(OpCode.LESS_EQUAL)
+ADD, SUBTRACT, MULTIPLY, DIVIDE = int(OpCode.ADD), int(OpCode.SUBTRACT), int(OpCode.MULTIPLY), int(OpCode.DIVIDE)
+NOT, NEGATE, PRINT = int(OpCode.NOT), int(OpCode.NEGATE), int(OpCode.PRINT)
+JUMP, JUMP_IF_FALSE, JUMP_IF_TRUE = int(OpCode.JUMP), int(OpCode.JUMP_IF_FALSE), int(OpCode.JUMP_IF_TRUE)
+POP_JUMP_IF_FALSE = int(OpCode.POP_JUMP_IF_FALSE)
+CALL, CLOSURE, INHERIT, CLASS, RETURN = \
+    int(OpCode.CALL), int(OpCode.CLOSURE), int(OpCode.INHERIT), int(OpCode.CLASS), int(OpCode.RETURN)
+
+
+class VMFunction(LoxFunction):
+    """A closure over a compiled Prototype."""
+    def __init__(self, prototype: Prototype, upvalues: list[Cell], receiver: Optional[object] = None):
+        assert prototype.declaration
+        super().__init__(prototype.declaration, prototype.layout, upvalues, prototype.is_initializer, receiver)
+        self.prototype = prototype
+
+    def bind(self, instance: object) -> 'VMFunction':
+        return VMFunction(self.prototype, self.upvalues, instance)
+
+    def call(self, interpreter: Interpreter, arguments: list[object]) -> object:
+        assert isinstance(interpreter, VM)
+        return interpreter.run(self.prototype, _frame(self, arguments), self.upvalues, self)
+
+
+def _frame(function: VMFunction, arguments: list[object]) -> list[object]:
+    size, boxed, _ = function.layout
+    if function.receiver is None:
+        frame = arguments + [None] * (size - len(arguments))
+    else:
+        frame = [function.receiver, *arguments] + [None] * (size - 1 - len(arguments))
+    for slot in boxed:
+        frame[slot] = Cell(frame[slot])
+    return frame
+
+
+DEFAULT_MAX_DEPTH = 100_000
+
+
+class VM(Interpreter):
+    """Compiles programs to bytecode and runs them on a stack machine.
+
+    Lox calls push a frame onto a list rather than recursing in Python, so
+    recursion isn't limited by Python's stack: calls nesting deeper than
+    `max_depth` are a "Stack overflow" runtime error instead. The results,
+    output and errors are otherwise the same as Interpreter's, which
+    provides the resolver's side tables, the globals and output handling.
+    With debug logging on, each program's disassembly is logged before it
+    runs.
+    """
+    def __init__(self, capture_output=False, max_depth: int = DEFAULT_MAX_DEPTH):
+        super().__init__(capture_output)
+        self.max_depth = max_depth
+        # How many calls are running in the run()s that called out to the
+        # one running now, so calls re-entering run() count towards
+        # max_depth too.
+        self.depth = 0
+
+    def interpret(self, statements: list[Stmt]) -> None:
+        script = Compiler(self).compile(statements)
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("%s", disassemble(script))
+        try:
+            self.run(script, [None] * script.layout[0], [], None)
+        except PloxRuntimeException as pre:
+            from .plox import error
+            error(pre.line, pre.message)
+
+    def run(self, prototype: Prototype, slots: list[Any], upvalues: list[Cell],
+            function: Optional[VMFunction]) -> object:
+        """Run `prototype` in `slots` until it returns, and return the result."""
+        chunk = prototype.chunk
+        code = chunk.code
+        constants = chunk.constants
+        max_depth = self.max_depth
+        depth = self.depth
+        # Each instruction knows the types of the values it pops, as it does
+        # its constants' and its slots'.
+        stack: list[Any] = []
+        push = stack.append
+        pop = stack.pop
+        # The callers' (function, chunk, slots, upvalues, ip, memo_key) while
+        # a Lox call runs.
+        frames: list[tuple] = []
+        # What to remember the running function's result under in its
+        # Memo, if it's memoized.
+        memo_key: Optional[tuple] = None
+        ip = 0
+        while True:
+            op = code[ip]
+            if op == GET_LOCAL:
+                push(slots[code[ip + 1]])
+                ip += 2
+            elif op == CONSTANT:
+                push(constants[code[ip + 1]])
+                ip += 2
+            elif op == GET_GLOBAL:
+                value = constants[code[ip + 2]].value
+                if value is UNDEFINED:
+                    name = constants[code[ip + 1]]
+                    raise PloxRuntimeException(name, f"Undefined variable {name.lexeme}.")
+                push(value)
+                ip += 3
+            elif op == POP_JUMP_IF_FALSE:
+                ip = ip + 2 if pop() else code[ip + 1]
+            elif op == JUMP:
+                ip = code[ip + 1]
+            elif op == LESS:
+                right = pop()
+                left = stack[-1]
+                if type(left) is not float or type(right) is not float:
+                    self.__check_numbers(chunk, ip, left, right)
+                stack[-1] = left < right
+                ip += 1
+            elif op == ADD:
+                right = pop()
+                left = stack[-1]
+                if type(left) is float and type(right) is float:
+                    stack[-1] = left + right
+                elif isinstance(left, str) and isinstance(right, str):
+                    stack[-1] = intern(left + right)
+                elif isinstance(left, numbers.Real) and isinstance(right, numbers.Real):
+                    stack[-1] = left + right
+                else:
+                    raise self.__error(chunk, ip, "Can only combine numbers or strings")
+                ip += 1
+            elif op == SUBTRACT:
+                right = pop()
+                left = stack[-1]
+                if type(left) is not float or type(right) is not float:
+                    self.__check_numbers(chunk, ip, left, right)
+                stack[-1] = left - right
+                ip += 1
+            elif op == SET_LOCAL:
+                slots[code[ip + 1]] = stack[-1]
+                ip += 2
+            elif op == DEFINE_LOCAL:
+                slots[code[ip + 1]] = pop()
+                ip += 2
+            elif op == POP:
+                pop()
+                ip += 1
+            elif op == CALL:
+                argument_count = code[ip + 1]
+                ip += 2
+                callee = stack[-1 - argument_count]
+                if isinstance(callee, LoxCallable):
+                    if argument_count != callee.arity():
+                        raise self.__error(chunk, ip - 2,
+                                           f"Expected {callee.arity()} arguments but got {argument_count}.")
+                    arguments = stack[len(stack) - argument_count:]
+                    del stack[len(stack) - 1 - argument_count:]
+                    if isinstance(callee, LoxClass):
+                        instance = LoxInstance(callee)
+                        initializer = callee.initializer
+                        if not isinstance(initializer, VMFunction):
+                            if initializer:
+                                self.__call_out(initializer.bind(instance), arguments, depth + len(frames), chunk, ip)
+                            push(instance)
+                            continue
+                        callee = initializer.bind(instance)
+                    if isinstance(callee, VMFunction):
+                        memo = callee.memo
+                        key = None
+                        if memo is not None:
+                            key = arguments_key(arguments)
+                            result = memo.get(key)
+                            if result is not MISSING:
+                                push(result)
+                                continue
+                        if depth + len(frames) >= max_depth:
+                            raise self.__error(chunk, ip - 2, "Stack overflow")
+                        frames.append((function, chunk, slots, upvalues, ip, memo_key))
+                        memo_key = key
+                        function = callee
+                        chunk = callee.prototype.chunk
+                        code = chunk.code
+                        constants = chunk.constants
+                        slots = _frame(callee, arguments)
+                        upvalues = callee.upvalues
+                        ip = 0
+                    elif type(callee) is NativeFunction:
+                        push(callee.function(*arguments))
+                    else:
+                        push(self.__call_out(callee, arguments, depth + len(frames), chunk, ip))
+                else:
+                    raise self.__error(chunk, ip - 2,
+                                       f"Can't call {callee}. Can only call functions and classes.")
+            elif op == RETURN:
+                result = pop()
+                if function and function.is_initializer:
+                    result = function.receiver
+                if not frames:
+                    return result
+                if memo_key is not None:
+                    assert function is not None and function.memo is not None
+                    function.memo.put(memo_key, result)
+                function, chunk, slots, upvalues, ip, memo_key = frames.pop()
+                code = chunk.code
+                constants = chunk.constants
+                push(result)
+            elif op == GET_CELL:
+                push(slots[code[ip + 1]].value)
+                ip += 2
+            elif op == GET_UPVALUE:
+                push(upvalues[code[ip + 1]].value)
+                ip += 2
+            elif op == GET_PROPERTY:
+                instance = stack[-1]
+                name = constants[code[ip + 1]]
+                if not isinstance(instance, LoxInstance):
+                    raise PloxRuntimeException(name, "Only instances have properties")
+                shape = instance.shape
+                slot = shape.slots.get(name.lexeme) if shape is not None else None
+                stack[-1] = instance.values[slot] if slot is not None else instance.get(name)
+                ip += 2
+            elif op == CHECK_INSTANCE:
+                if not isinstance(stack[-1], LoxInstance):
+                    raise PloxRuntimeException(constants[code[ip + 1]], "Only instances have fields.")
+                ip += 2
+            elif op == SET_PROPERTY:
+                value = pop()
+                instance = stack[-1]
+                assert isinstance(instance, LoxInstance)
+                name = constants[code[ip + 1]]
+                shape = instance.shape
+                slot = shape.slots.get(name.lexeme) if shape is not None else None
+                if slot is not None:
+                    instance.values[slot] = value
+                else:
+                    instance.set(name, value)
+                stack[-1] = None
+                ip += 2
+            elif op == MULTIPLY:
+                right = pop()
+                left = stack[-1]
+                if type(left) is not float or type(right) is not float:
+                    self.__check_numbers(chunk, ip, left, right)
+                stack[-1] = left * right
+                ip += 1
+            elif op == DIVIDE:
+                right = pop()
+                left = stack[-1]
+                if type(left) is not float or type(right) is not float:
+                    self.__check_numbers(chunk, ip, left, right)
+                stack[-1] = left / right
+                ip += 1
+            elif op == LESS_EQUAL:
+                right = pop()
+                left = stack[-1]
+                if type(left) is not float or type(right) is not float:
+                    self.__check_numbers(chunk, ip, left, right)
+                stack[-1] = left <= right
+                ip += 1
+            elif op == GREATER:
+                right = pop()
+                left = stack[-1]
+                if type(left) is not float or type(right) is not float:
+                    self.__check_numbers(chunk, ip, left, right)
+                stack[-1] = left > right
+                ip += 1
+            elif op == GREATER_EQUAL:
+                right = pop()
+                left = stack[-1]
+                if type(left) is not float or type(right) is not float:
+                    self.__check_numbers(chunk, ip, left, right)
+                stack[-1] = left >= right
+                ip += 1
+            elif op == EQUAL:
+                right = pop()
+                stack[-1] = is_equal(stack[-1], right)
+                ip += 1
+            elif op == NOT_EQUAL:
+                right = pop()
+                stack[-1] = not is_equal(stack[-1], right)
+                ip += 1
+            elif op == NOT:
+                stack[-1] = not stack[-1]
+                ip += 1
+            elif op == NEGATE:
+                value = stack[-1]
+                if type(value) is not float and not isinstance(value, numbers.Real):
+                    raise self.__error(chunk, ip, "Operand must be a number")
+                stack[-1] = -value
+                ip += 1
+            elif op == JUMP_IF_FALSE:
+                ip = ip + 2 if stack[-1] else code[ip + 1]
+            elif op == JUMP_IF_TRUE:
+                ip = code[ip + 1] if stack[-1] else ip + 2
+            elif op == SET_CELL:
+                slots[code[ip + 1]].value = stack[-1]
+                ip += 2
+            elif op == DEFINE_CELL:
+                # A new cell every time, so each pass through a loop body
+                # gets variables of its own.
+                slots[code[ip + 1]] = Cell(pop())
+                ip += 2
+            elif op == NEW_CELL:
+                slots[code[ip + 1]] = Cell(None)
+                ip += 2
+            elif op == SET_UPVALUE:
+                upvalues[code[ip + 1]].value = stack[-1]
+                ip += 2
+            elif op == SET_GLOBAL:
+                cell = constants[code[ip + 2]]
+                if cell.value is UNDEFINED:
+                    name = constants[code[ip + 1]]
+                    raise PloxRuntimeException(name, f"Undefined variable '{name.lexeme}'")
+                cell.value = stack[-1]
+                ip += 3
+            elif op == DEFINE_GLOBAL:
+                constants[code[ip + 2]].value = pop()
+                ip += 3
+            elif op == PRINT:
+                string = stringify(pop())
+                if self.capture_output:
+                    self.output.append(string)
+                else:
+                    print(string)
+                ip += 1
+            elif op == CLOSURE:
+                prototype = constants[code[ip + 1]]
+                captured = [slots[index] if in_frame else upvalues[index]
+                            for in_frame, index in prototype.layout[2]]
+                push(self.memoized(VMFunction(prototype, captured)))
+                ip += 2
+            elif op == GET_SUPER:
+                instance = pop()
+                superclass = pop()
+                assert isinstance(superclass, LoxClass) and isinstance(instance, LoxInstance)
+                method = superclass.find_method(constants[code[ip + 1]])
+                if not method:
+                    raise self.__error(chunk, ip, "Couldn't find super method?")
+                push(method.bind(instance))
+                ip += 2
+            elif op == INHERIT:
+                if not isinstance(stack[-1], LoxClass):
+                    raise self.__error(chunk, ip, "Superclass not a class")
+                ip += 1
+            elif op == CLASS:
+                method_count = code[ip + 2]
+                methods = {}
+                if method_count:
+                    for closure in stack[len(stack) - method_count:]:
+                        methods[closure.prototype.name] = closure
+                    del stack[len(stack) - method_count:]
+                superclass = pop() if code[ip + 3] else None
+                push(LoxClass(constants[code[ip + 1]], superclass, methods))
+                ip += 4
+            else:
+                raise Exception(f"Unexpected opcode {op} at {ip}")
+
+    def __check_numbers(self, chunk: Chunk, ip: int, left: object, right: object) -> None:
+        if not (isinstance(left, numbers.Real) and isinstance(right, numbers.Real)):
+            raise self.__error(chunk, ip, "Operands must be numbers")
+
+    def __call_out(self, callee: LoxCallable, arguments: list[object], depth: int, chunk: Chunk, ip: int) -> object:
+        """Call `callee` the way it calls itself, from `depth` calls deep."""
+        if depth >= self.max_depth:
+            raise self.__error(chunk, ip - 2, "Stack overflow")
+        enclosing = self.depth
+        self.depth = depth + 1
+        try:
+            return callee.call(self, arguments)
+        finally:
+            self.depth = enclosing
+
+    @staticmethod
+    def __error(chunk: Chunk, ip: int, message: str) -> PloxRuntimeException:
+        return PloxRuntimeException(None, message, chunk.line(ip))
@@ -0,0 +1,41 @@
+from typing import Optional, Sequence
+
+import pytest
+
+from plox import plox
+from plox.interpreter import Interpreter
+from plox.parser import Parser
+from plox.plox import ENGINES
+from plox.resolver import Resolver
+from plox.scanner import FastScanner
+from plox.stmt import Stmt
+
+
+@pytest.fixture(autouse=True)
+def reset_had_error():
+    plox.had_error = False
+    yield
+    plox.had_error = False
+
+
+def resolve(source: str, engine: str = "tree", modules: Sequence[str] = (), memo_size: Optional[int] = None,
+            **options) -> tuple[Interpreter, list[Stmt]]:
+    """`source`'s statements, resolved for a new `engine` interpreter that
+    captures its output, with `modules` loaded and, like LoxRunner, pure
+    functions memoized if there is a `memo_size`."""
+    statements = Parser(FastScanner(source).scan_buffer()).parse()
+    interp = ENGINES[engine](capture_output=True, **options)
+    for module in modules:
+        interp.load(module)
+    if memo_size:
+        interp.memo_size = memo_size
+    Resolver(interp, bool(memo_size)).resolve(statements)
+    return interp, statements
+
+
+def run(source: str, engine: str = "tree", modules: Sequence[str] = (), memo_size: Optional[int] = None,
+        **options) -> Interpreter:
+    """The interpreter that ran `source`, set up as by resolve()."""
+    interp, statements = resolve(source, engine, modules, memo_size, **options)
+    interp.interpret(statements)
+    return interp
@@ -0,0 +1,55 @@
+import os
+
+from plox.cache import CompilationCache
+from plox.plox import LoxRunner
+
+SCRIPT = """
+fun add(a, b) {
+    var sum = a + b;
+    return sum;
+}
+{
+    var local = 2;
+    print add(local, 3);
+}
+"""
+
+
+def test_warm_run_matches_cold_run(tmp_path, capsys):
+    LoxRunner(str(tmp_path)).run(SCRIPT)
+    cold = capsys.readouterr().out
+    assert len(os.listdir(tmp_path)) == 1
+
+    assert CompilationCache(str(tmp_path)).load(SCRIPT) is not None
+    LoxRunner(str(tmp_path)).run(SCRIPT)
+    assert capsys.readouterr().out == cold == "5.0\n"
+
+
+def test_programs_with_errors_are_not_cached(tmp_path, capsys):
+    LoxRunner(str(tmp_path)).run("return 1;")
+    assert "Can't return from top-level code." in capsys.readouterr().out
+    assert not tmp_path.exists() or not os.listdir(tmp_path)
+
+
+def test_corrupt_entry_is_a_miss(tmp_path, capsys):
+    cache = CompilationCache(str(tmp_path))
+    LoxRunner(str(tmp_path)).run(SCRIPT)
+    (entry,) = tmp_path.iterdir()
+    entry.write_bytes(entry.read_bytes()[:20])
+    assert cache.load(SCRIPT) is None
+
+    LoxRunner(str(tmp_path)).run(SCRIPT)
+    assert cache.load(SCRIPT) is not None
+    assert capsys.readouterr().out == "5.0\n5.0\n"
+
+
+def test_key_depends_on_source(tmp_path):
+    cache = CompilationCache(str(tmp_path))
+    assert cache.key("print 1;") != cache.key("print 2;")
+
+
+def test_cached_strings_stay_interned(tmp_path, capsys):
+    script = 'var s = "ab"; print "a" + "b" == s;'
+    LoxRunner(str(tmp_path)).run(script)
+    LoxRunner(str(tmp_path)).run(script)
+    assert capsys.readouterr().out == "True\nTrue\n"
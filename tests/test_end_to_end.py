@@ -1,8 +1,23 @@
-from plox.interpreter import Interpreter
+import io
+
+import pytest
+
+from plox.plox import ENGINES, LoxRunner
 from plox.scanner import Scanner
 from plox.parser import Parser
 from plox.resolver import Resolver
 
+Interpreter = ENGINES["tree"]
+
+
+@pytest.fixture(autouse=True, params=ENGINES)
+def engine(request):
+    """Runs every test against each engine."""
+    global Interpreter
+    Interpreter = ENGINES[request.param]
+    yield request.param
+    Interpreter = ENGINES["tree"]
+
 def __run_script(contents: str) -> list[str]:
     sc = Scanner(contents)
     tokens = sc.scan_tokens()
@@ -91,3 +106,197 @@ def test_superclass():
         BostonCream().cook();
     """
     assert __run_script(script) == ["Fry until golden brown.", "Pipe full of custard and coat with chocolate."]
+
+def test_stream(capsys, engine):
+    script = """
+        fun greet(name) {
+            print "Hello " + name;
+        }
+        greet("stream");
+        var i = 0;
+        while (i < 2) {
+            print i;
+            i = i + 1;
+        }
+    """
+    LoxRunner(engine=engine).run_stream(io.StringIO(script))
+    assert capsys.readouterr().out.splitlines() == ["Hello stream", "0.0", "1.0"]
+
+def test_string_equality():
+    script = """
+        var greeting = "hello";
+        print greeting == "hello";
+        print "hel" + "lo" == greeting;
+        print "hello" == "world";
+    """
+    assert __run_script(script) == ["True", "True", "False"]
+
+def test_locals_and_closures():
+    script = """
+        fun makeCounter(start) {
+            var count = start;
+            fun counter() {
+                count = count + 1;
+                return count;
+            }
+            return counter;
+        }
+        var counter = makeCounter(10);
+        counter();
+        print counter();
+        {
+            var a = "outer";
+            {
+                var b = "inner";
+                var c = b + " " + a;
+                var a = c;
+                print a;
+            }
+            class Pair {
+                init(first, second) {
+                    this.first = first;
+                    this.second = second;
+                }
+                sum() {
+                    var total = this.first + this.second;
+                    return total;
+                }
+            }
+            print Pair(1, 2).sum();
+            print a;
+        }
+    """
+    assert __run_script(script) == ["12.0", "inner outer", "3.0", "outer"]
+
+def test_assign_call_to_local():
+    script = """
+        fun twice(n) { return n * 2; }
+        {
+            var total = 0;
+            total = twice(total + 1) + twice(2);
+            print total;
+        }
+    """
+    assert __run_script(script) == ["6.0"]
+
+def test_closures_capture_per_iteration_variables():
+    script = """
+        var first;
+        var second;
+        for (var i = 0; i < 2; i = i + 1) {
+            var j = i;
+            fun f() { return j; }
+            if (first) second = f; else first = f;
+        }
+        print first();
+        print second();
+    """
+    assert __run_script(script) == ["0.0", "1.0"]
+
+def test_super_and_this_in_nested_closure():
+    script = """
+        class A { greet() { return "A"; } }
+        class B < A {
+            greet() {
+                fun inner() { return super.greet() + "B" + this.name; }
+                return inner;
+            }
+        }
+        var b = B();
+        b.name = "!";
+        print b.greet()();
+    """
+    assert __run_script(script) == ["AB!"]
+
+def test_overrides_and_super_across_levels():
+    script = """
+        class A {
+            name() { return "A"; }
+            describe() { return this.name(); }
+        }
+        class B < A { name() { return "B" + super.name(); } }
+        class C < B { name() { return "C" + super.name(); } }
+        class D < C { describe() { return "D:" + super.describe(); } }
+        class E < D { name() { return "E" + super.name(); } }
+        var useB = true;
+        for (var i = 0; i < 4; i = i + 1) {
+            var o = D();
+            if (useB) o = B();
+            print o.name();
+            print o.describe();
+            useB = !useB;
+        }
+        print E().describe();
+    """
+    assert __run_script(script) == ["BA", "BA", "CBA", "D:CBA"] * 2 + ["D:ECBA"]
+
+def test_closure_keeps_only_captured_variables():
+    script = """
+        fun outer(unused) {
+            var big = "not captured";
+            var kept = 1;
+            fun inner() { return kept; }
+            return inner;
+        }
+        var f = outer(0);
+    """
+    statements = Parser(Scanner(script).scan_tokens()).parse()
+    interp = Interpreter(capture_output=True)
+    Resolver(interp).resolve(statements)
+    interp.interpret(statements)
+    closure = interp.globals.values["f"]
+    assert [cell.value for cell in closure.upvalues] == [1.0]
+
+def test_fields_across_shapes():
+    script = """
+        class P {}
+        fun make(xFirst) {
+            var p = P();
+            if (xFirst) { p.x = 1; p.y = 2; } else { p.y = 3; p.x = 4; }
+            return p;
+        }
+        fun sum(p) { return p.x + p.y; }
+        for (var i = 0; i < 4; i = i + 1) {
+            var p = make(i < 2);
+            p.x = p.x * 10;
+            print sum(p);
+        }
+    """
+    assert __run_script(script) == ["12.0", "12.0", "43.0", "43.0"]
+
+def test_many_fields():
+    sets = "".join(f"p.f{i} = {i};" for i in range(100))
+    script = f"""
+        class P {{}}
+        fun get(p) {{ return p.f0 + p.f99; }}
+        for (var i = 0; i < 2; i = i + 1) {{
+            var p = P();
+            {sets}
+            p.f0 = i;
+            print get(p);
+        }}
+    """
+    assert __run_script(script) == ["99.0", "100.0"]
+
+def test_globals_defined_later_and_redefined(capsys, engine):
+    script = """
+        fun early() { return later; }
+        var later = "defined";
+        print early();
+        fun g() { return 1; }
+        fun h() { return g(); }
+        print h();
+        fun g() { return 2; }
+        print h();
+        var later = "again";
+        later = later + "!";
+        print early();
+        print missing;
+    """
+    LoxRunner(engine=engine).run(script)
+    assert capsys.readouterr().out.splitlines() == [
+        "defined", "1.0", "2.0", "again!", "[line 13] Error: Undefined variable missing."]
+
+def test_assigning_undefined_global(capsys, engine):
+    LoxRunner(engine=engine).run("var a; print a; b = a;")
+    assert capsys.readouterr().out.splitlines() == ["nil", "[line 1] Error: Undefined variable 'b'"]
@@ -0,0 +1,56 @@
+import random
+
+import pytest
+
+from plox import plox
+from plox.incremental import IncrementalDocument
+from plox.parser import Parser
+from plox.scanner import FastScanner
+from benchmarks.common import SAMPLE_PROGRAM
+
+
+def full_parse(source: str):
+    with plox.collect_errors() as errors:
+        tokens = FastScanner(source).scan_tokens()
+        statements = Parser(tokens).parse()
+    return tokens, statements, errors
+
+
+def assert_matches_full_parse(doc: IncrementalDocument):
+    tokens, statements, errors = full_parse(doc.source)
+    assert doc.errors() == errors
+    assert doc.tokens() == tokens
+    assert repr(doc.statements()) == repr(statements)
+
+
+@pytest.mark.parametrize("start, end, text", [
+    (0, 0, "var first = 1;\n"),
+    (40, 45, ""),
+    (100, 100, "{"),
+    (100, 100, "}"),
+    (120, 120, "\"open string"),
+    (200, 200, "// "),
+    (300, 301, "@"),
+    (len(SAMPLE_PROGRAM) - 2, len(SAMPLE_PROGRAM), "x"),
+])
+def test_single_edit(start, end, text):
+    doc = IncrementalDocument(SAMPLE_PROGRAM)
+    doc.edit(start, end, text)
+    assert_matches_full_parse(doc)
+
+
+def test_dangling_else():
+    doc = IncrementalDocument("else print 2;\nprint 3;\n")
+    doc.edit(0, 0, "if (true) print 1; ")
+    assert_matches_full_parse(doc)
+
+
+def test_random_edits():
+    rng = random.Random(1234)
+    pieces = ["{", "}", "(", ")", ";", "\"", "\n", " ", "x", "1", ".", "//", "else", "var y = 2;", "fun f() {", "@"]
+    doc = IncrementalDocument(SAMPLE_PROGRAM * 2)
+    for _ in range(200):
+        start = rng.randint(0, len(doc.source))
+        end = min(len(doc.source), start + rng.choice([0, 1, 3, 10]))
+        doc.edit(start, end, "".join(rng.choice(pieces) for _ in range(rng.randint(0, 3))))
+        assert_matches_full_parse(doc)
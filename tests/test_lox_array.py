@@ -0,0 +1,102 @@
+from array import array
+
+import pytest
+
+from plox import plox
+from plox.lox_array import LoxArray
+from plox.plox import ENGINES, LoxRunner
+
+from .conftest import run
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_array_methods(engine):
+    interp = run("""
+        var a = Array();
+        for (var i = 0; i < 5; i = i + 1) a.append(i);
+        a.set(0, 10);
+        print a;
+        print a.length();
+        print a.get(4);
+        print a.slice(1, 3);
+        print a.slice(5, 5);
+        print a.sum();
+        print a.dot(a);
+        print a.map("square").map("sqrt");
+        var get = a.get;
+        print get(0);
+        print Array().sum();
+    """, engine, ["array"])
+    assert interp.output == ["[10.0, 1.0, 2.0, 3.0, 4.0]", "5.0", "4.0", "[1.0, 2.0]", "[]", "20.0", "130.0",
+                             "[10.0, 1.0, 2.0, 3.0, 4.0]", "10.0", "0.0"]
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_mixed_values(engine):
+    interp = run("""
+        var numbers = Array();
+        numbers.append(1);
+        var mixed = numbers.slice(0, 1);
+        var nothing;
+        mixed.append(nothing);
+        mixed.append("two");
+        mixed.set(0, numbers);
+        print mixed;
+        print numbers;
+        var squares = numbers.map("square");
+    """, engine, ["array"])
+    assert interp.output == ["[[1.0], nil, two]", "[1.0]"]
+    arrays = interp.globals.values
+    assert isinstance(arrays["numbers"], LoxArray)
+    assert type(arrays["numbers"].items) is array
+    assert type(arrays["squares"].items) is array
+    assert type(arrays["mixed"].items) is list
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_array_errors(capsys, engine):
+    script = """
+        var a = Array();
+        a.append(1);
+        print a.get(0);
+        {source}
+    """
+    errors = {
+        "a.get(1);": "Index 1.0 is out of bounds for an Array of length 1.",
+        "a.set(0.5, 1);": "Array indexes must be whole numbers.",
+        'a.get("0");': "Array indexes must be whole numbers.",
+        "a.slice(0, 2);": "Index 2.0 is out of bounds for an Array of length 1.",
+        'a.append("x"); a.sum();': "Array's sum() needs numbers.",
+        "a.dot(Array());": "Can only take the dot product of Arrays of the same length.",
+        'a.map("cube");': "Can only map a native function taking 1 argument or one of: "
+                          "abs, negate, sqrt, floor, ceil, square.",
+        'a.map("negate").map("sqrt");': "Can't map sqrt over every item.",
+        "a.size();": "Undefined property 'size'.",
+        "a.size = 1;": "Can't add properties to an Array.",
+        "a.get(0, 1);": "Expected 1 arguments but got 2.",
+    }
+    for source, message in errors.items():
+        plox.had_error = False
+        LoxRunner(engine=engine, modules=["array"]).run(script.replace("{source}", source))
+        assert capsys.readouterr().out.splitlines() == ["1.0", f"[line 5] Error: {message}"], source
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_methods_are_bound_once_per_line(capsys, engine):
+    interp = run("""
+        var a = Array();
+        var seen;
+        for (var i = 0; i < 2; i = i + 1) {
+            var get = a.get;
+            if (i == 1) print get == seen;
+            seen = get;
+        }
+    """, engine, ["array"])
+    assert interp.output == ["True"]
+    LoxRunner(engine=engine, modules=["array"]).run("var a = Array();\na.append(1);\na.get(0);\na.get(1);")
+    assert capsys.readouterr().out == "[line 4] Error: Index 1.0 is out of bounds for an Array of length 1.\n"
+
+
+def test_arrays_are_only_loaded_on_request(capsys):
+    LoxRunner().run("print Array;")
+    assert capsys.readouterr().out.splitlines() == ["[line 1] Error: Undefined variable Array."]
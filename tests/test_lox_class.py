@@ -0,0 +1,30 @@
+from plox.lox_class import LoxClass, LoxInstance, Shape
+from plox.tokens import Token, TokenType
+
+
+def name(lexeme: str) -> Token:
+    return Token(TokenType.IDENTIFIER, lexeme, None, 1, 0)
+
+
+def test_instances_share_shapes():
+    klass = LoxClass("Point", None, {})
+    first, second, swapped = LoxInstance(klass), LoxInstance(klass), LoxInstance(klass)
+    for instance, fields in ((first, "xy"), (second, "xy"), (swapped, "yx")):
+        for field in fields:
+            instance.set(name(field), field)
+    assert first.shape is second.shape
+    assert swapped.shape is not first.shape
+    assert first.values == ["x", "y"]
+    assert swapped.fields == {"y": "y", "x": "x"}
+    assert swapped.get(name("x")) == "x"
+
+
+def test_too_many_fields_fall_back_to_a_dict():
+    instance = LoxInstance(LoxClass("Wide", None, {}))
+    for i in range(Shape.MAX_FIELDS + 1):
+        instance.set(name(f"f{i}"), float(i))
+    assert instance.shape is None
+    instance.set(name("f0"), -1.0)
+    assert instance.get(name("f0")) == -1.0
+    assert instance.get(name(f"f{Shape.MAX_FIELDS}")) == Shape.MAX_FIELDS
+    assert len(instance.fields) == Shape.MAX_FIELDS + 1
@@ -0,0 +1,64 @@
+import pytest
+
+from plox.memo import MISSING, Memo, arguments_key
+from plox.plox import ENGINES
+
+from .conftest import resolve
+
+
+def test_finds_pure_functions():
+    interp, _ = resolve("""
+        var scale = 2;
+        fun fib(n) { if (n < 2) return n; return fib(n - 2) + fib(n - 1); }
+        fun twice(n) { var result = fib(n); result = result * 2; return result; }
+        fun scaled(n) { return n * scale; }
+        fun shout(s) { print s; return s; }
+        fun loud(s) { return shout(s) + "!"; }
+        fun apply(f, x) { return f(x); }
+        fun counter() { var n = 0; fun next() { n = n + 1; return n; } return next; }
+        fun setter(o) { o.x = 1; return o; }
+        fun now() { return clock(); }
+        fun swapped(n) { return n; }
+        fun user(n) { return swapped(n); }
+        swapped = fib;
+        fun twiceDeclared(n) { return n; }
+        fun twiceDeclared(n) { return -n; }
+        fun useTwice(n) { return twiceDeclared(n); }
+    """, memo_size=1024)
+    assert sorted(function.name.lexeme for function in interp.pure) == [
+        "fib", "swapped", "twice", "twiceDeclared", "twiceDeclared"]
+
+
+def test_nothing_is_pure_unless_asked():
+    interp, _ = resolve("fun id(n) { return n; }")
+    assert not interp.pure
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_memoized_calls(engine):
+    interp, statements = resolve("""
+        fun fib(n) { if (n < 2) return n; return fib(n - 2) + fib(n - 1); }
+        fun negate(n) { return -n; }
+        fun plus(a, b) { return a + b; }
+        print fib(70);
+        print fib(70);
+        print negate(0);
+        print negate(-0);
+        print plus(true, false);
+        print plus(1, 0);
+    """, engine, memo_size=1024)
+    interp.interpret(statements)
+    assert interp.output == ["190392490709135.0", "190392490709135.0", "-0.0", "0.0", "1", "1.0"]
+    fib = next(memo for declaration, memo in interp.memos.items() if declaration.name.lexeme == "fib")
+    assert (fib.hits, fib.misses) == (69, 71)
+
+
+def test_memo_evicts_the_least_recently_used():
+    memo = Memo(2)
+    for n in (1.0, 2.0):
+        memo.put(arguments_key([n]), n)
+    assert memo.get(arguments_key([1.0])) == 1.0
+    memo.put(arguments_key([3.0]), 3.0)
+    assert memo.get(arguments_key([2.0])) is MISSING
+    assert memo.get(arguments_key([1.0])) == 1.0
+    assert (memo.hits, memo.misses) == (2, 1)
@@ -0,0 +1,64 @@
+import pytest
+
+from plox import natives
+from plox.plox import ENGINES, LoxRunner
+
+from .conftest import run
+
+
+@pytest.fixture
+def strings():
+    module = natives.module("test-strings")
+
+    @module.native()
+    def upper(s):
+        return s.upper()
+
+    @module.native("join", 2)
+    def join(*parts):
+        return "".join(parts)
+
+    yield module
+    del natives.MODULES["test-strings"]
+
+
+def test_registers_with_name_and_arity(strings):
+    assert sorted(strings.functions) == ["join", "upper"]
+    assert strings.functions["upper"].arity() == 1
+    assert strings.functions["join"].arity() == 2
+    assert str(strings.functions["upper"]) == "<native fn>"
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_clock_resolution(engine):
+    output = run("""
+        var start = clock();
+        var end = clock();
+        while (end == start) end = clock();
+        print end > start;
+        print end - start < 1;
+        print clock;
+    """, engine).output
+    assert output == ["True", "True", "<native fn>"]
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_loaded_modules(engine, strings):
+    output = run("""
+        fun shout(s) { return join(upper(s), "!"); }
+        for (var i = 0; i < 2; i = i + 1) print shout("hi");
+        var f = upper;
+        print f("x");
+    """, engine, ["test-strings"]).output
+    assert output == ["HI!", "HI!", "X"]
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_arity_is_checked(capsys, engine, strings):
+    LoxRunner(engine=engine, modules=["test-strings"]).run('print upper("a");\nprint join("a");')
+    assert capsys.readouterr().out.splitlines() == ["A", "[line 2] Error: Expected 2 arguments but got 1."]
+
+
+def test_unloaded_modules_are_undefined(capsys, strings):
+    LoxRunner().run('print upper("a");')
+    assert capsys.readouterr().out.splitlines() == ["[line 1] Error: Undefined variable upper."]
@@ -0,0 +1,113 @@
+import pytest
+
+from plox import plox
+from plox.ast_printer import AstPrinter
+from plox.expr import Literal
+from plox.interpreter import Interpreter
+from plox.optimizer import Optimizer
+from plox.parser import Parser
+from plox.plox import LoxRunner
+from plox.resolver import Resolver
+from plox.scanner import FastScanner
+from plox.stmt import Block, Print, Var
+from benchmarks.common import CLOSURE_PROGRAM, FIB_PROGRAM, SAMPLE_PROGRAM
+
+
+def optimize(source: str):
+    statements = Parser(FastScanner(source).scan_buffer()).parse()
+    interp = Interpreter()
+    Resolver(interp).resolve(statements)
+    return Optimizer(interp).optimize(statements)
+
+
+@pytest.mark.parametrize("source, printed", [
+    ("print 1 + 2 * 3;", "7.0"),
+    ("print -(4 - 1) < 2;", "True"),
+    ("print !(1 == 1.0);", "False"),
+    ('print "con" + "cat";', "concat"),
+    # Errors are left for runtime, but their operands are still folded.
+    ('print "a" - (1 + 2);', "(- a 3.0)"),
+    ("print 1 / (2 - 2);", "(/ 1.0 0.0)"),
+])
+def test_folding(source, printed):
+    (statement,) = optimize(source)
+    assert AstPrinter().print(statement.expression) == printed
+
+
+def test_dead_branches_are_removed():
+    statements = optimize("""
+        if (false) print 1; else print 2;
+        if (1 < 0) print 3;
+        while (false) print 4;
+        print 5;
+    """)
+    assert [AstPrinter().print(statement.expression) for statement in statements] == ["2.0", "5.0"]
+
+
+def test_unassigned_literal_locals_are_propagated():
+    (block,) = optimize("""
+        {
+            var limit = 10;
+            var changed = 1;
+            changed = 2;
+            print limit * 2;
+            print changed;
+        }
+    """)
+    assert isinstance(block, Block) and isinstance(block.statements[0], Var)
+    doubled, changed = block.statements[-2:]
+    assert isinstance(doubled, Print) and isinstance(doubled.expression, Literal)
+    assert doubled.expression.value == 20.0
+    assert not isinstance(changed.expression, Literal)
+
+
+PROGRAMS = [
+    SAMPLE_PROGRAM,
+    FIB_PROGRAM,
+    CLOSURE_PROGRAM,
+    """
+    fun three() { return 1 + 2; }
+    print three() == three();
+    print 1 == 1;
+    print true or 1 / 0;
+    { var s = "a" + "b"; print s == "ab"; }
+    """,
+    """
+    {
+        var n = 4;
+        var total = 0;
+        while (total < n * 10) total = total + n;
+        if (total > 0 and !(total == 0)) print total; else print "none";
+    }
+    """,
+]
+
+
+@pytest.mark.parametrize("program", PROGRAMS)
+def test_optimized_output_is_identical(program, capsys):
+    LoxRunner(optimize=False).run(program)
+    expected = capsys.readouterr().out
+    LoxRunner().run(program)
+    assert capsys.readouterr().out == expected
+
+
+def test_runtime_errors_keep_their_token(capsys):
+    program = """
+        print 1;
+        {
+            var two = 2;
+            print "a" +
+                (two * 3);
+        }
+    """
+    LoxRunner(optimize=False).run(program)
+    expected = capsys.readouterr().out
+    plox.had_error = False
+    LoxRunner().run(program)
+    assert capsys.readouterr().out == expected == "1.0\n[line 5] Error: Can only combine numbers or strings\n"
+
+
+def test_errors_in_removed_code_are_still_reported(capsys):
+    LoxRunner().run("if (false) { return 1; }")
+    assert capsys.readouterr().out == "[line 1] Error: Can't return from top-level code.\n"
+    assert plox.had_error
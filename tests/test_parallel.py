@@ -0,0 +1,42 @@
+from benchmarks.common import SAMPLE_PROGRAM
+from plox import parallel
+from plox import plox
+from plox.parser import Parser
+from plox.scanner import FastScanner
+
+SOURCE = SAMPLE_PROGRAM + """
+// var in a comment, "fun" in a string
+var s = "class
+fun var";
+for (var i = 0; i < 2; i = i + 1) print i;
+class A { method() { var x = 1; } }
+""" + SAMPLE_PROGRAM
+
+
+def sequential(source):
+    return Parser(FastScanner(source).scan_buffer()).parse()
+
+
+def test_cuts_only_at_top_level_declarations():
+    cuts = parallel.split_declarations(SOURCE, len(SOURCE))
+    assert len(cuts) > 2
+    for offset, line in cuts[1:]:
+        assert SOURCE[offset:].startswith(("class ", "fun ", "var "))
+        assert line == SOURCE.count("\n", 0, offset) + 1
+        assert not SOURCE[offset:].startswith(("var i", "var x", "fun var"))
+
+
+def test_matches_sequential_parse():
+    expected = sequential(SOURCE)
+    assert repr(parallel.parse(SOURCE, jobs=2, pieces=len(SOURCE))) == repr(expected)
+    assert repr(parallel.parse(SOURCE, jobs=2, pieces=3)) == repr(expected)
+
+
+def test_errors_are_reported_as_in_a_sequential_parse():
+    source = "var a = 1;\nprint a\nvar b = 2;\nfun f( {}\nvar c = @;\n"
+    with plox.collect_errors() as expected:
+        sequential(source)
+    with plox.collect_errors() as errors:
+        parallel.parse(source, jobs=2, pieces=len(source))
+    assert errors == expected
+    assert len(errors) == 4
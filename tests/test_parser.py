@@ -0,0 +1,56 @@
+import pytest
+
+from plox import plox
+from plox.ast_printer import AstPrinter
+from plox.expr import Assign, Logical, Set
+from plox.parser import Parser
+from plox.scanner import FastScanner
+from plox.stmt import Expression
+
+
+def parse_expression(source: str):
+    statements = Parser(FastScanner(source + ";").scan_tokens()).parse()
+    assert len(statements) == 1 and isinstance(statements[0], Expression)
+    return statements[0].expression
+
+
+@pytest.mark.parametrize("source, printed", [
+    ("1 + 2 * 3 - 4", "(- (+ 1.0 (* 2.0 3.0)) 4.0)"),
+    ("1 - 2 - 3", "(- (- 1.0 2.0) 3.0)"),
+    ("8 / 4 / 2", "(/ (/ 8.0 4.0) 2.0)"),
+    ("-1 < 2 == !3 >= 4", "(== (< (- 1.0) 2.0) (>= (! 3.0) 4.0))"),
+    ("--(1 + 2) * 3", "(* (- (- (grouping (+ 1.0 2.0)))) 3.0)"),
+])
+def test_precedence(source, printed):
+    assert AstPrinter().print(parse_expression(source)) == printed
+
+
+def test_logical_and_binds_tighter_than_or():
+    expr = parse_expression("a or b and c")
+    assert isinstance(expr, Logical) and expr.operator.lexeme == "or"
+    assert isinstance(expr.right, Logical) and expr.right.operator.lexeme == "and"
+
+
+def test_assignment_is_right_associative():
+    expr = parse_expression("a = b.c = d")
+    assert isinstance(expr, Assign) and expr.name.lexeme == "a"
+    assert isinstance(expr.value, Set) and expr.value.name.lexeme == "c"
+
+
+def test_invalid_assignment_target():
+    with plox.collect_errors() as errors:
+        Parser(FastScanner("a + b = c;").scan_tokens()).parse()
+    assert errors == [(1, "Invalid assignment target")]
+
+
+@pytest.mark.parametrize("source", [
+    'class A < B { init(x) { super.init(x); this.x = -x; return "s"; } }\nfun f(a, b) { return a(b).c; }',
+    "var = 1;\nprint 2 +;\nfor (;;) { print nil; }\n1 = 2;",
+])
+def test_token_buffer_parses_like_tokens(source):
+    with plox.collect_errors() as errors:
+        from_tokens = Parser(FastScanner(source).scan_tokens()).parse()
+    with plox.collect_errors() as buffer_errors:
+        from_buffer = Parser(FastScanner(source).scan_buffer()).parse()
+    assert repr(from_buffer) == repr(from_tokens)
+    assert buffer_errors == errors
@@ -0,0 +1,47 @@
+from plox.plox import LoxRunner
+from plox.quickening import MAX_DEOPTS, summarize
+
+from .conftest import run
+
+
+def test_numeric_loops_specialize():
+    interp = run("""
+        var total = 0;
+        for (var i = 0; i < 100; i = i + 1) {
+            total = total + -i * 2;
+        }
+        print total;
+    """)
+    assert interp.output == ["-9900.0"]
+    totals = summarize(interp.quickened.values())
+    assert totals["specialized"] == totals["sites"] == 5
+    assert totals["misses"] == 5
+    assert totals["deopts"] == 0
+    assert totals["hits"] == 5 * 100 - 4
+
+
+def test_sites_deoptimize_when_operand_types_change():
+    interp = run("""
+        fun add(a, b) { return a + b; }
+        print add(1, 2);
+        print add("a", "b");
+        print add(true, 2);
+        print add(3, 4);
+        for (var i = 0; i < 6; i = i + 1) {
+            add(i, i);
+            print add("c", "d");
+        }
+    """)
+    assert interp.output == ["3.0", "ab", "3.0", "7.0"] + ["cd"] * 6
+    site = next(site for site in interp.quickened.values() if site.deopts)
+    assert site.deopts == MAX_DEOPTS + 1
+    assert site.operation is None
+
+
+def test_errors_are_unchanged_after_specializing(capsys):
+    LoxRunner().run("""
+        fun subtract(a, b) { return a - b; }
+        print subtract(3, 1);
+        print subtract(3, "1");
+    """)
+    assert capsys.readouterr().out.splitlines() == ["2.0", "[line 2] Error: Operands must be numbers"]
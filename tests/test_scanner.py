@@ -0,0 +1,49 @@
+import io
+
+import pytest
+
+from plox.scanner import FastScanner, Scanner, StreamingScanner
+from benchmarks.common import SAMPLE_PROGRAM
+
+
+SOURCES = [
+    "",
+    "print 1+2;",
+    SAMPLE_PROGRAM,
+    "var s = \"multi\nline\";\nprint s; // trailing comment",
+    "a!=b==c<=d>=e<f>g!h=i/j",
+    "1.5 + 2. + .5 + 007",
+    "  \t\r\n  ",
+    "print \"unterminated\n",
+    "var a = @ 1 # 2;",
+]
+
+
+@pytest.mark.parametrize("source", SOURCES)
+def test_fast_scanner_matches_scanner(source, capsys):
+    expected = Scanner(source).scan_tokens()
+    expected_errors = capsys.readouterr().out
+
+    assert FastScanner(source).scan_tokens() == expected
+    assert capsys.readouterr().out == expected_errors
+
+
+@pytest.mark.parametrize("source", SOURCES)
+def test_token_buffer_matches_scanner(source, capsys):
+    expected = Scanner(source).scan_tokens()
+    expected_errors = capsys.readouterr().out
+
+    buffer = FastScanner(source).scan_buffer()
+    assert list(buffer) == expected
+    assert [buffer[i] for i in range(len(buffer))] == expected
+    assert capsys.readouterr().out == expected_errors
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 7, 4096])
+@pytest.mark.parametrize("source", SOURCES)
+def test_streaming_scanner_matches_scanner(source, chunk_size, capsys):
+    expected = Scanner(source).scan_tokens()
+    expected_errors = capsys.readouterr().out
+
+    assert list(StreamingScanner(io.StringIO(source), chunk_size)) == expected
+    assert capsys.readouterr().out == expected_errors
@@ -0,0 +1,40 @@
+from plox.transpiler import Transpiler, _compile
+
+from .conftest import resolve, run
+
+
+def transpile(source: str) -> Transpiler:
+    interp, statements = resolve(source)
+    transpiler = Transpiler(interp)
+    transpiler.source = transpiler.transpile(statements)
+    return transpiler
+
+
+def test_functions_become_python_functions():
+    source = transpile("""
+        fun add(a, b) {
+            var sum = a + b;
+            return sum;
+        }
+    """).source
+    assert "def _add_1(s0, s1):" in source
+    assert "s2 = (_t1 + _t2 if" in source
+
+
+def test_strings_and_tokens_are_constants():
+    transpiler = transpile('print "a" + "b"; print "a";')
+    strings = [value for value in transpiler.constants.values() if isinstance(value, str)]
+    assert sorted(strings) == ["a", "b"]
+
+
+def test_code_is_cached_by_source():
+    _compile.cache_clear()
+    assert run("print 1 + 2;", "python").output == ["3.0"]
+    assert run("print 1 + 2;", "python").output == ["3.0"]
+    assert _compile.cache_info().hits == 1
+
+
+def test_falls_back_when_python_cannot_compile_it():
+    # CPython allows at most 20 nested loops.
+    source = "var i = 0;" + "while (i < 1) {" * 25 + "i = i + 1;" + "}" * 25 + "print i;"
+    assert run(source, "python").output == ["1.0"]
@@ -0,0 +1,91 @@
+from plox.chunk import disassemble
+from plox.compiler import Compiler
+from plox.lox_callable import LoxCallable
+from plox.plox import LoxRunner
+
+from .conftest import resolve, run
+
+
+def compile_program(source: str):
+    interp, statements = resolve(source)
+    return Compiler(interp).compile(statements)
+
+
+def test_disassembles_nested_functions():
+    listing = disassemble(compile_program("""
+        fun add(a, b) {
+            return a + b;
+        }
+        print add(1, 2);
+    """)).splitlines()
+    assert listing[0] == "== script =="
+    assert "0000    2 CLOSURE             0 '<fn add>'" in listing
+    assert "== add ==" in listing
+    assert "0004    | ADD" in listing
+
+
+def test_runtime_errors_report_their_line(capsys):
+    LoxRunner(engine="vm").run("""
+        var a = 1;
+        print a;
+        print a +
+            "b";
+    """)
+    assert capsys.readouterr().out.splitlines() == ["1.0", "[line 4] Error: Can only combine numbers or strings"]
+
+
+def test_deep_recursion_does_not_use_the_python_stack():
+    source = """
+        fun count(n) {
+            if (n == 0) return 0;
+            return 1 + count(n - 1);
+        }
+        print count(5000);
+    """
+    assert run(source, "vm").output == ["5000.0"]
+
+
+def test_stack_overflow_is_a_runtime_error(capsys):
+    LoxRunner(engine="vm", max_depth=50).run("""
+        fun forever(n) {
+            return forever(n + 1);
+        }
+        forever(0);
+    """)
+    assert capsys.readouterr().out == "[line 3] Error: Stack overflow\n"
+
+
+def test_max_depth_counts_nested_calls(capsys):
+    program = """
+        fun count(n) {
+            if (n == 0) return 0;
+            return 1 + count(n - 1);
+        }
+        print count(%d);
+    """
+    LoxRunner(engine="vm", max_depth=30).run(program % 29)
+    LoxRunner(engine="vm", max_depth=30).run(program % 30)
+    assert capsys.readouterr().out.splitlines() == ["29.0", "[line 4] Error: Stack overflow"]
+
+
+class Apply(LoxCallable):
+    """Calls its argument through call(), which for a Lox function re-enters VM.run()."""
+    def arity(self) -> int:
+        return 1
+
+    def call(self, interpreter, arguments):
+        return arguments[0].call(interpreter, [])
+
+
+def test_max_depth_counts_calls_that_re_enter_the_vm(capsys):
+    source = """
+        fun recurse() {
+            return apply(recurse);
+        }
+        recurse();
+    """
+    interp, statements = resolve(source, "vm", max_depth=50)
+    interp.globals.define("apply", Apply())
+    interp.interpret(statements)
+    assert capsys.readouterr().out == "[line 3] Error: Stack overflow\n"
+    assert interp.depth == 0